@@ -0,0 +1 @@
+"""seishin ベンチマーク (合成データ + models/CLI シナリオ)"""
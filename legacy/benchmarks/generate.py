@@ -0,0 +1,212 @@
+"""合成シーズンデータの生成
+
+Deterministic for a given scale, seed and anchor date: projects ×
+episodes × cuts × 10 phases, creators, companies, orders, work_log and
+cut_phase_event history.
+
+    python -m benchmarks.generate --scale large --out /tmp/seishin-large.db
+"""
+
+import random
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+import click
+
+from seishin import db
+from seishin.cutspec import cut_sort_key
+
+
+class Scale(NamedTuple):
+    projects: int
+    episodes: int
+    cuts: int          # per episode
+    creators: int
+    companies: int
+    orders: int        # per episode
+
+
+SCALES = {
+    "tiny": Scale(1, 2, 50, 10, 3, 4),            # 1k cut_phase
+    "small": Scale(1, 6, 300, 40, 8, 10),         # 18k
+    "medium": Scale(1, 12, 1000, 120, 15, 20),    # 120k
+    "large": Scale(2, 12, 5000, 300, 30, 40),     # 1.2M
+}
+
+N_PHASES = len(db.PHASES)
+# How many leading phases of a cut are completed (0..10)
+_PROGRESS_WEIGHTS = [6, 8, 10, 12, 12, 12, 10, 10, 8, 7, 5]
+_CURRENT_STATUS = (["in_progress"] * 6 + ["pending"] * 2 + ["retake", "delayed"])
+
+
+def _ts(d: datetime) -> str:
+    return d.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate(path: Path, scale: Scale, seed: int = 1, anchor: date | None = None) -> dict:
+    """Create a fresh database at ``path``. Returns row counts per table."""
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    db.SEISHIN_DIR, db.DB_PATH = path.parent, path
+    db.init_db()
+
+    rng = random.Random(seed)
+    now = datetime.combine(anchor or date.today(), datetime.min.time()) + timedelta(hours=12)
+    conn = db.get_conn()
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    counts = dict.fromkeys(
+        ["project", "episode", "cut", "cut_phase", "cut_phase_event", "creator",
+         "company", "order", "order_cut", "work_log"], 0)
+
+    creators = []
+    for i in range(1, scale.creators + 1):
+        creators.append((
+            i, f"作画{i:03d}", rng.choice(["animator", "director", "checker"]),
+            ",".join(rng.sample(["action", "mecha", "effects", "character", "bg"], 2)),
+            rng.randint(1, 5), rng.randint(1, 5), int(rng.random() < 0.7),
+            rng.randint(1, 6), rng.choice([3000, 3500, 4000, 5000, 6000]),
+        ))
+    conn.executemany(
+        """INSERT INTO creator (id, name, category, skills, speed_rating, quality_rating,
+           pulls_deadline, daily_capacity, price_per_cut) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        creators,
+    )
+    conn.executemany(
+        """INSERT INTO company (id, name, capabilities, capacity_per_day, num_staff,
+           quality_rating) VALUES (?, ?, ?, ?, ?, ?)""",
+        [(i, f"スタジオ{i:02d}", rng.choice(["douga", "shiage", "douga,shiage", "satsuei"]),
+          rng.randint(10, 60), rng.randint(5, 40), rng.randint(1, 5))
+         for i in range(1, scale.companies + 1)],
+    )
+    counts["creator"], counts["company"] = scale.creators, scale.companies
+
+    ep_id = cut_id = cp_id = order_id = 0
+    for p in range(1, scale.projects + 1):
+        conn.execute(
+            "INSERT INTO project (id, name, short_name, total_episodes) VALUES (?, ?, ?, ?)",
+            (p, f"bench{p}", f"B{p}", scale.episodes),
+        )
+        counts["project"] += 1
+        for e in range(1, scale.episodes + 1):
+            ep_id += 1
+            air = now.date() + timedelta(days=7 * e)
+            conn.execute(
+                """INSERT INTO episode (id, project_id, number, title, air_date, v_edit_date,
+                   budget) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (ep_id, p, e, f"第{e}話", air.isoformat(),
+                 (air - timedelta(days=10)).isoformat(), scale.cuts * 40000),
+            )
+            counts["episode"] += 1
+            cuts, phases, events, logs = [], [], [], []
+            numbers = []
+            for n in range(1, scale.cuts + 1):
+                cut_id += 1
+                number = f"C{n:04d}"
+                numbers.append((cut_id, number))
+                done = rng.choices(range(N_PHASES + 1), _PROGRESS_WEIGHTS)[0]
+                cuts.append((
+                    cut_id, ep_id, number, cut_sort_key(number),
+                    rng.choices([1, 2, 3, 4, 5], [1, 3, 5, 3, 1])[0],
+                    int(rng.random() < 0.03), (1 << done) - 1,
+                ))
+                t = now - timedelta(days=3 * done + rng.randint(0, 5), hours=rng.randint(0, 8))
+                for i, phase in enumerate(db.PHASES):
+                    cp_id += 1
+                    assignee = rng.randint(1, scale.creators) if i <= done or rng.random() < 0.3 else None
+                    deadline = None
+                    started = completed = None
+                    if i < done:
+                        status = "completed"
+                        started = t
+                        t = t + timedelta(days=rng.uniform(0.5, 3))
+                        completed = t
+                        events.append((cp_id, 1, assignee, int(started.timestamp())))
+                        events.append((cp_id, 2, assignee, int(completed.timestamp())))
+                        if assignee:
+                            logs.append((assignee, ep_id, phase, rng.randint(5, 60),
+                                         _ts(started), _ts(completed)))
+                    else:
+                        status = _CURRENT_STATUS[rng.randrange(10)] if i == done else "pending"
+                        deadline = (now.date() + timedelta(
+                            days=4 * (i - done) + rng.randint(-5, 10))).isoformat()
+                        if status != "pending":
+                            started = t
+                            events.append((cp_id, db.STATUS_CODE[status], assignee,
+                                           int(started.timestamp())))
+                    phases.append((
+                        cp_id, cut_id, i, db.STATUS_CODE[status], assignee, deadline,
+                        _ts(started) if started else None, _ts(completed) if completed else None,
+                    ))
+            conn.executemany(
+                """INSERT INTO cut (id, episode_id, number, sort_key, difficulty, is_priority,
+                   phase_mask) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                cuts,
+            )
+            conn.executemany(
+                """INSERT INTO cut_phase_data (id, cut_id, phase, status, assignee_id, deadline,
+                   started_at, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                phases,
+            )
+            conn.executemany(
+                "INSERT INTO cut_phase_event (cut_phase_id, status, assignee_id, at) VALUES (?, ?, ?, ?)",
+                events,
+            )
+            conn.executemany(
+                """INSERT INTO work_log (creator_id, episode_id, phase, cuts_completed,
+                   sheets_completed, started_at, completed_at) VALUES (?, ?, ?, 1, ?, ?, ?)""",
+                logs,
+            )
+            counts["cut"] += len(cuts)
+            counts["cut_phase"] += len(phases)
+            counts["cut_phase_event"] += len(events)
+            counts["work_log"] += len(logs)
+
+            for _ in range(scale.orders):
+                order_id += 1
+                phase = rng.choice(db.PHASES)
+                size = min(scale.cuts, rng.randint(10, 100))
+                start = rng.randint(0, scale.cuts - size)
+                covered = numbers[start:start + size]
+                if rng.random() < 0.5:
+                    kind, assignee, price = "creator", rng.randint(1, scale.creators), 4000
+                else:
+                    kind, assignee, price = "company", rng.randint(1, scale.companies), 3000
+                conn.execute(
+                    """INSERT INTO "order" (id, episode_id, phase, cut_numbers, assignee_type,
+                       assignee_id, price_per_cut, total_price, deadline, status)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (order_id, ep_id, phase, ",".join(n for _, n in covered), kind, assignee,
+                     price, price * size, (now.date() + timedelta(days=rng.randint(-5, 30))).isoformat(),
+                     rng.choice(["draft", "issued", "accepted", "completed"])),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO order_cut (order_id, cut_id, phase) VALUES (?, ?, ?)",
+                    [(order_id, cid, phase) for cid, _ in covered],
+                )
+                counts["order"] += 1
+                counts["order_cut"] += size
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return counts
+
+
+@click.command()
+@click.option("--scale", type=click.Choice(list(SCALES)), default="small", help="データ規模")
+@click.option("--seed", type=int, default=1, help="乱数シード")
+@click.option("--out", type=click.Path(dir_okay=False, path_type=Path), required=True,
+              help="出力DBパス (上書き)")
+def main(scale, seed, out):
+    """合成データベースを生成"""
+    start = time.perf_counter()
+    counts = generate(out, SCALES[scale], seed)
+    for table, n in counts.items():
+        click.echo(f"{table:16} {n:>10,}")
+    click.echo(f"{out} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""一覧系クエリのメモリ計測 (tracemalloc)
+
+    python -m benchmarks.memory                    # 1話 10,000カット (cut_board 100,000行)
+    python -m benchmarks.memory --cuts 20000 --repeat 3
+
+Generates a one-episode season in a temporary directory, then runs
+cut_list, cut_board, priority_list and order_list under tracemalloc.
+"peak" is the high-water mark during the call (cursor, rows and the
+result list together); "kept" is what the returned result still holds,
+which is what a caller pays for keeping the rows around. "ms" is taken
+with tracing on, so it runs slower than benchmarks.run.
+"""
+
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import click
+
+from seishin import models
+
+from .generate import Scale, generate
+
+
+def _rows(result) -> int:
+    return sum(map(len, result.values())) if isinstance(result, dict) else len(result)
+
+
+def _measure(fn) -> tuple[int, int, int, float]:
+    """(rows, peak bytes, kept bytes, seconds) for one call of ``fn``."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _rows(result), peak, kept, elapsed
+
+
+@click.command()
+@click.option("--cuts", type=click.IntRange(min=1), default=10_000, help="1話のカット数")
+@click.option("--repeat", type=click.IntRange(min=1), default=1, help="計測回数 (最小値を表示)")
+@click.option("--seed", type=int, default=1)
+def main(cuts, repeat, seed):
+    """大きな一覧結果の tracemalloc ピーク/保持メモリを計測"""
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        generate(Path(tmp) / "seishin.db", Scale(1, 1, cuts, 40, 8, cuts // 100), seed)
+        click.echo(f"generated 1 episode × {cuts:,} cuts in {time.perf_counter() - start:.1f}s")
+        episode_id = 1
+        models.priority_list(episode_id)  # build priority_rank outside the measurement
+
+        cases = [
+            ("cut_list", lambda: models.cut_list(episode_id)),
+            ("cut_board", lambda: models.cut_board(episode_id)),
+            ("priority_list", lambda: models.priority_list(episode_id)),
+            ("order_list", lambda: models.order_list(episode_id)),
+        ]
+        click.echo(f"{'':14} {'rows':>9} {'peak KiB':>10} {'kept KiB':>10} {'B/row':>7} {'ms':>7}")
+        for name, fn in cases:
+            runs = [_measure(fn) for _ in range(repeat)]
+            rows = runs[0][0]
+            peak = min(r[1] for r in runs)
+            kept = min(r[2] for r in runs)
+            ms = min(r[3] for r in runs) * 1000
+            click.echo(f"{name:14} {rows:9,} {peak / 1024:10,.0f} {kept / 1024:10,.0f} "
+                       f"{kept / max(rows, 1):7.0f} {ms:7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""ベンチマーク実行 + ベースライン比較
+
+    python -m benchmarks.run --scale small            # run and compare
+    python -m benchmarks.run --scale small --save     # store as the baseline
+    python -m benchmarks.run --scale large -k priority
+
+Per scenario: median/min wall time over --repeat runs (after one warm-up),
+SQL statements and connections for one run (seishin.profiling: trace
+callback on every connection from get_conn), and tracemalloc peak for one run. Exits 1 when
+a scenario issues more statements than the baseline did. Wall times in
+the committed baselines come from one machine, so they are only shown
+for reference; --check-time also fails on a min time slower than
+baseline by more than --tolerance (compare against a baseline saved on
+the same machine).
+"""
+
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from seishin import config, db, profiling
+
+from .generate import SCALES, generate
+from .scenarios import build
+
+HERE = Path(__file__).parent
+BASELINE_DIR = HERE / "baselines"
+DATA_DIR = HERE / ".data"
+NOISE_MS = 2.0  # differences below this are never regressions
+
+console = Console(stderr=True, width=None if sys.stderr.isatty() else 120)
+
+
+def _measure(fn, repeat: int) -> dict:
+    fn()  # warm-up: page cache, priority_rank rebuild, imports
+    profiler = profiling.Profiler()
+    profiling.install(profiler)
+    try:
+        fn()
+    finally:
+        profiling.uninstall(profiler)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "queries": profiler.statements,
+        "conns": profiler.connections,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _prepare(scale: str, seed: int, regenerate: bool, workdir: Path) -> Path:
+    """Generate (once per scale/seed) and copy to a scratch DB the run may write to."""
+    DATA_DIR.mkdir(exist_ok=True)
+    pristine = DATA_DIR / f"{scale}-seed{seed}.db"
+    if regenerate or not pristine.exists():
+        console.print(f"[dim]generating {scale} → {pristine}[/dim]")
+        generate(pristine, SCALES[scale], seed)
+    work = workdir / "bench.db"
+    shutil.copyfile(pristine, work)
+    db.SEISHIN_DIR, db.DB_PATH, db.CONFIG_PATH = workdir, work, workdir / "config.json"
+    db.init_db()
+    config.set_active_project(1, "bench1")
+    return work
+
+
+def _compare(results: dict, baseline: dict, tolerance: float | None) -> dict[str, str]:
+    """name -> reason, for scenarios that regressed against ``baseline``;
+    times only count when a ``tolerance`` is given."""
+    regressions = {}
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        if r["queries"] > b["queries"]:
+            regressions[name] = f"queries {b['queries']} → {r['queries']}"
+        elif (tolerance is not None and r["min_ms"] > b["min_ms"] * (1 + tolerance)
+              and r["min_ms"] - b["min_ms"] > NOISE_MS):
+            regressions[name] = f"{b['min_ms']:.1f} → {r['min_ms']:.1f} ms (min)"
+    return regressions
+
+
+def _render(results: dict, baseline: dict, regressions: dict):
+    table = Table(box=box.SIMPLE)
+    table.add_column("scenario")
+    table.add_column("median ms", justify="right")
+    table.add_column("min ms", justify="right")
+    table.add_column("base min", justify="right", style="dim")
+    table.add_column("queries", justify="right")
+    table.add_column("conns", justify="right")
+    table.add_column("peak KiB", justify="right")
+    for name, r in results.items():
+        b = baseline.get(name, {})
+        table.add_row(
+            f"[red]{name}[/red]" if name in regressions else name,
+            f"{r['median_ms']:.2f}",
+            f"{r['min_ms']:.2f}",
+            f"{b['min_ms']:.2f}" if b else "-",
+            str(r["queries"]),
+            str(r["conns"]),
+            f"{r['peak_kib']:,.0f}",
+        )
+    console.print(table)
+
+
+@click.command()
+@click.option("--scale", type=click.Choice(list(SCALES)), default="small", help="データ規模")
+@click.option("--seed", type=int, default=1, help="生成シード")
+@click.option("--repeat", type=click.IntRange(min=1), default=5, help="計測回数")
+@click.option("-k", "keyword", default=None, help="名前にこの文字列を含むシナリオのみ")
+@click.option("--save", is_flag=True, help="結果をベースラインとして保存")
+@click.option("--check-time", is_flag=True, help="実行時間の遅化も回帰として扱う")
+@click.option("--tolerance", type=float, default=0.25,
+              help="--check-time で許容する遅化率 (0.25 = 25%)")
+@click.option("--regenerate", is_flag=True, help="キャッシュ済みデータを作り直す")
+@click.option("--json", "json_out", type=click.Path(dir_okay=False, path_type=Path),
+              default=None, help="結果をJSONで書き出す")
+def main(scale, seed, repeat, keyword, save, check_time, tolerance, regenerate, json_out):
+    """models / CLI のベンチマークを実行"""
+    workdir = DATA_DIR / f"work-{scale}"
+    workdir.mkdir(parents=True, exist_ok=True)
+    _prepare(scale, seed, regenerate, workdir)
+
+    results = {}
+    for sc in build("bench1", workdir):
+        if keyword and keyword not in sc.name:
+            continue
+        results[sc.name] = _measure(sc.fn, repeat)
+
+    baseline_path = BASELINE_DIR / f"{scale}.json"
+    baseline = {}
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = {} if save else _compare(results, baseline, tolerance if check_time else None)
+    _render(results, baseline, regressions)
+
+    report = {
+        "scale": scale,
+        "seed": seed,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": results,
+    }
+    if json_out:
+        json_out.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    if save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        if keyword and baseline:
+            report["results"] = {**baseline, **results}
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        console.print(f"[green]baseline saved: {baseline_path}[/green]")
+    elif regressions:
+        for name, why in regressions.items():
+            console.print(f"[red]REGRESSION {name}: {why}[/red]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""計測シナリオ: models.py の公開関数と CLI コマンド
+
+Every scenario is a zero-argument callable built against a generated
+database (see generate.py). Scenarios that write either rewrite the same
+rows or add rows under fresh names, so they can be repeated; they run
+after the read-only ones.
+"""
+
+import itertools
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from click.testing import CliRunner
+
+from seishin import models
+from seishin.cli import cli
+from seishin.snapshot import export_project
+
+
+class Scenario(NamedTuple):
+    name: str
+    fn: Callable[[], object]
+    mutates: bool = False
+
+
+def _cli(*args: str) -> Callable[[], object]:
+    runner = CliRunner()
+
+    def run():
+        result = runner.invoke(cli, list(args), catch_exceptions=False)
+        if result.exit_code != 0:
+            raise RuntimeError(f"seishin {' '.join(args)}: exit {result.exit_code}\n{result.output}")
+        return result.output
+    return run
+
+
+def build(project_name: str, workdir: Path) -> list[Scenario]:
+    proj = models.project_get_by_name(project_name)
+    pid = proj["id"]
+    ep = models.episode_get(pid, 1)
+    eid = ep["id"]
+    cuts = models.cut_list(eid)
+    mid = cuts[len(cuts) // 2]["number"]
+    spec = f"{cuts[0]['number']}-{cuts[min(len(cuts), 100) - 1]['number']}"
+    numbers = [c["number"] for c in cuts[:100]]
+    as_of = int(time.time()) - 3 * 86400
+    last_ep = models.episode_list(pid)[-1]["number"]
+    serial = itertools.count(1)
+    ordered = ",".join(numbers[:10])
+
+    s = [
+        Scenario("project_list", models.project_list),
+        Scenario("project_get_by_name", lambda: models.project_get_by_name(project_name)),
+        Scenario("episode_list", lambda: models.episode_list(pid)),
+        Scenario("episode_get", lambda: models.episode_get(pid, 1)),
+        Scenario("episode_show", lambda: models.episode_show(pid, 1)),
+        Scenario("parse_cut_range", lambda: models.parse_cut_range("C0001-C5000,C0042A-C0042Z")),
+        Scenario("cut_list", lambda: models.cut_list(eid)),
+        Scenario("cut_list_page", lambda: models.cut_list(eid, mid, 50)),
+        Scenario("cut_list_ready_for", lambda: models.cut_list(eid, ready_for="douga")),
+        Scenario("cut_get", lambda: models.cut_get(eid, mid)),
+        Scenario("cut_history", lambda: models.cut_history(eid, mid)),
+        Scenario("cut_board", lambda: models.cut_board(eid)),
+        Scenario("cut_board_as_of", lambda: models.cut_board(eid, as_of)),
+        Scenario("creator_list", models.creator_list),
+        Scenario("creator_list_skill", lambda: models.creator_list("mecha")),
+        Scenario("creator_get", lambda: models.creator_get(1)),
+        Scenario("creator_get_by_name", lambda: models.creator_get_by_name("作画001")),
+        Scenario("creator_throughput", lambda: models.creator_throughput(7)),
+        Scenario("company_list", models.company_list),
+        Scenario("company_get", lambda: models.company_get(1)),
+        Scenario("company_get_by_name", lambda: models.company_get_by_name("スタジオ01")),
+        Scenario("company_load", lambda: models.company_load(1, ("douga", "2030-01-01", 200))),
+        Scenario("order_list", lambda: models.order_list(eid)),
+        Scenario("order_list_all", lambda: models.order_list()),
+        Scenario("order_get", lambda: models.order_get(1)),
+        Scenario("order_check_cuts", lambda: models.order_check_cuts(eid, "douga", numbers)),
+        Scenario("order_reconcile", lambda: models.order_reconcile(eid)),
+        Scenario("budget_rollup_episode", lambda: models.budget_rollup(pid, "episode")),
+        Scenario("budget_rollup_phase", lambda: models.budget_rollup(pid, "phase", eid)),
+        Scenario("budget_rollup_assignee", lambda: models.budget_rollup(pid, "assignee")),
+        Scenario("priority_weights", lambda: models.priority_weights(pid)),
+        Scenario("priority_list", lambda: models.priority_list(eid)),
+        Scenario("priority_list_top50", lambda: models.priority_list(eid, top=50)),
+        Scenario("priority_list_section", lambda: models.priority_list(eid, "sakkan", 50)),
+        Scenario("ready_queue", lambda: list(models.ready_queue(eid, "douga"))),
+        Scenario("sim_delay", lambda: models.sim_delay(eid, "genga_raw", 3)),
+        Scenario("flow_report_episode", lambda: models.flow_report(episode_id=eid)),
+        Scenario("flow_report_project", lambda: models.flow_report(project_id=pid)),
+        Scenario("dashboard_data", lambda: models.dashboard_data(pid)),
+        Scenario("sheet_grid", lambda: models.sheet_grid(pid)),
+        # CLI (includes init_db and rendering)
+        Scenario("cli project list", _cli("project", "list")),
+        Scenario("cli ep list", _cli("ep", "list")),
+        Scenario("cli ep show", _cli("ep", "show", "1")),
+        Scenario("cli cut list", _cli("cut", "list", "1", "--limit", "100")),
+        Scenario("cli cut show", _cli("cut", "show", "1", mid)),
+        Scenario("cli cut board", _cli("cut", "board", "1")),
+        Scenario("cli cut history", _cli("cut", "history", "1", mid)),
+        Scenario("cli creator list", _cli("creator", "list")),
+        Scenario("cli creator load", _cli("creator", "load", "--all")),
+        Scenario("cli company list", _cli("company", "list")),
+        Scenario("cli company load", _cli("company", "load", "1")),
+        Scenario("cli order list", _cli("order", "list")),
+        Scenario("cli order reconcile", _cli("order", "reconcile", "1")),
+        Scenario("cli priority", _cli("priority", "1", "--top", "50")),
+        Scenario("cli queue", _cli("queue", "1", "--phase", "douga")),
+        Scenario("cli sim delay", _cli("sim", "delay", "1", "--phase", "genga_raw", "--days", "3")),
+        Scenario("cli dashboard", _cli("dashboard")),
+        Scenario("cli stats creators", _cli("stats", "creators")),
+        Scenario("cli report flow", _cli("report", "flow", str(last_ep))),
+        Scenario("cli budget show", _cli("budget", "show")),
+        Scenario("cli report sheets", _cli(
+            "report", "sheets", "--all", "--out-dir", str(workdir / "sheets"))),
+        # writes (idempotent)
+        Scenario("cut_update_phase", lambda: models.cut_update_phase(
+            eid, mid, "v_edit", "pending", 1, "2030-01-01"), mutates=True),
+        Scenario("cut_set_priority", lambda: models.cut_set_priority(
+            eid, spec, True, "bench"), mutates=True),
+        Scenario("cut_set_difficulty", lambda: models.cut_set_difficulty(
+            eid, [(spec, 4)]), mutates=True),
+        Scenario("episode_set_budget", lambda: models.episode_set_budget(eid, 1_000_000),
+                 mutates=True),
+        Scenario("creator_update", lambda: models.creator_update(1, daily_capacity=3),
+                 mutates=True),
+        Scenario("creator_apply_throughput", lambda: models.creator_apply_throughput(7),
+                 mutates=True),
+        Scenario("priority_set_weights", lambda: models.priority_set_weights(
+            pid, {"difficulty": 12.0}), mutates=True),
+        Scenario("creator_add", lambda: models.creator_add(
+            f"ベンチ{next(serial):06d}", "genga", "action", 3, 3, 3000), mutates=True),
+        Scenario("cut_add", lambda: models.cut_add(
+            eid, [f"Z{next(serial):06d}{s}" for s in ("", "A", "B")]), mutates=True),
+        Scenario("order_new", lambda: models.order_new(
+            eid, "douga", "company", 1, ordered, 200, "2030-01-01"), mutates=True),
+        Scenario("order_issue", lambda: models.order_issue(1), mutates=True),
+        Scenario("export_project", lambda: export_project(
+            proj, workdir / "export.ndjson.gz"), mutates=True),
+    ]
+    return sorted(s, key=lambda sc: sc.mutates)
@@ -0,0 +1,145 @@
+"""ストレージ計測: DBサイズ、ページキャッシュ、ダッシュボード/ボード所要時間
+
+    python -m benchmarks.storage /tmp/seishin-large.db --project 1
+    python -m benchmarks.storage /tmp/seishin-large.db --layout normalized --layout wide
+
+Works on a copy of the database (init_db may migrate it; the migration
+time is reported). Page-cache misses are the pages SQLite read(2)s from
+the file, taken from /proc/self/io (Linux); a "warm" run reuses the
+connection, so 1 - warm/cold approximates the page cache hit rate at
+the given cache size. Each --layout is measured in turn on the same
+copy (`storage layout` switch, then VACUUM).
+"""
+
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from seishin import db, models
+
+
+def _read_bytes() -> int | None:
+    try:
+        for line in Path("/proc/self/io").read_text().splitlines():
+            if line.startswith("rchar:"):
+                return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class _Kept:
+    """A connection whose close() is ignored, for the warm run."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def close(self):
+        pass
+
+
+def _structures(conn) -> dict[str, float]:
+    """MiB per table/index, cut_phase* and cut_progress storage only."""
+    rows = conn.execute(
+        """SELECT name, SUM(pgsize) FROM dbstat
+        WHERE (name LIKE '%cut_phase%' AND name NOT LIKE '%cut_phase_event%')
+            OR name LIKE '%cut_progress%'
+        GROUP BY name ORDER BY 2 DESC"""
+    ).fetchall()
+    return {r[0]: r[1] / 2**20 for r in rows}
+
+
+def _timed(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def _measure(work: Path, project_id: int, repeat: int, cache_kib: int):
+    conn = db.get_conn()
+    conn.execute("VACUUM")  # compare like with like: no free pages either side
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    structures = _structures(conn)
+    episode_id = conn.execute(
+        "SELECT id FROM episode WHERE project_id = ? ORDER BY number LIMIT 1", (project_id,)
+    ).fetchone()[0]
+    conn.close()
+
+    click.echo(f"file size        {work.stat().st_size / 2**20:8.1f} MiB")
+    for name, mib in structures.items():
+        click.echo(f"  {name:32} {mib:8.1f} MiB")
+
+    # Cold: new connection each run. Warm: the same connection again.
+    original = db.get_conn
+
+    def sized():
+        c = original()
+        c.execute(f"PRAGMA cache_size = -{cache_kib}")
+        return c
+
+    shared = _Kept(sized())
+    models.get_conn = sized
+    try:
+        times, cold_pages = [], []
+        for _ in range(repeat):
+            before = _read_bytes()
+            times += _timed(lambda: models.dashboard_data(project_id), 1)
+            if before is not None:
+                cold_pages.append((_read_bytes() - before) / page_size)
+        board = _timed(lambda: models.cut_board(episode_id), repeat)
+        models.get_conn = lambda: shared
+        models.dashboard_data(project_id)
+        before = _read_bytes()
+        models.dashboard_data(project_id)
+        warm = (_read_bytes() - before) / page_size if before is not None else None
+    finally:
+        models.get_conn = original
+        shared.conn.close()
+
+    click.echo(f"dashboard_data   median {statistics.median(times) * 1000:.0f} ms, "
+               f"min {min(times) * 1000:.0f} ms")
+    click.echo(f"cut_board        median {statistics.median(board) * 1000:.0f} ms, "
+               f"min {min(board) * 1000:.0f} ms (episode id {episode_id})")
+    if cold_pages:
+        cold = statistics.median(cold_pages)
+        click.echo(f"pages read       cold {cold:,.0f}, warm {warm:,.0f} "
+                   f"(cache {cache_kib} KiB, hit rate ≈ {1 - warm / cold:.1%})")
+
+
+@click.command()
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--project", "project_id", type=int, default=1, help="計測する作品ID")
+@click.option("--repeat", type=click.IntRange(min=1), default=3, help="計測回数")
+@click.option("--cache-kib", type=int, default=2000, help="SQLiteページキャッシュ (KiB)")
+@click.option("--layout", "layouts", type=click.Choice(["normalized", "wide"]), multiple=True,
+              help="計測するレイアウト (複数指定可、既定: DBの現状のみ)")
+def main(source, project_id, repeat, cache_kib, layouts):
+    """DBのサイズ・キャッシュ効率・dashboard_data/cut_board の所要時間を計測"""
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp) / "seishin.db"
+        shutil.copyfile(source, work)
+        db.SEISHIN_DIR, db.DB_PATH = work.parent, work
+        start = time.perf_counter()
+        db.init_db()
+        migrate_s = time.perf_counter() - start
+        click.echo(f"schema version   {len(db.MIGRATIONS)} (init {migrate_s:.1f}s)")
+
+        for layout in layouts or [models.storage_layout()]:
+            start = time.perf_counter()
+            models.storage_set_layout(layout)
+            click.echo(f"\n── {layout} (switch {time.perf_counter() - start:.1f}s)")
+            _measure(work, project_id, repeat, cache_kib)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""インメモリ分析モード (NumPy)
+
+Loads one project's cut_phase into column arrays once, then answers
+board/dashboard/priority/sim queries and what-if edits without going back
+to SQLite. Results use the same shapes as the models.py functions so the
+render.py functions can draw them.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from .cutspec import parse_cut_spec
+from .db import get_conn, PHASES, STATUSES, PHASE_CODE, STATUS_CODE
+from .models import SECTION_PHASES, priority_weights
+
+N_PHASES = len(PHASES)
+N_STATUSES = len(STATUSES)
+_COMPLETED = STATUS_CODE["completed"]
+_DELAYED = STATUS_CODE["delayed"]
+_OPEN = np.array([STATUS_CODE[s] for s in ("pending", "in_progress", "retake", "delayed")])
+# Status feature of the priority score, indexed by STATUS_CODE
+_STATUS_RANK = np.array([0, 1, 0, 2, 3], dtype=np.float64)
+_NAT = np.datetime64("NaT", "D")
+
+
+def _day(deadline: str | None) -> np.datetime64:
+    """Deadline text as datetime64[D]; NaT when empty or not a date ("来週")."""
+    try:
+        return np.datetime64(date.fromisoformat(deadline[:10]), "D")
+    except (TypeError, ValueError):
+        return _NAT
+
+
+class ProjectFrame:
+    """Columnar copy of one project's cuts and cut-phases.
+
+    Per cut-phase row: ``id``, ``cut`` (index into the per-cut arrays), ``phase``,
+    ``status`` (int8 codes), ``assignee`` (creator id, -1 if none) and
+    ``deadline`` (datetime64[D], NaT if none). Edits only touch these
+    arrays; ``reset()`` returns to the state loaded from the database.
+    """
+
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        conn = get_conn()
+        try:
+            self._load(conn)
+        finally:
+            conn.close()
+        self._original = (self.status.copy(), self.assignee.copy(), self.deadline.copy())
+
+    def _load(self, conn):
+        self.episodes = {
+            r["number"]: dict(r)
+            for r in conn.execute(
+                "SELECT * FROM episode WHERE project_id = ? ORDER BY number",
+                (self.project_id,),
+            )
+        }
+        creators = conn.execute("SELECT id, name, pulls_deadline FROM creator").fetchall()
+        self.creators = {r["id"]: r["name"] for r in creators}
+        self.unreliable = np.array([r["id"] for r in creators if not r["pulls_deadline"]],
+                                   dtype=np.int32)
+        self.weights = priority_weights(self.project_id)
+
+        cur = conn.cursor()
+        cur.row_factory = None
+        cuts = cur.execute(
+            """SELECT c.id, e.number, c.number, c.sort_key, c.difficulty,
+                c.is_priority, c.priority_reason
+            FROM cut c JOIN episode e ON e.id = c.episode_id
+            WHERE e.project_id = ?
+            ORDER BY e.number, c.sort_key, c.number""",
+            (self.project_id,),
+        ).fetchall()
+        cut_ids, ep, number, key, diff, prio, reason = (list(c) for c in zip(*cuts)) \
+            if cuts else ([],) * 7
+        self.cut_ep = np.array(ep, dtype=np.int32)
+        self.cut_number = np.array(number, dtype=object)
+        self.cut_key = np.array(key, dtype=np.int64)
+        self.cut_difficulty = np.array([d or 3 for d in diff], dtype=np.int8)
+        self.cut_priority = np.array(prio, dtype=bool)
+        self.cut_reason = np.array(reason, dtype=object)
+        index = {cid: i for i, cid in enumerate(cut_ids)}
+
+        rows = cur.execute(
+            """SELECT cp.id, cp.cut_id, cp.phase, cp.status, cp.assignee_id, cp.deadline
+            FROM cut_phase_data cp
+            JOIN cut c ON c.id = cp.cut_id
+            JOIN episode e ON e.id = c.episode_id
+            WHERE e.project_id = ?""",
+            (self.project_id,),
+        ).fetchall()
+        cp_id, cut_id, phase, status, assignee, deadline = zip(*rows) if rows else ([],) * 6
+        self.id = np.array(cp_id, dtype=np.int64)
+        self.cut = np.fromiter((index[c] for c in cut_id), dtype=np.int32, count=len(rows))
+        self.phase = np.array(phase, dtype=np.int8)
+        self.status = np.array(status, dtype=np.int8)
+        self.assignee = np.array([-1 if a is None else a for a in assignee], dtype=np.int32)
+        self.deadline = np.array([_day(d) for d in deadline], dtype="datetime64[D]")
+        self.ep = self.cut_ep[self.cut]
+
+    def reset(self):
+        status, assignee, deadline = self._original
+        self.status, self.assignee, self.deadline = status.copy(), assignee.copy(), deadline.copy()
+
+    # ── selection ──
+
+    def _episode(self, number: int) -> np.ndarray:
+        if number not in self.episodes:
+            raise KeyError(f"第{number}話が見つからない")
+        return self.ep == number
+
+    def _cuts(self, spec: str) -> np.ndarray:
+        """Row mask for cuts in ``spec``: by sort key, or by number for
+        cuts the spec names outside the key (CutSpec.exact)."""
+        parsed = parse_cut_spec(spec, verbatim=True)
+        keys = self.cut_key[self.cut]
+        mask = np.zeros(len(keys), dtype=bool)
+        for lo, hi in parsed.bounds():
+            mask |= (keys >= lo) & (keys <= hi)
+        exact = parsed.exact()
+        if exact:
+            mask |= np.isin(self.cut_number[self.cut], exact)
+        return mask
+
+    # ── what-if edits ──
+
+    def set_status(self, ep: int, spec: str, phase: str, status: str) -> int:
+        mask = self._episode(ep) & self._cuts(spec) & (self.phase == PHASE_CODE[phase])
+        self.status[mask] = STATUS_CODE[status]
+        return int(mask.sum())
+
+    def assign(self, ep: int, spec: str, phase: str, creator_id: int) -> int:
+        mask = self._episode(ep) & self._cuts(spec) & (self.phase == PHASE_CODE[phase])
+        self.assignee[mask] = creator_id
+        return int(mask.sum())
+
+    def shift_deadlines(self, ep: int, phase: str, days: int) -> int:
+        """Move deadlines of ``phase`` and every later phase by ``days``."""
+        mask = self._episode(ep) & (self.phase >= PHASE_CODE[phase]) & ~np.isnat(self.deadline)
+        self.deadline[mask] += np.timedelta64(days, "D")
+        return int(mask.sum())
+
+    # ── queries ──
+
+    def _rows(self, idx: np.ndarray, fields: tuple[str, ...]) -> list[dict]:
+        cut = self.cut[idx]
+        cols = {
+            "number": self.cut_number[cut],
+            "phase": (PHASES[p] for p in self.phase[idx]),
+            "status": (STATUSES[s] for s in self.status[idx]),
+            "assignee_name": (self.creators.get(a) for a in self.assignee[idx]),
+            "deadline": (None if np.isnat(d) else str(d) for d in self.deadline[idx]),
+            "difficulty": (int(d) for d in self.cut_difficulty[cut]),
+            "is_priority": (bool(p) for p in self.cut_priority[cut]),
+            "priority_reason": self.cut_reason[cut],
+        }
+        return [dict(zip(fields, vals)) for vals in zip(*(cols[f] for f in fields))]
+
+    def board(self, ep: int) -> dict:
+        """Same shape as models.cut_board."""
+        mask = self._episode(ep)
+        result = {}
+        for code, phase in enumerate(PHASES):
+            idx = np.flatnonzero(mask & (self.phase == code))
+            idx = idx[np.argsort(self.cut_key[self.cut[idx]], kind="stable")]
+            result[phase] = self._rows(idx, ("number", "status", "assignee_name"))
+        return result
+
+    def dashboard(self) -> dict:
+        """Same shape as models.dashboard_data, from one bincount."""
+        ep_numbers = list(self.episodes)
+        ep_pos = np.searchsorted(ep_numbers, self.ep)
+        counts = np.bincount(
+            (ep_pos * N_PHASES + self.phase) * N_STATUSES + self.status,
+            minlength=len(ep_numbers) * N_PHASES * N_STATUSES,
+        ).reshape(len(ep_numbers), N_PHASES, N_STATUSES)
+        cuts_per_ep = np.bincount(np.searchsorted(ep_numbers, self.cut_ep),
+                                  minlength=len(ep_numbers))
+        episodes = []
+        for i, number in enumerate(ep_numbers):
+            episodes.append({
+                "episode": self.episodes[number],
+                "total_cuts": int(cuts_per_ep[i]),
+                "phases": {
+                    phase: {
+                        "total": int(counts[i, p].sum()),
+                        "done": int(counts[i, p, _COMPLETED]),
+                        "delayed": int(counts[i, p, _DELAYED]),
+                    }
+                    for p, phase in enumerate(PHASES)
+                },
+            })
+        open_ = (self.status == STATUS_CODE["pending"]) | (self.status == STATUS_CODE["in_progress"])
+        return {
+            "episodes": episodes,
+            "unassigned_phases": int((open_ & (self.assignee < 0)).sum()),
+            "delayed_phases": int((self.status == _DELAYED).sum()),
+        }
+
+    def priority(self, ep: int, section: str | None = None,
+                 top: int | None = None) -> list[dict]:
+        """Same scores and ordering as models.priority_list."""
+        mask = self._episode(ep) & np.isin(self.status, _OPEN)
+        if section:
+            codes = [PHASE_CODE[p] for p in SECTION_PHASES.get(section, (section,))]
+            mask &= np.isin(self.phase, codes)
+        idx = np.flatnonzero(mask)
+        cut = self.cut[idx]
+        w = self.weights
+        slack = (self.deadline[idx] - np.datetime64(date.today(), "D")).astype(np.float64)
+        slack = np.where(np.isnat(self.deadline[idx]), 0.0,
+                         (30 - np.clip(slack, -30, 30)) / 60)
+        score = (
+            w["flagged"] * self.cut_priority[cut]
+            + w["status"] * _STATUS_RANK[self.status[idx]] / 3
+            + w["slack"] * slack
+            + w["difficulty"] * (self.cut_difficulty[cut] - 1) / 4
+            + w["downstream"] * (N_PHASES - 1 - self.phase[idx]) / (N_PHASES - 1)
+            + w["reliability"] * np.isin(self.assignee[idx], self.unreliable)
+        )
+        # lexsort: last key is primary
+        order = np.lexsort((self.id[idx], self.cut_key[cut], -score))[:top]
+        rows = self._rows(idx[order], (
+            "number", "difficulty", "is_priority", "priority_reason",
+            "phase", "status", "deadline", "assignee_name",
+        ))
+        for row, s in zip(rows, score[order]):
+            row["score"] = float(s)
+        return rows
+
+    def sim_delay(self, ep: int, phase: str, days: int) -> list[dict]:
+        """Same cascade rule as models.sim_delay."""
+        mask = self._episode(ep) & (self.status != _COMPLETED)
+        results = []
+        for i, code in enumerate(range(PHASE_CODE[phase], N_PHASES)):
+            delay_days = days - i
+            if delay_days <= 0:
+                break
+            idx = np.flatnonzero(mask & (self.phase == code))
+            if len(idx):
+                results.append({
+                    "phase": PHASES[code],
+                    "delay_days": delay_days,
+                    "affected_cuts": len(idx),
+                    "cuts": self._rows(idx, ("number", "phase", "status", "deadline")),
+                })
+        return results
@@ -1,8 +1,11 @@
 """Click group entry point"""
 
+import os
+
 import click
 
-from .db import init_db
+from .config import get_active_project
+from .db import get_conn, init_db
 from .commands.project import project
 from .commands.episode import ep
 from .commands.cut import cut
@@ -12,12 +15,41 @@ from .commands.order import order
 from .commands.priority import priority
 from .commands.sim import sim
 from .commands.dashboard import dashboard
+from .commands.stats import stats
+from .commands.report import report
+from .commands.budget import budget
+from .commands.analytics import analytics
+from .commands.queue import queue
+from .commands.shell import shell
+from .commands.run import run
+from .commands.storage import storage
 
 
 @click.group()
-def cli():
-    """制進 (seishin) - アニメ制作進行CLIツール"""
-    init_db()
+@click.option("--profile", is_flag=True, help="SQLを計測し、終了時にstderrへ要約を表示")
+@click.option("--profile-out", type=click.Path(dir_okay=False), default=None,
+              help="SQL計測結果をJSONトレースとして書き出す")
+@click.pass_context
+def cli(ctx, profile, profile_out):
+    """制進 (seishin) - アニメ制作進行CLIツール
+
+    環境変数 SEISHIN_PROFILE=1 は --profile、それ以外の値は --profile-out として扱う。
+    """
+    env = os.environ.get("SEISHIN_PROFILE", "")
+    if env and env != "0":
+        profile = profile or env == "1"
+        profile_out = profile_out or (env if env != "1" else None)
+    if profile or profile_out:
+        from . import profiling
+        profiler = profiling.Profiler()
+        profiling.install(profiler)
+        ctx.call_on_close(lambda: profiling.report(profiler, profile_out or "-"))
+    conn = get_conn()
+    try:
+        init_db(conn)
+        get_active_project(conn)  # resolved once, on the connection already open
+    finally:
+        conn.close()
 
 
 cli.add_command(project)
@@ -29,6 +61,14 @@ cli.add_command(order)
 cli.add_command(priority)
 cli.add_command(sim)
 cli.add_command(dashboard)
+cli.add_command(stats)
+cli.add_command(report)
+cli.add_command(budget)
+cli.add_command(analytics)
+cli.add_command(queue)
+cli.add_command(shell)
+cli.add_command(run)
+cli.add_command(storage)
 
 
 if __name__ == "__main__":
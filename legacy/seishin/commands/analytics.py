@@ -0,0 +1,109 @@
+"""analytics: インメモリ what-if セッション"""
+
+import shlex
+
+import click
+
+from ..config import require_active_project
+from ..db import PHASES, STATUSES
+from ..render import (
+    render_cut_board, render_dashboard, render_priority_list, render_sim_delay, console,
+)
+
+HELP = """\
+board EP                         工程ボード
+dashboard                        ダッシュボード
+priority EP [SECTION]            優先順リスト
+sim EP PHASE DAYS                遅延カスケード
+set EP CUTS PHASE STATUS         ステータスを仮変更
+assign EP CUTS PHASE CREATOR_ID  担当を仮変更
+shift EP PHASE DAYS              PHASE以降の締切を仮にずらす
+reset                            読み込み時の状態に戻す
+quit                             終了"""
+
+
+def _choice(value: str, choices: list[str], label: str) -> str:
+    if value not in choices:
+        raise ValueError(f"不明な{label}: {value} ({', '.join(choices)})")
+    return value
+
+
+def _message(e: Exception) -> str:
+    if isinstance(e, IndexError):
+        return "引数が足りない (help で一覧)"
+    return str(e).strip("'")
+
+
+def _run(frame, line: str, project_name: str) -> bool:
+    """Execute one command line. Returns False on quit."""
+    args = shlex.split(line, comments=True)
+    if not args:
+        return True
+    cmd, args = args[0], args[1:]
+    if cmd in ("quit", "exit"):
+        return False
+    if cmd == "help":
+        console.print(HELP, markup=False)
+    elif cmd == "board":
+        render_cut_board(frame.board(int(args[0])))
+    elif cmd == "dashboard":
+        render_dashboard(frame.dashboard(), project_name)
+    elif cmd == "priority":
+        render_priority_list(frame.priority(int(args[0]), args[1] if len(args) > 1 else None))
+    elif cmd == "sim":
+        phase = _choice(args[1], PHASES, "工程")
+        render_sim_delay(frame.sim_delay(int(args[0]), phase, int(args[2])))
+    elif cmd == "set":
+        n = frame.set_status(int(args[0]), args[1], _choice(args[2], PHASES, "工程"),
+                             _choice(args[3], STATUSES, "ステータス"))
+        console.print(f"[green]{n}件を {args[3]} に変更 (仮)[/green]")
+    elif cmd == "assign":
+        n = frame.assign(int(args[0]), args[1], _choice(args[2], PHASES, "工程"), int(args[3]))
+        console.print(f"[green]{n}件を割当 (仮)[/green]")
+    elif cmd == "shift":
+        n = frame.shift_deadlines(int(args[0]), _choice(args[1], PHASES, "工程"), int(args[2]))
+        console.print(f"[green]{n}件の締切を{int(args[2]):+d}日 (仮)[/green]")
+    elif cmd == "reset":
+        frame.reset()
+        console.print("[green]読み込み時の状態に戻した[/green]")
+    else:
+        raise ValueError(f"不明なコマンド: {cmd} (help で一覧)")
+    return True
+
+
+@click.command()
+@click.option("--batch", "script", type=click.File("r", encoding="utf-8"),
+              help="コマンドを1行ずつ書いたファイル (- で標準入力)")
+def analytics(script):
+    """作品をメモリに読み込み what-if 分析 (DBは変更しない)"""
+    try:
+        from ..analytics import ProjectFrame
+    except ImportError:
+        raise click.ClickException("analytics には numpy が必要 (pip install seishin[analytics])")
+    proj = require_active_project()
+    frame = ProjectFrame(proj["id"])
+    console.print(
+        f"[dim]{proj['name']}: {len(frame.cut_ep)}カット / {len(frame.cut)}工程を読み込み[/dim]"
+    )
+
+    if script:
+        for lineno, line in enumerate(script, 1):
+            try:
+                if not _run(frame, line, proj["name"]):
+                    break
+            except (ValueError, KeyError, IndexError) as e:
+                raise click.ClickException(f"{script.name}:{lineno}: {_message(e)}")
+        return
+
+    console.print("[dim]help でコマンド一覧、quit で終了[/dim]")
+    while True:
+        try:
+            line = input("analytics> ")
+        except (EOFError, KeyboardInterrupt):
+            console.print()
+            break
+        try:
+            if not _run(frame, line, proj["name"]):
+                break
+        except (ValueError, KeyError, IndexError) as e:
+            console.print(f"[red]{_message(e)}[/red]")
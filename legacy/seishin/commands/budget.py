@@ -0,0 +1,46 @@
+"""budget set/show"""
+
+import click
+
+from ..config import require_active_project
+from ..models import episode_get, episode_set_budget, budget_rollup
+from ..render import render_budget, console
+
+
+@click.group()
+def budget():
+    """予算管理"""
+    pass
+
+
+@budget.command("set")
+@click.argument("ep_number", type=int)
+@click.argument("amount", type=click.IntRange(min=0))
+def set_cmd(ep_number, amount):
+    """話数の予算を設定"""
+    proj = require_active_project()
+    ep = episode_get(proj["id"], ep_number)
+    if not ep:
+        raise click.ClickException(f"第{ep_number}話が見つからない")
+    episode_set_budget(ep["id"], amount)
+    console.print(f"[green]第{ep_number}話の予算: ¥{amount:,}[/green]")
+
+
+@budget.command()
+@click.argument("ep_number", type=int, required=False)
+@click.option("--by", "group_by", type=click.Choice(["episode", "phase", "assignee"]),
+              default="episode", help="集計単位")
+def show(ep_number, group_by):
+    """予算に対する発注額"""
+    proj = require_active_project()
+    episode_id = None
+    if ep_number is not None:
+        ep = episode_get(proj["id"], ep_number)
+        if not ep:
+            raise click.ClickException(f"第{ep_number}話が見つからない")
+        episode_id = ep["id"]
+    rows = budget_rollup(proj["id"], group_by, episode_id)
+    if not rows:
+        console.print("[dim]発注書なし[/dim]")
+        return
+    render_budget(rows, group_by)
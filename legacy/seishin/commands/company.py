@@ -1,9 +1,9 @@
-"""company add/list/show"""
+"""company add/list/show/load"""
 
 import click
 
-from ..models import company_add, company_list, company_get, company_get_by_name
-from ..render import render_company_list, render_company_show, console
+from ..models import company_add, company_list, company_get, company_get_by_name, company_load
+from ..render import render_company_list, render_company_show, render_company_load, console
 
 
 @click.group()
@@ -45,3 +45,16 @@ def show(name_or_id):
     if not c:
         raise click.ClickException(f"会社「{name_or_id}」が見つからない")
     render_company_show(c)
+
+
+@company.command()
+@click.argument("name_or_id")
+def load(name_or_id):
+    """未完了の発注カットを納期別に集計し、日産能力と比較"""
+    try:
+        c = company_get(int(name_or_id))
+    except ValueError:
+        c = company_get_by_name(name_or_id)
+    if not c:
+        raise click.ClickException(f"会社「{name_or_id}」が見つからない")
+    render_company_load(company_load(c["id"]))
@@ -1,9 +1,13 @@
-"""creator add/list/show/update"""
+"""creator add/list/show/update/load"""
+
+from datetime import date, timedelta
 
 import click
 
 from ..models import creator_add, creator_list, creator_get, creator_update, creator_get_by_name
-from ..render import render_creator_list, render_creator_show, console
+from ..render import render_creator_list, render_creator_show, render_creator_load, console
+
+LOAD_DAYS = 14
 
 
 @click.group()
@@ -86,3 +90,32 @@ def update(name_or_id, speed, quality, price, skills, daily_capacity, pulls_dead
 
     creator_update(c["id"], **kwargs)
     console.print(f"[green]{c['name']} を更新[/green]")
+
+
+@creator.command()
+@click.option("--from", "start", type=click.DateTime(["%Y-%m-%d"]), default=None,
+              help="開始日 (既定: 今日)")
+@click.option("--to", "end", type=click.DateTime(["%Y-%m-%d"]), default=None,
+              help=f"終了日 (既定: 開始日+{LOAD_DAYS - 1}日)")
+@click.option("--all", "show_all", is_flag=True, help="超過のないクリエイターも表示")
+def load(start, end, show_all):
+    """全作品の担当工程から日別の稼働を集計し、超過日と振り替え候補を表示"""
+    try:
+        from ..workload import Workload
+    except ImportError:
+        raise click.ClickException("creator load には numpy が必要 (pip install seishin[analytics])")
+    start = start.date() if start else date.today()
+    end = end.date() if end else start + timedelta(days=LOAD_DAYS - 1)
+    if end < start:
+        raise click.BadParameter("--to は --from 以降の日付で", param_hint="--to")
+
+    w = Workload(start, end)
+    if not w.capacity.any():
+        console.print("[yellow]日産 (daily_capacity) が未設定。`seishin stats creators --apply` "
+                      "か `seishin creator update --daily-capacity` で設定して[/yellow]")
+    rows = w.rows(show_all)
+    if not rows:
+        console.print("[green]期間内に日産を超える担当なし[/green]" if not show_all
+                      else "[dim]期間内の担当なし[/dim]")
+        return
+    render_creator_load(rows, w.days, w.suggestions())
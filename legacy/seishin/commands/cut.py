@@ -1,13 +1,20 @@
-"""cut add/list/update/board/show"""
+"""cut add/list/update/board/show/history/flag/unflag/set-difficulty"""
+
+from datetime import datetime, timedelta
 
 import click
 
-from ..db import require_active_project, PHASES, STATUSES
+from ..config import require_active_project
+from ..db import PHASES, STATUSES
 from ..models import (
     episode_get, cut_add, cut_list, cut_get,
-    cut_update_phase, cut_board, parse_cut_range,
+    cut_update_phase, cut_board, cut_history, parse_cut_range,
+    cut_set_priority, cut_set_difficulty, WorkflowError,
+)
+from ..cutspec import parse_cut_spec
+from ..render import (
+    render_cut_list, render_cut_show, render_cut_board, render_cut_history, console,
 )
-from ..render import render_cut_list, render_cut_show, render_cut_board, console
 
 
 def _get_episode(number: int) -> dict:
@@ -29,23 +36,32 @@ def cut():
 @click.argument("cut_spec")
 @click.option("--difficulty", type=int, default=3, help="難易度 (1-5)")
 def add(ep_number, cut_spec, difficulty):
-    """カットを追加 (例: C001-C300, C001,C002)"""
+    """カットを追加 (例: C001-C300, C001-C050,C060, C042A-C042C)"""
     ep = _get_episode(ep_number)
-    numbers = parse_cut_range(cut_spec)
+    try:
+        numbers = parse_cut_range(cut_spec)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="CUT_SPEC")
     count = cut_add(ep["id"], numbers)
     console.print(f"[green]{count}カット追加 (第{ep_number}話)[/green]")
 
 
 @cut.command("list")
 @click.argument("ep_number", type=int)
-def list_cmd(ep_number):
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="表示件数")
+@click.option("--after", default=None, help="このカット番号より後から表示")
+@click.option("--ready-for", type=click.Choice(PHASES), default=None,
+              help="前工程が全て完了し、この工程が未完了のカットのみ")
+def list_cmd(ep_number, limit, after, ready_for):
     """カット一覧"""
     ep = _get_episode(ep_number)
-    cuts = cut_list(ep["id"])
+    cuts = cut_list(ep["id"], after, limit, ready_for)
     if not cuts:
         console.print("[dim]カットなし[/dim]")
         return
     render_cut_list(cuts)
+    if limit is not None and len(cuts) == limit:
+        console.print(f"[dim]続き: --after {cuts[-1]['number']}[/dim]")
 
 
 @cut.command()
@@ -67,19 +83,120 @@ def show(ep_number, cut_number):
 @click.option("--status", type=click.Choice(STATUSES), default=None, help="状態")
 @click.option("--assignee", type=int, default=None, help="担当者ID")
 @click.option("--deadline", default=None, help="締切 (YYYY-MM-DD)")
-def update(ep_number, cut_number, phase, status, assignee, deadline):
+@click.option("--sheets", type=int, default=None, help="完了時の枚数 (作業ログ用)")
+@click.option("--force", is_flag=True, help="工程順チェックを無視")
+def update(ep_number, cut_number, phase, status, assignee, deadline, sheets, force):
     """カットの工程状態を更新"""
     ep = _get_episode(ep_number)
-    ok = cut_update_phase(ep["id"], cut_number, phase, status, assignee, deadline)
+    try:
+        ok = cut_update_phase(ep["id"], cut_number, phase, status, assignee, deadline,
+                              sheets, force)
+    except WorkflowError as e:
+        raise click.ClickException(f"{cut_number} {phase}: {e} (--force で強制)")
     if not ok:
         raise click.ClickException(f"カット {cut_number} / 工程 {phase} の更新に失敗")
     console.print(f"[green]{cut_number} {phase} 更新完了[/green]")
 
 
+def _parse_as_of(value: str) -> int:
+    """'YYYY-MM-DD' means end of that day; datetimes are taken as local time."""
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise click.BadParameter(f"日時の形式が不正: {value}", param_hint="--as-of")
+    if len(value) == 10:
+        dt += timedelta(days=1)
+    return int(dt.timestamp())
+
+
 @cut.command()
 @click.argument("ep_number", type=int)
-def board(ep_number):
+@click.option("--as-of", default=None, help="指定日時時点のボード (YYYY-MM-DD[ HH:MM])")
+def board(ep_number, as_of):
     """工程別ボード表示"""
     ep = _get_episode(ep_number)
-    data = cut_board(ep["id"])
-    render_cut_board(data)
+    data = cut_board(ep["id"], _parse_as_of(as_of) if as_of else None)
+    render_cut_board(data, as_of)
+
+
+@cut.command()
+@click.argument("ep_number", type=int)
+@click.argument("cut_number")
+def history(ep_number, cut_number):
+    """カットの工程履歴 (状態・担当の変更)"""
+    ep = _get_episode(ep_number)
+    events = cut_history(ep["id"], cut_number)
+    if not events:
+        console.print("[dim]履歴なし[/dim]")
+        return
+    render_cut_history(cut_number, events)
+
+
+def _check_spec(spec: str, hint: str = "CUT_SPEC") -> str:
+    try:
+        parse_cut_spec(spec, verbatim=True)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint=hint)
+    return spec
+
+
+@cut.command()
+@click.argument("ep_number", type=int)
+@click.argument("cut_spec")
+@click.option("--reason", default=None, help="優先理由")
+def flag(ep_number, cut_spec, reason):
+    """カットを優先指定 (例: C001-C050,C060)"""
+    ep = _get_episode(ep_number)
+    count = cut_set_priority(ep["id"], _check_spec(cut_spec), True, reason)
+    console.print(f"[green]{count}カットを優先指定 (第{ep_number}話)[/green]")
+
+
+@cut.command()
+@click.argument("ep_number", type=int)
+@click.argument("cut_spec")
+def unflag(ep_number, cut_spec):
+    """カットの優先指定を解除"""
+    ep = _get_episode(ep_number)
+    count = cut_set_priority(ep["id"], _check_spec(cut_spec), False)
+    console.print(f"[green]{count}カットの優先指定を解除 (第{ep_number}話)[/green]")
+
+
+def _read_difficulty_file(f) -> list[tuple[str, int]]:
+    """Lines of '<cut spec> <level>'; blank lines and # comments are skipped."""
+    items = []
+    for lineno, line in enumerate(f, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            spec, level = line.rsplit(None, 1)
+            level = int(level)
+        except ValueError:
+            raise click.BadParameter(
+                f"{lineno}行目: 「カット指定 難易度」の形式で書く", param_hint="--file"
+            )
+        if not 1 <= level <= 5:
+            raise click.BadParameter(f"{lineno}行目: 難易度は1-5", param_hint="--file")
+        items.append((_check_spec(spec, f"--file {lineno}行目"), level))
+    return items
+
+
+@cut.command("set-difficulty")
+@click.argument("ep_number", type=int)
+@click.argument("cut_spec", required=False)
+@click.argument("level", type=click.IntRange(1, 5), required=False)
+@click.option("--file", "file", type=click.File("r", encoding="utf-8"),
+              help="「カット指定 難易度」を1行ずつ書いたファイル (- で標準入力)")
+def set_difficulty(ep_number, cut_spec, level, file):
+    """難易度を一括設定 (例: C001-C020 4 / --file diff.txt)"""
+    if file is not None:
+        if cut_spec is not None:
+            raise click.UsageError("CUT_SPEC LEVEL と --file は同時に指定できない")
+        items = _read_difficulty_file(file)
+    elif cut_spec is not None and level is not None:
+        items = [(_check_spec(cut_spec), level)]
+    else:
+        raise click.UsageError("CUT_SPEC LEVEL か --file を指定")
+    ep = _get_episode(ep_number)
+    count = cut_set_difficulty(ep["id"], items)
+    console.print(f"[green]難易度を{count}件更新 (第{ep_number}話)[/green]")
@@ -2,7 +2,7 @@
 
 import click
 
-from ..db import require_active_project
+from ..config import require_active_project
 from ..models import dashboard_data
 from ..render import render_dashboard
 
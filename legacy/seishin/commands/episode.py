@@ -2,7 +2,7 @@
 
 import click
 
-from ..db import require_active_project
+from ..config import require_active_project
 from ..models import episode_add, episode_list, episode_show
 from ..render import render_episode_list, render_episode_show, console
 
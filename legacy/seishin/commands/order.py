@@ -1,14 +1,48 @@
-"""order new/list/export"""
+"""order new/list/export/reconcile"""
 
 import click
+from datetime import date
 from pathlib import Path
 
-from ..db import require_active_project
+from ..config import require_active_project
 from ..models import (
     episode_get, order_new, order_list, order_get, order_issue,
-    creator_get, creator_get_by_name, company_get, company_get_by_name,
+    order_reconcile, parse_cut_range,
+    creator_get, creator_get_by_name, company_get, company_get_by_name, company_load,
 )
-from ..render import render_order_list, console
+from ..db import PHASES
+from ..render import render_order_list, render_order_reconcile, console
+
+
+def _capacity_warnings(company: dict, phase: str, deadline: str | None, cuts: int) -> list[str]:
+    """Why ``company`` may not absorb this order: capabilities, then capacity by deadline."""
+    warnings = []
+    listed = {s.strip() for s in (company["capabilities"] or "").split(",")}
+    if listed & set(PHASES) and phase not in listed:
+        warnings.append(f"{company['name']} の対応工程に {phase} がない ({company['capabilities']})")
+    try:
+        date.fromisoformat(deadline or "")
+    except ValueError:  # no (usable) deadline: nothing to schedule against
+        return warnings
+    if not company["capacity_per_day"]:
+        return warnings
+    load = company_load(company["id"], (phase, deadline, cuts))
+    for e in load["schedule"]:
+        if e["due"] >= deadline and e["over"]:
+            warnings.append(
+                f"{company['name']}: {e['due']} までに {e['due_total']}カット "
+                f"(日産{company['capacity_per_day']}×{e['days']}日 = {e['capacity']}カット、"
+                f"{e['over']}カット超過)"
+            )
+            break
+    return warnings
+
+
+def _preview(items: list, limit: int = 10) -> str:
+    text = ", ".join(str(i) for i in items[:limit])
+    if len(items) > limit:
+        text += f" +{len(items) - limit}"
+    return text
 
 
 @click.group()
@@ -19,13 +53,14 @@ def order():
 
 @order.command()
 @click.argument("ep_number", type=int)
-@click.option("--phase", required=True, help="工程")
+@click.option("--phase", type=click.Choice(PHASES), required=True, help="工程")
 @click.option("--creator", "assignee_name", default=None, help="担当クリエイター名")
 @click.option("--company", "company_name", default=None, help="担当会社名")
-@click.option("--cuts", required=True, help="カット番号 (C042-C050)")
+@click.option("--cuts", required=True, help="カット番号 (C042-C050,C060)")
 @click.option("--price", type=int, default=0, help="カット単価")
 @click.option("--deadline", default=None, help="納期 (YYYY-MM-DD)")
-def new(ep_number, phase, assignee_name, company_name, cuts, price, deadline):
+@click.option("--force", is_flag=True, help="存在しない/発注済カットがあっても作成")
+def new(ep_number, phase, assignee_name, company_name, cuts, price, deadline, force):
     """発注書を作成"""
     proj = require_active_project()
     ep = episode_get(proj["id"], ep_number)
@@ -49,7 +84,30 @@ def new(ep_number, phase, assignee_name, company_name, cuts, price, deadline):
     else:
         raise click.ClickException("--creator か --company を指定して")
 
-    oid = order_new(ep["id"], phase, assignee_type, assignee_id, cuts, price, deadline)
+    try:
+        numbers = parse_cut_range(cuts)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--cuts")
+
+    def check(result: dict):
+        # runs inside order_new's write transaction, so the check holds until the insert
+        problems = []
+        if result["missing"]:
+            problems.append(f"第{ep_number}話に存在しないカット: {_preview(result['missing'])}")
+        if result["overlaps"]:
+            problems.append("同工程で発注済: " + _preview(
+                [f"{num}(#{'/#'.join(map(str, ids))})" for num, ids in result["overlaps"]]
+            ))
+        if problems and not force:
+            raise click.ClickException("\n".join(problems + ["--force で強制作成"]))
+        for p in problems:
+            console.print(f"[yellow]{p}[/yellow]")
+        if assignee_type == "company":
+            ordered = len(numbers) - len(result["missing"])
+            for w in _capacity_warnings(c, phase, deadline, ordered):
+                console.print(f"[yellow]{w}[/yellow]")
+
+    oid = order_new(ep["id"], phase, assignee_type, assignee_id, cuts, price, deadline, check)
     console.print(f"[green]発注書 #{oid} を作成[/green]")
 
 
@@ -113,3 +171,19 @@ table{{border-collapse:collapse;width:100%}}td,th{{border:1px solid #ccc;padding
     Path(out_path).write_text(html)
     order_issue(order_id)
     console.print(f"[green]発注書を出力: {out_path}[/green]")
+
+
+@order.command()
+@click.argument("ep_number", type=int)
+@click.option("--phase", type=click.Choice(PHASES), default=None, help="工程")
+def reconcile(ep_number, phase):
+    """発注漏れ・重複発注を検出"""
+    proj = require_active_project()
+    ep = episode_get(proj["id"], ep_number)
+    if not ep:
+        raise click.ClickException(f"第{ep_number}話が見つからない")
+    results = order_reconcile(ep["id"], phase)
+    if not results:
+        console.print("[green]発注漏れ・重複なし[/green]")
+        return
+    render_order_reconcile(results)
@@ -2,7 +2,7 @@
 
 import click
 
-from ..db import require_active_project
+from ..config import require_active_project
 from ..models import episode_get, priority_list
 from ..render import render_priority_list, console
 
@@ -10,13 +10,14 @@ from ..render import render_priority_list, console
 @click.command()
 @click.argument("ep_number", type=int)
 @click.option("--section", default=None, help="セクション (sakkan, enshutsu, douga, shiage, satsuei)")
-def priority(ep_number, section):
+@click.option("--top", type=click.IntRange(min=1), default=None, help="上位N件のみ")
+def priority(ep_number, section, top):
     """優先カットリストを生成"""
     proj = require_active_project()
     ep = episode_get(proj["id"], ep_number)
     if not ep:
         raise click.ClickException(f"第{ep_number}話が見つからない")
-    items = priority_list(ep["id"], section)
+    items = priority_list(ep["id"], section, top)
     if not items:
         console.print("[green]未完了カットなし[/green]")
         return
@@ -1,10 +1,26 @@
-"""project add/list/switch"""
+"""project add/list/switch/export/import"""
+
+import os
+import time
+from pathlib import Path
 
 import click
 
-from ..db import set_active_project, get_active_project
-from ..models import project_add, project_list, project_get_by_name
-from ..render import render_project_list, console
+from ..config import (
+    ENV_PROJECT, set_active_project, get_active_project, require_active_project,
+    forget_active_project,
+)
+from ..models import (
+    project_add, project_list, project_get_by_name, project_set_workflow,
+    PRIORITY_WEIGHTS, priority_weights, priority_set_weights,
+)
+from ..render import (
+    render_project_list, render_snapshot_counts, render_priority_weights, console,
+)
+from ..snapshot import (
+    SnapshotError, detect_format, export_project, import_project,
+    have_pyarrow, fallback_path,
+)
 
 
 @click.group()
@@ -35,7 +51,8 @@ def list_cmd():
     active = get_active_project()
     render_project_list(projects)
     if active:
-        console.print(f"\n[cyan]アクティブ: {active['name']}[/cyan]")
+        via = f" [dim]({ENV_PROJECT})[/dim]" if os.environ.get(ENV_PROJECT) else ""
+        console.print(f"\n[cyan]アクティブ: {active['name']}[/cyan]{via}")
 
 
 @project.command()
@@ -47,3 +64,72 @@ def switch(name):
         raise click.ClickException(f"作品「{name}」が見つからない")
     set_active_project(p["id"], p["name"])
     console.print(f"[green]アクティブ: {p['name']}[/green]")
+    if os.environ.get(ENV_PROJECT):
+        console.print(f"[yellow]このシェルでは {ENV_PROJECT}={os.environ[ENV_PROJECT]} が優先される[/yellow]")
+
+
+@project.command()
+@click.option("--enforce/--no-enforce", default=None, help="工程順 (前工程の完了) を強制するか")
+def workflow(enforce):
+    """工程順チェックの表示/設定"""
+    proj = require_active_project()
+    if enforce is not None:
+        project_set_workflow(proj["id"], enforce)
+        forget_active_project()
+    else:
+        enforce = proj["enforce_workflow"]
+    state = "[green]有効[/green]" if enforce else "[dim]無効[/dim]"
+    console.print(f"{proj['name']}: 工程順チェック {state}")
+
+
+@project.command()
+@click.option("--flagged", type=float, default=None, help="優先フラグ付きカット")
+@click.option("--status", type=float, default=None, help="遅延 > リテイク > 作業中")
+@click.option("--slack", type=float, default=None, help="締切までの余裕の少なさ")
+@click.option("--difficulty", type=float, default=None, help="難易度")
+@click.option("--downstream", type=float, default=None, help="後続工程の多さ")
+@click.option("--reliability", type=float, default=None, help="担当が締切を守らない")
+@click.option("--reset", "reset_names", multiple=True,
+              type=click.Choice(list(PRIORITY_WEIGHTS)), help="既定値に戻す")
+def weights(reset_names, **values):
+    """優先度スコアの重みを表示/設定"""
+    proj = require_active_project()
+    changes = {name: v for name, v in values.items() if v is not None}
+    changes.update({name: None for name in reset_names})
+    if changes:
+        priority_set_weights(proj["id"], changes)
+    render_priority_weights(priority_weights(proj["id"]), PRIORITY_WEIGHTS)
+
+
+@project.command("export")
+@click.argument("name")
+@click.argument("path", type=click.Path(path_type=Path))
+def export_cmd(name, path):
+    """作品をエクスポート (.parquet / .arrow / .ndjson.zst / .ndjson.gz)"""
+    p = project_get_by_name(name)
+    if not p:
+        raise click.ClickException(f"作品「{name}」が見つからない")
+    try:
+        if detect_format(path) in ("parquet", "arrow") and not have_pyarrow():
+            path = fallback_path(path)
+            console.print(f"[yellow]pyarrow未導入のため {path} に出力[/yellow]")
+        start = time.perf_counter()
+        counts = export_project(p, path)
+    except SnapshotError as e:
+        raise click.ClickException(str(e))
+    render_snapshot_counts(counts, time.perf_counter() - start)
+    console.print(f"[green]エクスポート: {path}[/green]")
+
+
+@project.command("import")
+@click.argument("path", type=click.Path(exists=True, path_type=Path))
+@click.option("--as", "name", default=None, help="作品名 (既存と重複する場合)")
+def import_cmd(path, name):
+    """エクスポートファイルから作品を取り込み"""
+    try:
+        start = time.perf_counter()
+        pid, counts = import_project(path, name)
+    except SnapshotError as e:
+        raise click.ClickException(str(e))
+    render_snapshot_counts(counts, time.perf_counter() - start)
+    console.print(f"[green]インポート完了 (ID: {pid})[/green]")
@@ -0,0 +1,32 @@
+"""ready queue: 前工程が上がり着手可能なカット"""
+
+import json
+
+import click
+
+from ..config import require_active_project
+from ..db import PHASES
+from ..models import episode_get, ready_queue
+from ..render import render_ready_queue, console
+
+
+@click.command()
+@click.argument("ep_number", type=int)
+@click.option("--phase", type=click.Choice(PHASES), required=True, help="工程")
+@click.option("--ndjson", is_flag=True, help="1行1カットのJSONで逐次出力")
+def queue(ep_number, phase, ndjson):
+    """前工程が完了し、着手待ちのカット (待ちが長い順)"""
+    proj = require_active_project()
+    ep = episode_get(proj["id"], ep_number)
+    if not ep:
+        raise click.ClickException(f"第{ep_number}話が見つからない")
+    rows = ready_queue(ep["id"], phase)
+    if ndjson:
+        for r in rows:
+            click.echo(json.dumps(r, ensure_ascii=False))
+        return
+    rows = list(rows)
+    if not rows:
+        console.print("[dim]着手可能なカットなし[/dim]")
+        return
+    render_ready_queue(rows, phase)
@@ -0,0 +1,84 @@
+"""工程フローレポート + 話数進行表"""
+
+import json
+import time
+from pathlib import Path
+
+import click
+
+from ..config import require_active_project
+from ..models import episode_get, episode_list, flow_report, sheet_grid
+from ..render import render_flow_report, console, PHASE_SHORT
+from ..sheets import write_sheets
+
+
+@click.group()
+def report():
+    """レポート"""
+    pass
+
+
+@report.command()
+@click.argument("ep_number", type=int, required=False)
+@click.option("--project", "whole_project", is_flag=True, help="作品全体で集計")
+@click.option("--days", type=click.IntRange(min=1), default=7, help="スループット集計期間 (日)")
+@click.option("--json", "as_json", is_flag=True, help="JSONで出力")
+def flow(ep_number, whole_project, days, as_json):
+    """工程別のWIP・サイクルタイム・待ち時間 (ボトルネック分析)"""
+    proj = require_active_project()
+    if whole_project:
+        rows = flow_report(project_id=proj["id"], days=days)
+        scope = proj["name"]
+    elif ep_number is not None:
+        ep = episode_get(proj["id"], ep_number)
+        if not ep:
+            raise click.ClickException(f"第{ep_number}話が見つからない")
+        rows = flow_report(episode_id=ep["id"], days=days)
+        scope = f"第{ep_number}話"
+    else:
+        raise click.ClickException("話数か --project を指定して")
+
+    if as_json:
+        click.echo(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    if not rows:
+        console.print("[dim]カットなし[/dim]")
+        return
+    render_flow_report(rows, scope, days)
+
+
+@report.command("sheets")
+@click.argument("ep_number", type=int, required=False)
+@click.option("--all", "all_episodes", is_flag=True, help="全話数を出力")
+@click.option("--out-dir", type=click.Path(file_okay=False, path_type=Path),
+              default=Path("sheets"), help="出力先ディレクトリ")
+@click.option("--jobs", type=click.IntRange(min=1), default=None,
+              help="並列書き出し数 (既定: CPU数、最大8)")
+def sheets_cmd(ep_number, all_episodes, out_dir, jobs):
+    """話数進行表 (カット×工程、担当・締切) をHTML出力"""
+    from jinja2 import TemplateNotFound
+
+    proj = require_active_project()
+    start = time.perf_counter()
+    if all_episodes:
+        episodes = episode_list(proj["id"])
+        grids = sheet_grid(proj["id"])
+    elif ep_number is not None:
+        ep = episode_get(proj["id"], ep_number)
+        if not ep:
+            raise click.ClickException(f"第{ep_number}話が見つからない")
+        episodes = [ep]
+        grids = sheet_grid(proj["id"], ep["id"])
+    else:
+        raise click.ClickException("話数か --all を指定して")
+    if not episodes:
+        console.print("[dim]話数なし[/dim]")
+        return
+
+    try:
+        paths = write_sheets(proj, episodes, grids, PHASE_SHORT, out_dir, jobs)
+    except TemplateNotFound as e:
+        raise click.ClickException(f"テンプレートが見つからない: {e}")
+    elapsed = (time.perf_counter() - start) * 1000
+    target = paths[0] if len(paths) == 1 else f"{out_dir}/ ({len(paths)}話)"
+    console.print(f"[green]進行表を出力: {target}[/green] [dim]({elapsed:.0f}ms)[/dim]")
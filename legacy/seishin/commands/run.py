@@ -0,0 +1,90 @@
+"""run: コマンドファイルを1プロセス・1トランザクションで実行"""
+
+import contextlib
+import io
+import shlex
+import time
+
+import click
+
+from .. import db
+from ..render import render_run_timings, console
+
+NOT_IN_BATCH = ("shell", "run", "storage")  # storage rebuilds tables in its own transaction
+
+
+class _DryRun(Exception):
+    pass
+
+
+def _parse(script, root: click.Group) -> list[tuple[int, str, list[str]]]:
+    """(line number, text, args) for every command line; syntax errors before anything runs."""
+    lines = []
+    for lineno, line in enumerate(script, 1):
+        try:
+            args = shlex.split(line, comments=True)
+        except ValueError as e:
+            raise click.ClickException(f"{script.name}:{lineno}: {e}")
+        if not args:
+            continue
+        if args[0] in NOT_IN_BATCH or args[0] not in root.commands:
+            raise click.ClickException(f"{script.name}:{lineno}: 実行できないコマンド: {args[0]}")
+        lines.append((lineno, line.strip(), args))
+    return lines
+
+
+@click.command()
+@click.argument("script", type=click.File("r", encoding="utf-8"))
+@click.option("--chunk", type=click.IntRange(min=1), default=None,
+              help="この行数ごとにコミット (既定: 全体で1トランザクション)")
+@click.option("--dry-run", is_flag=True, help="最後まで実行してからロールバック")
+@click.option("-q", "--quiet", is_flag=True, help="各コマンドの出力を表示しない")
+@click.option("--timings", is_flag=True, help="全コマンドの所要時間を表示")
+@click.pass_context
+def run(ctx, script, chunk, dry_run, quiet, timings):
+    """コマンドファイル (- で標準入力) を1行ずつ実行。失敗したら全体をロールバック"""
+    root = ctx.find_root().command
+    lines = _parse(script, root)
+    if not lines:
+        console.print("[dim]実行するコマンドなし[/dim]")
+        return
+
+    nested = db.shared_stamp() is not None  # `run` typed inside `seishin shell`
+    if not nested:
+        db.open_shared_conn()
+    done: list[tuple[int, str, float]] = []
+    committed = 0
+    start = time.perf_counter()
+    try:
+        with db.deferred_commits() as conn:
+            for lineno, text, args in lines:
+                t = time.perf_counter()
+                out = io.StringIO() if quiet else None
+                try:
+                    with contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+                        root.main(args, prog_name="seishin", standalone_mode=False)
+                except click.ClickException as e:
+                    raise click.ClickException(f"{script.name}:{lineno}: {e.format_message()}")
+                except click.exceptions.Abort:
+                    raise click.ClickException(f"{script.name}:{lineno}: 中断")
+                done.append((lineno, text, (time.perf_counter() - t) * 1000))
+                if chunk and len(done) % chunk == 0 and not dry_run:
+                    conn.commit_now()
+                    committed = len(done)
+            if dry_run:
+                raise _DryRun()
+    except _DryRun:
+        console.print(f"[yellow]{len(done)}件を実行し、ロールバックした (--dry-run)[/yellow]")
+    except BaseException:
+        if committed:
+            console.print(f"[yellow]{committed}件はコミット済み、以降をロールバック[/yellow]")
+        else:
+            console.print("[yellow]全体をロールバック[/yellow]")
+        raise
+    else:
+        elapsed = (time.perf_counter() - start) * 1000
+        console.print(f"[green]{len(done)}件をコミット[/green] [dim]({elapsed:.0f}ms)[/dim]")
+    finally:
+        if not nested:
+            db.close_shared_conn()
+    render_run_timings(done, None if timings else 5)
@@ -0,0 +1,177 @@
+"""shell: 1プロセス・1接続で既存コマンドを連続実行"""
+
+import shlex
+
+import click
+
+from .. import db
+from ..config import get_active_project, forget_active_project
+from ..models import cut_numbers
+from ..render import console
+
+try:
+    import readline
+except ImportError:  # Windows without pyreadline: no history or completion
+    readline = None
+
+HISTORY_FILE = "shell_history"
+HISTORY_LENGTH = 1000
+CUT_ARGS = ("cut_number", "cut_spec")
+
+
+class _Completer:
+    """readline completion over the click command tree and the project's cut numbers."""
+
+    def __init__(self, root: click.Group):
+        self.root = root
+        self._cuts: tuple | None = None  # ((stamp, project id), {ep: [numbers]})
+        self._matches: list[str] = []
+
+    def cut_index(self) -> dict[int, list[str]]:
+        proj = get_active_project()
+        if proj is None:
+            return {}
+        key = (db.shared_stamp(), proj["id"])
+        if self._cuts is None or self._cuts[0] != key:
+            self._cuts = (key, cut_numbers(proj["id"]))
+        return self._cuts[1]
+
+    def candidates(self, words: list[str], text: str) -> list[str]:
+        cmd = self.root
+        while words and isinstance(cmd, click.Group) and words[0] in cmd.commands:
+            cmd = cmd.commands[words.pop(0)]
+        if isinstance(cmd, click.Group) and not words:
+            names = list(cmd.commands) + (["help", "quit"] if cmd is self.root else [])
+            return [n for n in names if n.startswith(text)]
+
+        options = {o: p for p in cmd.params if isinstance(p, click.Option) for o in p.opts}
+        if text.startswith("-"):
+            return [o for o in options if o.startswith(text)]
+        if words and words[-1] in options:
+            opt = options[words[-1]]
+            if isinstance(opt.type, click.Choice):
+                return [c for c in opt.type.choices if c.startswith(text)]
+            if not opt.is_flag:
+                return []
+
+        positional, skip = [], False
+        for w in words:
+            if skip:
+                skip = False
+            elif w.startswith("-"):
+                skip = w in options and not options[w].is_flag and "=" not in w
+            else:
+                positional.append(w)
+        args = [p for p in cmd.params if isinstance(p, click.Argument)]
+        if len(positional) >= len(args):
+            return []
+        arg = args[len(positional)]
+        if arg.name in CUT_ARGS and "ep_number" in [a.name for a in args[:len(positional)]]:
+            ep = positional[[a.name for a in args].index("ep_number")]
+            if ep.isdigit():
+                return [n for n in self.cut_index().get(int(ep), []) if n.startswith(text)]
+        if isinstance(arg.type, click.Choice):
+            return [c for c in arg.type.choices if c.startswith(text)]
+        return []
+
+    def complete(self, text: str, state: int) -> str | None:
+        if state == 0:
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            try:
+                words = shlex.split(line)
+            except ValueError:
+                words = line.split()
+            try:
+                self._matches = [m + " " for m in self.candidates(words, text)]
+            except Exception:  # never let a completion bug kill the prompt
+                self._matches = []
+        return self._matches[state] if state < len(self._matches) else None
+
+
+def _setup_readline(root: click.Group):
+    if readline is None:
+        return None
+    history = db.SEISHIN_DIR / HISTORY_FILE
+    try:
+        readline.read_history_file(history)
+    except OSError:
+        pass
+    readline.set_history_length(HISTORY_LENGTH)
+    readline.set_completer(_Completer(root).complete)
+    readline.set_completer_delims(" \t")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    return history
+
+
+def _dispatch(root: click.Group, args: list[str]):
+    """Run one command line through the normal click entry point, in-process."""
+    try:
+        root.main(args, prog_name="seishin", standalone_mode=False)
+    except click.exceptions.Abort:
+        console.print("[dim]中断[/dim]")
+    except click.ClickException as e:
+        e.show()
+    except KeyboardInterrupt:
+        console.print("[dim]中断[/dim]")
+    except Exception as e:  # keep the session alive; the command is what failed
+        console.print(f"[red]エラー: {type(e).__name__}: {e}[/red]")
+    finally:
+        # A command that failed halfway must not leave its writes pending
+        # for the next one to commit.
+        conn = db.get_conn()
+        if conn.in_transaction:
+            conn.rollback()
+            conn.rollbacks += 1
+
+
+@click.command()
+@click.pass_context
+def shell(ctx):
+    """対話シェル (1プロセス・1接続、キャッシュとカット番号補完付き)"""
+    if db.shared_stamp() is not None:
+        raise click.ClickException("すでにシェルの中")
+    root = ctx.find_root().command
+    db.open_shared_conn()
+    history = _setup_readline(root)
+    console.print("[dim]seishin のコマンドをそのまま入力 (例: cut show 1 C001)。"
+                  "Tabで補完、quit で終了[/dim]")
+    stamp = db.shared_stamp()
+    try:
+        while True:
+            proj = get_active_project()
+            try:
+                line = input(f"seishin[{proj['name'] if proj else '-'}]> ")
+            except EOFError:
+                console.print()
+                break
+            except KeyboardInterrupt:
+                console.print()
+                continue
+            try:
+                args = shlex.split(line, comments=True)
+            except ValueError as e:
+                console.print(f"[red]{e}[/red]")
+                continue
+            if not args:
+                continue
+            if args[0] in ("quit", "exit"):
+                break
+            if args[0] == "help":
+                args = args[1:] + ["--help"]
+            elif args[0] == "shell":
+                console.print("[red]すでにシェルの中[/red]")
+                continue
+            _dispatch(root, args)
+            if db.shared_stamp() != stamp:
+                stamp = db.shared_stamp()
+                forget_active_project()  # the project row itself may have changed
+    finally:
+        if history is not None:
+            try:
+                readline.write_history_file(history)
+            except OSError:
+                pass
+        db.close_shared_conn()
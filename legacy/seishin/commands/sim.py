@@ -2,7 +2,8 @@
 
 import click
 
-from ..db import require_active_project, PHASES
+from ..config import require_active_project
+from ..db import PHASES
 from ..models import episode_get, sim_delay
 from ..render import render_sim_delay, console
 
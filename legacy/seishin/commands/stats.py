@@ -0,0 +1,30 @@
+"""作業ログ集計"""
+
+import click
+
+from ..db import PHASES
+from ..models import creator_throughput, creator_apply_throughput
+from ..render import render_creator_stats, console
+
+
+@click.group()
+def stats():
+    """実績集計"""
+    pass
+
+
+@stats.command()
+@click.option("--days", type=click.IntRange(min=1), default=7, help="集計期間 (日)")
+@click.option("--phase", type=click.Choice(PHASES), default=None, help="工程でフィルタ")
+@click.option("--apply", is_flag=True, help="実測カット/日を日産 (daily_capacity) に反映 (未設定の人のみ)")
+@click.option("--overwrite", is_flag=True, help="--apply で設定済みの日産も上書き")
+def creators(days, phase, apply, overwrite):
+    """クリエイター別のカット/日・枚/日"""
+    rows = creator_throughput(days, phase)
+    if not rows:
+        console.print("[dim]作業ログなし[/dim]")
+        return
+    render_creator_stats(rows, days)
+    if apply:
+        n = creator_apply_throughput(days, phase, overwrite)
+        console.print(f"[green]{n}人の日産を実績から更新[/green]")
@@ -0,0 +1,31 @@
+"""storage layout: カット進捗の保存レイアウト"""
+
+import click
+
+from ..models import storage_layout, storage_set_layout
+from ..render import console
+
+LAYOUTS = {
+    "normalized": "1カット×工程ごとに1行 (既定)",
+    "wide": "1カット1行に全工程のステータス・担当・締切 (ボード/ダッシュボード用)",
+}
+
+
+@click.group()
+def storage():
+    """保存レイアウト"""
+    pass
+
+
+@storage.command()
+@click.argument("kind", type=click.Choice(list(LAYOUTS)), required=False)
+def layout(kind):
+    """レイアウトを表示、または切り替え (wide は既存データから再構築)"""
+    if kind is None:
+        current = storage_layout()
+        console.print(f"{current}: {LAYOUTS[current]}")
+        return
+    if storage_set_layout(kind):
+        console.print(f"[green]レイアウトを {kind} に変更[/green]")
+    else:
+        console.print(f"[dim]すでに {kind}[/dim]")
@@ -0,0 +1,141 @@
+"""設定ファイル (config.json) + アクティブプロジェクト
+
+The parsed config is cached per process and re-read only when the file
+is replaced or changes size/mtime. Writes take an exclusive lock on
+``config.json.lock``, re-read the current file and replace it atomically
+(temp file + os.replace), so concurrent `project switch` calls never
+leave it truncated. SEISHIN_PROJECT (name or id) overrides the active
+project for one shell.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import click
+
+from . import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: the rename is still atomic, writers just don't queue
+    fcntl = None
+
+ENV_PROJECT = "SEISHIN_PROJECT"
+
+_config: tuple | None = None   # (file key, parsed config)
+_active: tuple | None = None   # ((file key, env), project row or None)
+
+
+def _file_key(path: Path) -> tuple:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return (str(path), None)
+    return (str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def load_config() -> dict:
+    """Parsed config ({} when missing), cached until the file changes. Do not mutate."""
+    global _config
+    path = db.CONFIG_PATH
+    key = _file_key(path)
+    if _config is None or _config[0] != key:
+        config = {}
+        if key[1] is not None:
+            try:
+                config = json.loads(path.read_text())
+            except json.JSONDecodeError as e:
+                raise click.ClickException(f"設定ファイルが壊れている: {path} ({e})")
+        _config = (key, config)
+    return _config[1]
+
+
+@contextmanager
+def _locked(path: Path):
+    db.ensure_dir()
+    with open(path.with_name(path.name + ".lock"), "w") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield  # closing the lock file releases the lock
+
+
+def update_config(**values):
+    """Merge ``values`` into the config file under the lock, replacing it atomically."""
+    global _config
+    path = db.CONFIG_PATH
+    with _locked(path):
+        _config = None  # pick up whatever another writer just left
+        config = {**load_config(), **values}
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            os.chmod(tmp, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+            with os.fdopen(fd, "w") as f:
+                json.dump(config, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        _config = None
+
+
+def _lookup_project(conn: sqlite3.Connection, env: str | None, config: dict) -> dict | None:
+    if env:  # name, or id if no project has that name
+        row = conn.execute("SELECT * FROM project WHERE name = ?", (env,)).fetchone()
+        if row is None and env.isdigit():
+            row = conn.execute("SELECT * FROM project WHERE id = ?", (int(env),)).fetchone()
+    else:
+        row = conn.execute("SELECT * FROM project WHERE id = ?",
+                           (config["active_project"]["id"],)).fetchone()
+    return dict(row) if row else None
+
+
+def get_active_project(conn: sqlite3.Connection | None = None) -> dict | None:
+    """The active project's row (SEISHIN_PROJECT, else config), cached until either changes.
+
+    Pass ``conn`` to resolve it on a connection the caller already has open.
+    """
+    global _active
+    env = os.environ.get(ENV_PROJECT) or None
+    config = load_config()
+    key = (_config[0], env)
+    if _active is not None and _active[0] == key:
+        return _active[1]
+    row = None
+    if env or config.get("active_project"):
+        own = conn is None
+        conn = conn or db.get_conn()
+        try:
+            row = _lookup_project(conn, env, config)
+        finally:
+            if own:
+                conn.close()
+    _active = (key, row)
+    return row
+
+
+def forget_active_project():
+    """Drop the cached project row (after renaming or editing the project)."""
+    global _active
+    _active = None
+
+
+def set_active_project(project_id: int, project_name: str):
+    update_config(active_project={"id": project_id, "name": project_name})
+
+
+def require_active_project() -> dict:
+    proj = get_active_project()
+    if not proj:
+        env = os.environ.get(ENV_PROJECT)
+        if env:
+            raise click.ClickException(f"{ENV_PROJECT}={env} の作品が見つからない")
+        raise click.ClickException(
+            "アクティブプロジェクトが未設定。`seishin project switch <name>` で設定して"
+        )
+    return proj
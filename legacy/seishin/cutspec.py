@@ -0,0 +1,227 @@
+"""カット番号指定のパース (C001-C050,C060,C042A-C042C)"""
+
+import re
+from typing import Iterator, NamedTuple
+
+# Sort key = prefix code << NUMBER_BITS | number * SUFFIX_SLOTS + suffix ordinal
+# (0: none, A-Z: 1-26). The prefix code reads the prefix as PREFIX_LETTERS
+# base-27 digits (A-Z: 1-26, blank: 0), so keys order by prefix, then number.
+SUFFIX_SLOTS = 27
+PREFIX_LETTERS = 4
+NUMBER_BITS = 40
+
+_TOKEN = re.compile(
+    r"""\s*(?P<p1>[A-Za-z]*)(?P<n1>\d+)(?P<s1>[A-Za-z]?)
+    (?:\s*-\s*(?P<p2>[A-Za-z]*)(?P<n2>\d+)(?P<s2>[A-Za-z]?))?
+    \s*(?:,|$)""",
+    re.VERBOSE,
+)
+_NUMBER = re.compile(r"([A-Za-z]*)(\d+)([A-Za-z]?)")
+
+
+def _suffix_ord(suffix: str) -> int:
+    return ord(suffix) - 64 if suffix else 0
+
+
+def _key(prefix: str, number: int, suffix: int) -> int | None:
+    """Sort key of prefix/number/suffix ordinal, or None when it does not fit."""
+    local = number * SUFFIX_SLOTS + suffix
+    if len(prefix) > PREFIX_LETTERS or local >> NUMBER_BITS:
+        return None
+    code = 0
+    for ch in prefix.upper().ljust(PREFIX_LETTERS, "@"):  # "@" is ordinal 0
+        code = code * 27 + ord(ch) - 64
+    return code << NUMBER_BITS | local
+
+
+def cut_sort_key(number: str | None) -> int | None:
+    """Natural-order key for a cut number: A9 < C2 < C42 < C42A < C42B < C1000.
+
+    Numbers that don't look like <prefix><digits>[suffix], prefixes longer
+    than PREFIX_LETTERS and numbers past 2**NUMBER_BITS / 27 get None.
+    """
+    if not number:
+        return None
+    m = _NUMBER.fullmatch(number)
+    if not m:
+        return None
+    return _key(m.group(1), int(m.group(2)), _suffix_ord(m.group(3).upper()))
+
+
+class CutRange(NamedTuple):
+    """Cuts prefix+start..end zero-padded to width, or suffix_lo..suffix_hi of one number."""
+
+    prefix: str
+    start: int
+    end: int
+    width: int
+    suffix_lo: str = ""
+    suffix_hi: str = ""
+
+    def numbers(self) -> Iterator[str]:
+        if not self.suffix_lo:
+            for n in range(self.start, self.end + 1):
+                yield f"{self.prefix}{n:0{self.width}d}"
+            return
+        base = f"{self.prefix}{self.start:0{self.width}d}"
+        for o in range(ord(self.suffix_lo), ord(self.suffix_hi) + 1):
+            yield base + chr(o)
+
+    def size(self) -> int:
+        if self.suffix_lo:
+            return ord(self.suffix_hi) - ord(self.suffix_lo) + 1
+        return self.end - self.start + 1
+
+    def key_bounds(self) -> tuple[int, int] | None:
+        """Inclusive cut_sort_key bounds, None when its cuts have no key. A
+        plain range also covers the A/B splits of its cuts (C001-C050 matches C042A)."""
+        if self.suffix_lo:
+            lo = _key(self.prefix, self.start, _suffix_ord(self.suffix_lo))
+            hi = _key(self.prefix, self.start, _suffix_ord(self.suffix_hi))
+        else:
+            lo = _key(self.prefix, self.start, 0)
+            hi = _key(self.prefix, self.end, SUFFIX_SLOTS - 1)
+        return None if lo is None or hi is None else (lo, hi)
+
+
+class CutSpec:
+    """Parsed cut spec: sorted, non-overlapping ranges, plus ``literals``
+    (numbers outside the <prefix><digits>[suffix] grammar, taken as-is).
+    Iterating yields cut numbers lazily range by range; ``sql()`` turns the
+    ranges into a key predicate without expanding them."""
+
+    __slots__ = ("ranges", "literals")
+
+    def __init__(self, ranges: list[CutRange], literals: list[str] = ()):
+        self.ranges = _normalize(ranges)
+        self.literals = tuple(dict.fromkeys(literals))
+
+    def __iter__(self) -> Iterator[str]:
+        for r in self.ranges:
+            yield from r.numbers()
+        yield from self.literals
+
+    def __len__(self) -> int:
+        return sum(r.size() for r in self.ranges) + len(self.literals)
+
+    def __contains__(self, number: str) -> bool:
+        key = cut_sort_key(number)
+        if key is not None and any(lo <= key <= hi for lo, hi in self.bounds()):
+            return True
+        return number in self.exact()
+
+    def __str__(self) -> str:
+        parts = []
+        for r in self.ranges:
+            first = f"{r.prefix}{r.start:0{r.width}d}{r.suffix_lo}"
+            if r.size() == 1:
+                parts.append(first)
+            elif r.suffix_lo:
+                parts.append(f"{first}-{first[:-1]}{r.suffix_hi}")
+            else:
+                parts.append(f"{first}-{r.prefix}{r.end:0{r.width}d}")
+        return ",".join(parts + list(self.literals))
+
+    def bounds(self) -> list[tuple[int, int]]:
+        """Merged inclusive sort-key intervals covered by the keyed ranges."""
+        merged: list[list[int]] = []
+        keyed = (r.key_bounds() for r in self.ranges)
+        for lo, hi in sorted(b for b in keyed if b is not None):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        return [(lo, hi) for lo, hi in merged]
+
+    def exact(self) -> list[str]:
+        """Numbers matched by name rather than key: unkeyed ranges and literals."""
+        unkeyed = [n for r in self.ranges if r.key_bounds() is None for n in r.numbers()]
+        return unkeyed + list(self.literals)
+
+    def sql(self, key_column: str, number_column: str = "number") -> tuple[str, list]:
+        """``(clause, params)`` matching rows whose sort key lies in the spec
+        (or, for exact() numbers, whose number is one of them)."""
+        bounds, exact = self.bounds(), self.exact()
+        terms = [f"{key_column} BETWEEN ? AND ?" for _ in bounds]
+        if exact:
+            terms.append(f"{number_column} IN ({', '.join('?' * len(exact))})")
+        return f"({' OR '.join(terms)})", [v for b in bounds for v in b] + exact
+
+
+def _normalize(ranges: list[CutRange]) -> tuple[CutRange, ...]:
+    """Merge overlapping/adjacent ranges of the same shape, then sort by key."""
+    out: list[CutRange] = []
+    for r in sorted((r for r in ranges if not r.suffix_lo),
+                    key=lambda r: (r.prefix, r.width, r.start)):
+        last = out[-1] if out else None
+        if last and (last.prefix, last.width) == (r.prefix, r.width) and r.start <= last.end + 1:
+            out[-1] = last._replace(end=max(last.end, r.end))
+        else:
+            out.append(r)
+    n_plain = len(out)
+    for r in sorted((r for r in ranges if r.suffix_lo),
+                    key=lambda r: (r.prefix, r.width, r.start, r.suffix_lo)):
+        last = out[-1] if len(out) > n_plain else None
+        if (last and (last.prefix, last.width, last.start) == (r.prefix, r.width, r.start)
+                and ord(r.suffix_lo) <= ord(last.suffix_hi) + 1):
+            out[-1] = last._replace(suffix_hi=max(last.suffix_hi, r.suffix_hi))
+        else:
+            out.append(r)
+    return tuple(sorted(out, key=_order))
+
+
+def _order(r: CutRange) -> tuple:
+    """Ranges by key; ranges without one last, by prefix and number."""
+    bounds = r.key_bounds()
+    return (bounds is None, bounds[0] if bounds else 0, r.prefix, r.start, r.suffix_lo)
+
+
+def _compile(m: re.Match) -> CutRange:
+    p1, n1, s1 = m.group("p1"), m.group("n1"), m.group("s1").upper()
+    if m.group("n2") is None:
+        return CutRange(p1, int(n1), int(n1), len(n1), s1, s1)
+
+    p2, n2, s2 = m.group("p2"), m.group("n2"), m.group("s2").upper()
+    if p1 and p2 and p1 != p2:
+        raise ValueError(f"範囲の接頭辞が一致しない: {m.group(0).strip(' ,')}")
+    start, end = int(n1), int(n2)
+    if s1 or s2:
+        if start != end or not (s1 and s2):
+            raise ValueError(
+                f"枝番付きの範囲は同じ番号内のみ (例: C042A-C042C): {m.group(0).strip(' ,')}"
+            )
+        if s1 > s2:
+            raise ValueError(f"範囲が逆順: {m.group(0).strip(' ,')}")
+        return CutRange(p1 or p2, start, end, len(n1), s1, s2)
+    if start > end:
+        raise ValueError(f"範囲が逆順: {m.group(0).strip(' ,')}")
+    return CutRange(p1 or p2 or "C", start, end, len(n1))
+
+
+def parse_cut_spec(spec: str, verbatim: bool = False) -> CutSpec:
+    """Parse 'C001-C050,C060,C042A-C042C' in a single left-to-right pass.
+
+    Raises ValueError on anything that isn't a comma-separated list of cut
+    numbers or ranges. With ``verbatim``, a list item outside the cut
+    number grammar (OP, S#12) is kept as a literal number instead, as long
+    as it has no "-" (which always means a range).
+    """
+    spec = spec.strip()
+    if not spec:
+        raise ValueError("カット指定が空")
+    ranges, literals = [], []
+    pos = 0
+    while pos < len(spec):
+        m = _TOKEN.match(spec, pos)
+        if m:
+            ranges.append(_compile(m))
+            pos = m.end()
+            continue
+        end = spec.find(",", pos)
+        end = len(spec) if end < 0 else end
+        item = spec[pos:end].strip()
+        if not verbatim or not item or "-" in item:
+            raise ValueError(f"カット指定を解釈できない: {spec[pos:]!r}")
+        literals.append(item)
+        pos = end + 1
+    return CutSpec(ranges, literals)
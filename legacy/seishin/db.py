@@ -1,8 +1,11 @@
 """SQLite接続 + マイグレーション"""
 
-import json
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterator
+
+from .cutspec import cut_sort_key
 
 SEISHIN_DIR = Path.home() / ".seishin"
 DB_PATH = SEISHIN_DIR / "seishin.db"
@@ -16,6 +19,46 @@ PHASES = [
 
 STATUSES = ["pending", "in_progress", "completed", "retake", "delayed"]
 
+# Integer codes used by compact tables (cut_phase_event, exports)
+PHASE_CODE = {p: i for i, p in enumerate(PHASES)}
+STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+
+
+def code_sql(column: str, codes: dict[str, int]) -> str:
+    """SQL CASE expression mapping a phase/status name column to its code."""
+    whens = " ".join(f"WHEN '{name}' THEN {code}" for name, code in codes.items())
+    return f"CASE {column} {whens} END"
+
+
+# cut.phase_mask: bit PHASE_CODE[phase] is set while that phase is completed
+PHASE_MASK_SQL = f"""(SELECT COALESCE(SUM(1 << cp.phase), 0)
+    FROM cut_phase_data cp WHERE cp.cut_id = cut.id AND cp.status = {STATUS_CODE['completed']})"""
+# One cut_phase_event per cut-phase (in ``scope``) that has none yet but is
+# not pending/unassigned: history from before the event log, or imported,
+# starts at its completed/started/created time with the current state.
+def seed_phase_events_sql(scope: str = "1") -> str:
+    return f"""INSERT INTO cut_phase_event (cut_phase_id, status, assignee_id, at)
+    SELECT cp.id, cp.status, cp.assignee_id, CAST(strftime('%s',
+        COALESCE(cp.completed_at, cp.started_at, c.created_at, 'now')) AS INTEGER)
+    FROM cut_phase_data cp
+    JOIN cut c ON c.id = cp.cut_id
+    WHERE ({scope}) AND (cp.status != 0 OR cp.assignee_id IS NOT NULL)
+    AND NOT EXISTS (SELECT 1 FROM cut_phase_event e WHERE e.cut_phase_id = cp.id)"""
+
+
+# The same over the TEXT columns migration 4 still saw
+_V4_PHASE_BIT = f"(1 << {code_sql('NEW.phase', PHASE_CODE)})"
+_V4_PHASE_MASK_SQL = f"""(SELECT COALESCE(SUM(1 << {code_sql('cp.phase', PHASE_CODE)}), 0)
+    FROM cut_phase cp WHERE cp.cut_id = cut.id AND cp.status = 'completed')"""
+
+
+def _lookup_rows(names: list[str]) -> str:
+    return ", ".join(f"({code}, '{name}')" for code, name in enumerate(names))
+
+
+_CUT_PHASE_COLUMNS = "id, cut_id, phase, status, assignee_id, deadline, started_at, completed_at"
+_COMPLETED = STATUS_CODE["completed"]
+
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS project (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -111,49 +154,507 @@ CREATE TABLE IF NOT EXISTS work_log (
     completed_at TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Cuts covered by each order ("order".cut_numbers, normalized)
+CREATE TABLE IF NOT EXISTS order_cut (
+    order_id INTEGER NOT NULL REFERENCES "order"(id),
+    cut_id INTEGER NOT NULL REFERENCES cut(id),
+    phase TEXT NOT NULL,
+    PRIMARY KEY (order_id, cut_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_order_cut_cut ON order_cut(cut_id, phase);
+
+-- Append-only history of cut_phase. status is a STATUS_CODE, at is epoch seconds.
+CREATE TABLE IF NOT EXISTS cut_phase_event (
+    id INTEGER PRIMARY KEY,
+    cut_phase_id INTEGER NOT NULL REFERENCES cut_phase(id),
+    status INTEGER NOT NULL,
+    assignee_id INTEGER,
+    at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_cut_phase_event_at
+    ON cut_phase_event(cut_phase_id, at, status, assignee_id);
+
+-- Per-project overrides of the priority score weights (models.PRIORITY_WEIGHTS)
+CREATE TABLE IF NOT EXISTS priority_weight (
+    project_id INTEGER NOT NULL REFERENCES project(id),
+    name TEXT NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (project_id, name)
+) WITHOUT ROWID;
+
+-- Cached priority scores of open cut-phases, rebuilt per episode when its
+-- priority_state row is missing or from an earlier day.
+CREATE TABLE IF NOT EXISTS priority_rank (
+    cut_phase_id INTEGER PRIMARY KEY REFERENCES cut_phase(id),
+    episode_id INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    sort_key INTEGER NOT NULL,
+    score REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_priority_rank_score
+    ON priority_rank(episode_id, score DESC, sort_key, cut_phase_id);
+
+CREATE TABLE IF NOT EXISTS priority_state (
+    episode_id INTEGER PRIMARY KEY REFERENCES episode(id),
+    computed_on TEXT NOT NULL
+);
+
+-- Any write that can change a score drops the episode's priority_state
+CREATE TRIGGER IF NOT EXISTS trg_priority_cut_phase_insert AFTER INSERT ON cut_phase
+BEGIN
+    DELETE FROM priority_state WHERE episode_id = (SELECT episode_id FROM cut WHERE id = NEW.cut_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_cut_phase_update
+AFTER UPDATE OF status, assignee_id, deadline ON cut_phase
+BEGIN
+    DELETE FROM priority_state WHERE episode_id = (SELECT episode_id FROM cut WHERE id = NEW.cut_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_cut_phase_delete AFTER DELETE ON cut_phase
+BEGIN
+    DELETE FROM priority_state WHERE episode_id = (SELECT episode_id FROM cut WHERE id = OLD.cut_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_cut_update
+AFTER UPDATE OF is_priority, priority_reason, difficulty, number ON cut
+BEGIN
+    DELETE FROM priority_state WHERE episode_id = NEW.episode_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_creator_update AFTER UPDATE OF pulls_deadline ON creator
+BEGIN
+    DELETE FROM priority_state;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_weight_insert AFTER INSERT ON priority_weight
+BEGIN
+    DELETE FROM priority_state
+    WHERE episode_id IN (SELECT id FROM episode WHERE project_id = NEW.project_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_weight_update AFTER UPDATE ON priority_weight
+BEGIN
+    DELETE FROM priority_state
+    WHERE episode_id IN (SELECT id FROM episode WHERE project_id = NEW.project_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_priority_weight_delete AFTER DELETE ON priority_weight
+BEGIN
+    DELETE FROM priority_state
+    WHERE episode_id IN (SELECT id FROM episode WHERE project_id = OLD.project_id);
+END;
+"""
+
+# Tables the reference cache (refcache.py) memoises lookups of. Each has a
+# table_version row that triggers bump on every insert, update and delete.
+REFERENCE_TABLES = ("project", "episode", "creator", "company")
+
+
+_VERSION_TRIGGERS = "\n    ".join(
+    f"""CREATE TRIGGER trg_{table}_version_{op.lower()} AFTER {op} ON {table}
+    BEGIN
+        UPDATE table_version SET version = version + 1 WHERE name = '{table}';
+    END;"""
+    for table in REFERENCE_TABLES for op in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+# Changes to existing tables, applied in order after SCHEMA_SQL.
+# PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    # 1: per-episode budget, index for order spend rollups
+    """
+    ALTER TABLE episode ADD COLUMN budget INTEGER DEFAULT 0;
+    CREATE INDEX IF NOT EXISTS idx_order_episode_phase_status
+        ON "order"(episode_id, phase, status);
+    """,
+    # 2: backfill order_cut from orders created before it existed
+    """
+    INSERT OR IGNORE INTO order_cut (order_id, cut_id, phase)
+    SELECT o.id, c.id, o.phase
+    FROM "order" o
+    JOIN cut c ON c.episode_id = o.episode_id
+        AND instr(',' || o.cut_numbers || ',', ',' || c.number || ',') > 0;
+    """,
+    # 3: natural-order key for cut numbers (-1 when the number has no digits)
+    """
+    ALTER TABLE cut ADD COLUMN sort_key INTEGER NOT NULL DEFAULT -1;
+    UPDATE cut SET sort_key = COALESCE(cut_sort_key(number), -1);
+    CREATE INDEX IF NOT EXISTS idx_cut_episode_sort ON cut(episode_id, sort_key, number);
+    """,
+    # 4: completed-phases bitmask per cut, opt-in workflow order enforcement
+    f"""
+    ALTER TABLE cut ADD COLUMN phase_mask INTEGER NOT NULL DEFAULT 0;
+    UPDATE cut SET phase_mask = {_V4_PHASE_MASK_SQL};
+    CREATE INDEX IF NOT EXISTS idx_cut_episode_mask ON cut(episode_id, phase_mask);
+    CREATE TRIGGER IF NOT EXISTS trg_cut_phase_mask AFTER UPDATE OF status ON cut_phase
+    WHEN (OLD.status = 'completed') != (NEW.status = 'completed')
+    BEGIN
+        UPDATE cut SET phase_mask = CASE WHEN NEW.status = 'completed'
+            THEN phase_mask | {_V4_PHASE_BIT} ELSE phase_mask & ~{_V4_PHASE_BIT} END
+        WHERE id = NEW.cut_id;
+    END;
+    ALTER TABLE project ADD COLUMN enforce_workflow INTEGER NOT NULL DEFAULT 0;
+    """,
+    # 5: cut_phase.phase/status stored as PHASE_CODE/STATUS_CODE integers in
+    # cut_phase_data; cut_phase becomes a view with the names (writable via
+    # INSTEAD OF triggers). Codes are list positions: PHASES/STATUSES are append-only.
+    f"""
+    CREATE TABLE phase (code INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+    CREATE TABLE status (code INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+    INSERT INTO phase VALUES {_lookup_rows(PHASES)};
+    INSERT INTO status VALUES {_lookup_rows(STATUSES)};
+
+    -- renaming first repoints the foreign keys of cut_phase_event/priority_rank
+    ALTER TABLE cut_phase RENAME TO cut_phase_data;
+    CREATE TABLE cut_phase_coded (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cut_id INTEGER NOT NULL REFERENCES cut(id),
+        phase INTEGER NOT NULL REFERENCES phase(code),
+        status INTEGER NOT NULL DEFAULT 0 REFERENCES status(code),
+        assignee_id INTEGER REFERENCES creator(id),
+        deadline TEXT,
+        started_at TEXT,
+        completed_at TEXT,
+        UNIQUE(cut_id, phase)
+    );
+    INSERT INTO cut_phase_coded ({_CUT_PHASE_COLUMNS})
+    SELECT id, cut_id, {code_sql('phase', PHASE_CODE)}, {code_sql('status', STATUS_CODE)},
+        assignee_id, deadline, started_at, completed_at
+    FROM cut_phase_data;
+    DROP TABLE cut_phase_data;
+    ALTER TABLE cut_phase_coded RENAME TO cut_phase_data;
+
+    CREATE TRIGGER trg_priority_cut_phase_insert AFTER INSERT ON cut_phase_data
+    BEGIN
+        DELETE FROM priority_state WHERE episode_id = (SELECT episode_id FROM cut WHERE id = NEW.cut_id);
+    END;
+    CREATE TRIGGER trg_priority_cut_phase_update
+    AFTER UPDATE OF status, assignee_id, deadline ON cut_phase_data
+    BEGIN
+        DELETE FROM priority_state WHERE episode_id = (SELECT episode_id FROM cut WHERE id = NEW.cut_id);
+    END;
+    CREATE TRIGGER trg_priority_cut_phase_delete AFTER DELETE ON cut_phase_data
+    BEGIN
+        DELETE FROM priority_state WHERE episode_id = (SELECT episode_id FROM cut WHERE id = OLD.cut_id);
+    END;
+    CREATE TRIGGER trg_cut_phase_mask AFTER UPDATE OF status ON cut_phase_data
+    WHEN (OLD.status = {_COMPLETED}) != (NEW.status = {_COMPLETED})
+    BEGIN
+        UPDATE cut SET phase_mask = CASE WHEN NEW.status = {_COMPLETED}
+            THEN phase_mask | (1 << NEW.phase) ELSE phase_mask & ~(1 << NEW.phase) END
+        WHERE id = NEW.cut_id;
+    END;
+
+    CREATE VIEW cut_phase AS
+    SELECT d.id, d.cut_id, p.name AS phase, s.name AS status, d.assignee_id,
+        d.deadline, d.started_at, d.completed_at
+    FROM cut_phase_data d
+    JOIN phase p ON p.code = d.phase
+    JOIN status s ON s.code = d.status;
+
+    CREATE TRIGGER trg_cut_phase_view_insert INSTEAD OF INSERT ON cut_phase
+    BEGIN
+        INSERT INTO cut_phase_data ({_CUT_PHASE_COLUMNS})
+        VALUES (NEW.id, NEW.cut_id, (SELECT code FROM phase WHERE name = NEW.phase),
+            (SELECT code FROM status WHERE name = COALESCE(NEW.status, 'pending')),
+            NEW.assignee_id, NEW.deadline, NEW.started_at, NEW.completed_at);
+    END;
+    CREATE TRIGGER trg_cut_phase_view_update INSTEAD OF UPDATE ON cut_phase
+    BEGIN
+        UPDATE cut_phase_data SET
+            phase = (SELECT code FROM phase WHERE name = NEW.phase),
+            status = (SELECT code FROM status WHERE name = NEW.status),
+            assignee_id = NEW.assignee_id, deadline = NEW.deadline,
+            started_at = NEW.started_at, completed_at = NEW.completed_at
+        WHERE id = OLD.id;
+    END;
+    CREATE TRIGGER trg_cut_phase_view_delete INSTEAD OF DELETE ON cut_phase
+    BEGIN
+        DELETE FROM cut_phase_data WHERE id = OLD.id;
+    END;
+
+    -- "order".phase stays TEXT but must name a phase
+    CREATE TRIGGER trg_order_phase_insert BEFORE INSERT ON "order"
+    WHEN NOT EXISTS (SELECT 1 FROM phase WHERE name = NEW.phase)
+    BEGIN
+        SELECT RAISE(ABORT, 'unknown phase');
+    END;
+    CREATE TRIGGER trg_order_phase_update BEFORE UPDATE OF phase ON "order"
+    WHEN NOT EXISTS (SELECT 1 FROM phase WHERE name = NEW.phase)
+    BEGIN
+        SELECT RAISE(ABORT, 'unknown phase');
+    END;
+    """,
+    # 6: open orders per assignee (company capacity check on `order new`)
+    """
+    CREATE INDEX IF NOT EXISTS idx_order_assignee
+        ON "order"(assignee_type, assignee_id, status, deadline);
+    """,
+    # 7: per-table write counters for the reference cache
+    f"""
+    CREATE TABLE table_version (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+    INSERT INTO table_version (name) VALUES {", ".join(f"('{t}')" for t in REFERENCE_TABLES)};
+    {_VERSION_TRIGGERS}
+    """,
+    # 8: as-of boards: seed the event log for cut-phases changed before it existed
+    f"""
+    {seed_phase_events_sql()};
+    """,
+    # 9: drop order_cut rows migration 2 matched by LIKE (case-insensitive, _ and %
+    # as wildcards) that do not name the cut exactly
+    """
+    DELETE FROM order_cut WHERE NOT EXISTS (
+        SELECT 1 FROM "order" o JOIN cut c ON c.id = order_cut.cut_id
+        WHERE o.id = order_cut.order_id
+        AND instr(',' || o.cut_numbers || ',', ',' || c.number || ',') > 0
+    );
+    """,
+    # 10: sort keys order by prefix first (A001 < A002 < C001); ranks are rebuilt
+    """
+    UPDATE cut SET sort_key = COALESCE(cut_sort_key(number), -1);
+    DELETE FROM priority_rank;
+    DELETE FROM priority_state;
+    """,
+]
+
+
+# Optional wide layout (`seishin storage layout wide`): one cut_progress row
+# per cut holding every phase's status, assignee and deadline, so board and
+# dashboard reads scan one row per cut instead of one per cut-phase. It is
+# derived data, kept in step with cut_phase_data by triggers; history,
+# priority ranks and timestamps still point at cut_phase_data.
+STATUS_BITS = 3  # statuses: STATUS_CODE of phase i in bits [3i, 3i + 3)
+STATUS_MASK = 2 ** STATUS_BITS - 1
+
+
+def status_bits_sql(column: str, phase: str) -> str:
+    """SQL for one phase's STATUS_CODE inside a packed statuses column."""
+    return f"(({column} >> {STATUS_BITS * PHASE_CODE[phase]}) & {STATUS_MASK})"
+
+
+def _wide_set(row: str, clear: bool = False) -> str:
+    """SET clause writing the ``row``.phase slot of a cut_progress row (reset when ``clear``)."""
+    shift = f"({STATUS_BITS} * {row}.phase)"
+    status = "0" if clear else f"{row}.status"
+    sets = [f"statuses = (statuses & ~({STATUS_MASK} << {shift})) | ({status} << {shift})"]
+    for col, source in (("assignee", "assignee_id"), ("deadline", "deadline")):
+        value = "NULL" if clear else f"{row}.{source}"
+        sets += [f"{col}_{p} = CASE {row}.phase WHEN {i} THEN {value} ELSE {col}_{p} END"
+                 for i, p in enumerate(PHASES)]
+    return ",\n        ".join(sets)
+
+
+_WIDE_COLUMNS = ",\n    ".join(
+    [f"assignee_{p} INTEGER" for p in PHASES] + [f"deadline_{p} TEXT" for p in PHASES]
+)
+
+WIDE_LAYOUT_SQL = f"""
+CREATE TABLE cut_progress (
+    episode_id INTEGER NOT NULL,
+    cut_id INTEGER NOT NULL REFERENCES cut(id),
+    statuses INTEGER NOT NULL DEFAULT 0,
+    {_WIDE_COLUMNS},
+    PRIMARY KEY (episode_id, cut_id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX idx_cut_progress_cut ON cut_progress(cut_id);
+
+INSERT INTO cut_progress (episode_id, cut_id, statuses,
+    {", ".join(f"assignee_{p}" for p in PHASES)},
+    {", ".join(f"deadline_{p}" for p in PHASES)})
+SELECT c.episode_id, c.id, COALESCE(SUM(cp.status << ({STATUS_BITS} * cp.phase)), 0),
+    {", ".join(f"MAX(CASE cp.phase WHEN {i} THEN cp.assignee_id END)" for i in range(len(PHASES)))},
+    {", ".join(f"MAX(CASE cp.phase WHEN {i} THEN cp.deadline END)" for i in range(len(PHASES)))}
+FROM cut c
+LEFT JOIN cut_phase_data cp ON cp.cut_id = c.id
+GROUP BY c.id;
+
+CREATE TRIGGER trg_cut_progress_cut_insert AFTER INSERT ON cut
+BEGIN
+    INSERT INTO cut_progress (episode_id, cut_id) VALUES (NEW.episode_id, NEW.id);
+END;
+CREATE TRIGGER trg_cut_progress_cut_delete AFTER DELETE ON cut
+BEGIN
+    DELETE FROM cut_progress WHERE cut_id = OLD.id;
+END;
+CREATE TRIGGER trg_cut_progress_insert AFTER INSERT ON cut_phase_data
+BEGIN
+    UPDATE cut_progress SET
+        {_wide_set("NEW")}
+    WHERE cut_id = NEW.cut_id;
+END;
+CREATE TRIGGER trg_cut_progress_update
+AFTER UPDATE OF status, assignee_id, deadline ON cut_phase_data
+BEGIN
+    UPDATE cut_progress SET
+        {_wide_set("NEW")}
+    WHERE cut_id = NEW.cut_id;
+END;
+CREATE TRIGGER trg_cut_progress_delete AFTER DELETE ON cut_phase_data
+BEGIN
+    UPDATE cut_progress SET
+        {_wide_set("OLD", clear=True)}
+    WHERE cut_id = OLD.cut_id;
+END;
 """
 
+NORMALIZED_LAYOUT_SQL = """
+DROP TRIGGER IF EXISTS trg_cut_progress_cut_insert;
+DROP TRIGGER IF EXISTS trg_cut_progress_cut_delete;
+DROP TRIGGER IF EXISTS trg_cut_progress_insert;
+DROP TRIGGER IF EXISTS trg_cut_progress_update;
+DROP TRIGGER IF EXISTS trg_cut_progress_delete;
+DROP TABLE IF EXISTS cut_progress;
+"""
+
+
+def wide_layout(conn: sqlite3.Connection) -> bool:
+    """True when the cut_progress wide rows exist in this database."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cut_progress'"
+    ).fetchone() is not None
+
+
+def set_layout(conn: sqlite3.Connection, wide: bool) -> bool:
+    """Build or drop the wide layout in one transaction. False when already that way."""
+    if wide_layout(conn) == wide:
+        return False
+    sql = WIDE_LAYOUT_SQL if wide else NORMALIZED_LAYOUT_SQL
+    conn.executescript(f"BEGIN;\n{sql}\nCOMMIT;")
+    return True
+
 
 def ensure_dir():
     SEISHIN_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# Swapped/extended by profiling.install; hooks run on every new connection.
+CONNECTION_FACTORY: type[sqlite3.Connection] = sqlite3.Connection
+CONNECTION_HOOKS: list[Callable[[sqlite3.Connection], None]] = []
+# Set by open_shared_conn (seishin shell): get_conn returns this instead.
+_shared: sqlite3.Connection | None = None
+
+
 def get_conn() -> sqlite3.Connection:
+    if _shared is not None:
+        return _shared
+    return _connect(CONNECTION_FACTORY)
+
+
+def _connect(factory: type[sqlite3.Connection]) -> sqlite3.Connection:
     ensure_dir()
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = sqlite3.connect(str(DB_PATH), factory=factory)
+    for hook in CONNECTION_HOOKS:
+        hook(conn)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.create_function("cut_sort_key", 1, cut_sort_key, deterministic=True)
     return conn
 
 
-def init_db():
-    conn = get_conn()
+def init_db(conn: sqlite3.Connection | None = None):
+    """Create/migrate the schema. A passed-in ``conn`` is left open."""
+    if _shared is not None:
+        return  # done once by open_shared_conn
+    own = conn is None
+    conn = conn or get_conn()
     conn.executescript(SCHEMA_SQL)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < len(MIGRATIONS):
+        # table rebuilds (migration 5) drop and rename parents of foreign keys
+        conn.execute("PRAGMA foreign_keys = OFF")
+        for i, sql in enumerate(MIGRATIONS[version:], version + 1):
+            conn.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {i};\nCOMMIT;")
+        conn.execute("PRAGMA foreign_keys = ON")
     conn.commit()
-    conn.close()
+    if own:
+        conn.close()
+
+
+class _Shared:
+    defer_commit = False  # set by deferred_commits
+    rollbacks = 0  # deferred blocks rolled back (total_changes does not go down)
+
+    def close(self):
+        pass  # every caller shares it; see close_shared_conn
+
+    def commit(self):
+        if not self.defer_commit:
+            super().commit()
+
+    def commit_now(self):
+        super().commit()
+
+
+def open_shared_conn() -> sqlite3.Connection:
+    """Make get_conn hand out one long-lived connection (seishin shell).
 
+    close() on it is a no-op; write functions still commit as usual.
+    """
+    global _shared
+    conn = _connect(type("SharedConnection", (_Shared, CONNECTION_FACTORY), {}))
+    init_db(conn)
+    _shared = conn
+    return conn
+
+
+def close_shared_conn():
+    global _shared
+    if _shared is not None:
+        conn, _shared = _shared, None
+        sqlite3.Connection.close(conn)
 
-def get_active_project() -> dict | None:
-    if not CONFIG_PATH.exists():
+
+def shared_stamp() -> tuple[int, int, int] | None:
+    """Changes seen by the shared connection (own writes, other processes), or None."""
+    if _shared is None:
         return None
-    data = json.loads(CONFIG_PATH.read_text())
-    return data.get("active_project")
+    return (_shared.total_changes, _shared.rollbacks,
+            _shared.execute("PRAGMA data_version").fetchone()[0])
 
 
-def set_active_project(project_id: int, project_name: str):
-    ensure_dir()
-    config = {}
-    if CONFIG_PATH.exists():
-        config = json.loads(CONFIG_PATH.read_text())
-    config["active_project"] = {"id": project_id, "name": project_name}
-    CONFIG_PATH.write_text(json.dumps(config, ensure_ascii=False, indent=2))
-
-
-def require_active_project() -> dict:
-    proj = get_active_project()
-    if not proj:
-        import click
-        raise click.ClickException(
-            "アクティブプロジェクトが未設定。`seishin project switch <name>` で設定して"
-        )
-    return proj
+# Outside the shell, change_stamp() reads PRAGMA data_version on a connection
+# kept open only for that: it moves whenever any other connection commits,
+# including the short-lived ones get_conn hands out in this process.
+_watch: tuple[Path, sqlite3.Connection] | None = None
+
+
+def change_stamp() -> tuple:
+    """A value that differs whenever the database may have changed since the last call."""
+    global _watch
+    if _shared is not None:
+        return shared_stamp()
+    if _watch is None or _watch[0] != DB_PATH:
+        if _watch is not None:
+            _watch[1].close()
+        ensure_dir()
+        _watch = (DB_PATH, sqlite3.connect(str(DB_PATH)))
+    return (_watch[1].execute("PRAGMA data_version").fetchone()[0],)
+
+
+@contextmanager
+def deferred_commits() -> Iterator[sqlite3.Connection]:
+    """Turn the shared connection's commit() into a no-op for the block.
+
+    Everything the block writes is committed when it exits, or rolled
+    back if it raises; commit_now() commits early (chunked batches).
+    """
+    conn = _shared
+    conn.defer_commit = True
+    try:
+        yield conn
+    except BaseException:
+        conn.defer_commit = False
+        conn.rollback()
+        conn.rollbacks += 1
+        raise
+    conn.defer_commit = False
+    conn.commit()
@@ -1,6 +1,52 @@
 """データアクセス層 (raw SQL)"""
 
-from .db import get_conn, PHASES
+import functools
+import json
+from datetime import date
+from typing import Iterator
+
+from . import refcache
+from .cutspec import parse_cut_spec, cut_sort_key
+from .records import Cut, BoardCell, PriorityItem, Order, columns
+from .db import (
+    get_conn, code_sql, wide_layout, set_layout, status_bits_sql,
+    STATUS_BITS, STATUS_MASK, PHASES, STATUSES, PHASE_CODE, STATUS_CODE,
+)
+
+
+class WorkflowError(Exception):
+    """A phase was started or completed before the phases ahead of it."""
+
+
+# cp.phase -> the phase before it in PHASES (NULL for the first)
+_PREV_PHASE_SQL = "CASE cp.phase {} END".format(
+    " ".join(f"WHEN '{b}' THEN '{a}'" for a, b in zip(PHASES, PHASES[1:]))
+)
+
+
+def _lookup_cache(table: str, by_id: str | None = None):
+    """Memoise a lookup of reference ``table`` in refcache.
+
+    Entries are dropped whenever that table is written (by any connection
+    or process), so a cached row is never older than its last change.
+    A row found by a name lookup is also stored for the ``by_id`` lookup.
+    """
+    def decorate(fn):
+        alias = (lambda row: (by_id, (row["id"],))) if by_id else None
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            row = refcache.cache.lookup(table, (fn.__name__, args), lambda: fn(*args), alias)
+            return dict(row) if row else row
+        return wrapper
+    return decorate
+
+
+def _records(conn, record, sql: str, params=()) -> list:
+    """Rows of ``sql`` as ``record`` tuples, built straight off a tuple cursor."""
+    cur = conn.cursor()
+    cur.row_factory = None
+    return list(map(record._make, cur.execute(sql, params)))
 
 
 # ── Project ──────────────────────────────────────────
@@ -24,6 +70,7 @@ def project_list() -> list[dict]:
     return [dict(r) for r in rows]
 
 
+@_lookup_cache("project")
 def project_get_by_name(name: str) -> dict | None:
     conn = get_conn()
     row = conn.execute("SELECT * FROM project WHERE name = ?", (name,)).fetchone()
@@ -31,6 +78,15 @@ def project_get_by_name(name: str) -> dict | None:
     return dict(row) if row else None
 
 
+def project_set_workflow(project_id: int, enforce: bool):
+    conn = get_conn()
+    conn.execute(
+        "UPDATE project SET enforce_workflow = ? WHERE id = ?", (int(enforce), project_id)
+    )
+    conn.commit()
+    conn.close()
+
+
 # ── Episode ──────────────────────────────────────────
 
 def episode_add(project_id: int, number: int, title: str | None,
@@ -55,6 +111,7 @@ def episode_list(project_id: int) -> list[dict]:
     return [dict(r) for r in rows]
 
 
+@_lookup_cache("episode")
 def episode_get(project_id: int, number: int) -> dict | None:
     conn = get_conn()
     row = conn.execute(
@@ -95,36 +152,29 @@ def episode_show(project_id: int, number: int) -> dict | None:
     return ep
 
 
+def episode_set_budget(episode_id: int, budget: int):
+    conn = get_conn()
+    conn.execute("UPDATE episode SET budget = ? WHERE id = ?", (budget, episode_id))
+    conn.commit()
+    conn.close()
+
+
 # ── Cut ──────────────────────────────────────────────
 
 def parse_cut_range(spec: str) -> list[str]:
-    """Parse cut spec like 'C001-C010' or 'C001,C002,C003' into list."""
-    spec = spec.strip()
-    if "-" in spec and spec.count("-") == 1:
-        parts = spec.split("-")
-        prefix_start = ""
-        num_start = ""
-        for i, c in enumerate(parts[0]):
-            if c.isdigit():
-                prefix_start = parts[0][:i]
-                num_start = parts[0][i:]
-                break
-        prefix_end = ""
-        num_end = ""
-        for i, c in enumerate(parts[1]):
-            if c.isdigit():
-                prefix_end = parts[1][:i]
-                num_end = parts[1][i:]
-                break
-        prefix = prefix_start or prefix_end or "C"
-        start = int(num_start)
-        end = int(num_end)
-        width = len(num_start)
-        return [f"{prefix}{str(i).zfill(width)}" for i in range(start, end + 1)]
-    elif "," in spec:
-        return [s.strip() for s in spec.split(",")]
-    else:
-        return [spec]
+    """Parse cut spec like 'C001-C010', 'C001,C002' or 'C001-C050,C060,C042A'
+    into a list sorted by cut_sort_key and de-duplicated (not in spec order).
+
+    Items outside the <prefix><digits>[suffix] grammar (OP, S#12) are kept
+    as-is after the ranges; an item with "-" must be a range of the same
+    prefix. Raises ValueError on a bad spec.
+    """
+    return list(parse_cut_spec(spec, verbatim=True))
+
+
+def _sort_key(number: str) -> int:
+    key = cut_sort_key(number)
+    return -1 if key is None else key
 
 
 def cut_add(episode_id: int, numbers: list[str]) -> int:
@@ -134,15 +184,14 @@ def cut_add(episode_id: int, numbers: list[str]) -> int:
     for num in numbers:
         try:
             cur = conn.execute(
-                "INSERT INTO cut (episode_id, number) VALUES (?, ?)",
-                (episode_id, num),
+                "INSERT INTO cut (episode_id, number, sort_key) VALUES (?, ?, ?)",
+                (episode_id, num, _sort_key(num)),
             )
             cut_id = cur.lastrowid
-            for phase in PHASES:
-                conn.execute(
-                    "INSERT INTO cut_phase (cut_id, phase) VALUES (?, ?)",
-                    (cut_id, phase),
-                )
+            conn.executemany(
+                "INSERT INTO cut_phase_data (cut_id, phase) VALUES (?, ?)",
+                [(cut_id, code) for code in PHASE_CODE.values()],
+            )
             count += 1
         except Exception:
             pass  # Skip duplicates
@@ -151,23 +200,93 @@ def cut_add(episode_id: int, numbers: list[str]) -> int:
     return count
 
 
-def cut_list(episode_id: int) -> list[dict]:
+def _prereq_mask(phase: str) -> int:
+    """phase_mask bits of every phase before ``phase``."""
+    return (1 << PHASE_CODE[phase]) - 1
+
+
+def _mask_phases(mask: int) -> list[str]:
+    return [p for i, p in enumerate(PHASES) if mask >> i & 1]
+
+
+def cut_list(episode_id: int, after: str | None = None,
+             limit: int | None = None, ready_for: str | None = None) -> list[Cut]:
+    """Cuts in natural order. ``after``/``limit`` page through the
+    (episode_id, sort_key, number) index without an OFFSET scan.
+
+    Cut.current_phase (first phase not completed) and .completed_phases
+    are read off cut.phase_mask. ``ready_for`` keeps cuts whose earlier phases
+    are all completed and that phase itself is not.
+    """
+    page = ""
+    params: list = [episode_id]
+    if after is not None:
+        page = "AND (c.sort_key, c.number) > (?, ?)"
+        params.extend([_sort_key(after), after])
+    if ready_for is not None:
+        page += " AND c.phase_mask & ? = ?"
+        params.extend([_prereq_mask(ready_for) << 1 | 1, _prereq_mask(ready_for)])
+    if limit is not None:
+        params.append(limit)
+    conn = get_conn()
+    cuts = _records(
+        conn, Cut,
+        f"""SELECT {columns(Cut, "c")} FROM cut c WHERE c.episode_id = ? {page}
+        ORDER BY c.sort_key, c.number
+        {"LIMIT ?" if limit is not None else ""}""",
+        params,
+    )
+    conn.close()
+    return cuts
+
+
+def cut_set_priority(episode_id: int, spec: str, flag: bool,
+                     reason: str | None = None) -> int:
+    """Flag/unflag every cut in ``spec`` with one ranged UPDATE. Returns rows changed."""
+    clause, params = parse_cut_spec(spec, verbatim=True).sql("sort_key")
+    conn = get_conn()
+    cur = conn.execute(
+        f"""UPDATE cut SET is_priority = ?, priority_reason = ?
+        WHERE episode_id = ? AND {clause}""",
+        [int(flag), reason if flag else None, episode_id, *params],
+    )
+    conn.commit()
+    conn.close()
+    return cur.rowcount
+
+
+def cut_set_difficulty(episode_id: int, items: list[tuple[str, int]]) -> int:
+    """Set difficulty for (spec, level) pairs in one transaction; later pairs
+    win where specs overlap. Returns rows changed."""
+    specs = [(parse_cut_spec(spec, verbatim=True).sql("sort_key"), level)
+             for spec, level in items]
+    conn = get_conn()
+    count = 0
+    for (clause, params), level in specs:
+        count += conn.execute(
+            f"UPDATE cut SET difficulty = ? WHERE episode_id = ? AND {clause}",
+            [level, episode_id, *params],
+        ).rowcount
+    conn.commit()
+    conn.close()
+    return count
+
+
+def cut_numbers(project_id: int) -> dict[int, list[str]]:
+    """Episode number -> its cut numbers in natural order (shell completion)."""
     conn = get_conn()
     rows = conn.execute(
-        """SELECT c.*,
-            (SELECT cp.phase FROM cut_phase cp
-             WHERE cp.cut_id = c.id AND cp.status IN ('in_progress', 'pending')
-             ORDER BY CASE cp.phase
-                WHEN 'lo_raw' THEN 1 WHEN 'lo_enshutsu' THEN 2 WHEN 'lo_sakkan' THEN 3
-                WHEN 'genga_raw' THEN 4 WHEN 'genga_enshutsu' THEN 5 WHEN 'genga_sakkan' THEN 6
-                WHEN 'douga' THEN 7 WHEN 'shiage' THEN 8 WHEN 'satsuei' THEN 9 WHEN 'v_edit' THEN 10
-             END LIMIT 1) as current_phase,
-            (SELECT COUNT(*) FROM cut_phase cp WHERE cp.cut_id = c.id AND cp.status = 'completed') as completed_phases
-        FROM cut c WHERE c.episode_id = ? ORDER BY c.number""",
-        (episode_id,),
+        """SELECT e.number AS ep, c.number FROM cut c
+        JOIN episode e ON e.id = c.episode_id
+        WHERE e.project_id = ?
+        ORDER BY e.number, c.sort_key, c.number""",
+        (project_id,),
     ).fetchall()
     conn.close()
-    return [dict(r) for r in rows]
+    index: dict[int, list[str]] = {}
+    for r in rows:
+        index.setdefault(r["ep"], []).append(r["number"])
+    return index
 
 
 def cut_get(episode_id: int, number: str) -> dict | None:
@@ -199,21 +318,39 @@ def cut_get(episode_id: int, number: str) -> dict | None:
 
 def cut_update_phase(episode_id: int, cut_number: str, phase: str,
                      status: str | None = None, assignee_id: int | None = None,
-                     deadline: str | None = None) -> bool:
+                     deadline: str | None = None, sheets: int | None = None,
+                     force: bool = False) -> bool:
+    """Update one cut-phase; a transition to completed is logged to work_log.
+
+    In projects with enforce_workflow, starting or completing a phase
+    before every earlier phase is completed raises WorkflowError unless
+    ``force`` is set.
+    """
     conn = get_conn()
-    cut_row = conn.execute(
-        "SELECT id FROM cut WHERE episode_id = ? AND number = ?",
-        (episode_id, cut_number),
+    cp_row = conn.execute(
+        """SELECT cp.id, cp.status, cp.assignee_id, cp.started_at,
+            c.phase_mask, p.enforce_workflow
+        FROM cut_phase cp
+        JOIN cut c ON c.id = cp.cut_id
+        JOIN episode e ON e.id = c.episode_id
+        JOIN project p ON p.id = e.project_id
+        WHERE c.episode_id = ? AND c.number = ? AND cp.phase = ?""",
+        (episode_id, cut_number, phase),
     ).fetchone()
-    if not cut_row:
+    if not cp_row:
         conn.close()
         return False
+    if status in ("in_progress", "completed") and cp_row["enforce_workflow"] and not force:
+        missing = _prereq_mask(phase) & ~cp_row["phase_mask"]
+        if missing:
+            conn.close()
+            raise WorkflowError(f"前工程が未完了: {', '.join(_mask_phases(missing))}")
 
     sets = []
     params = []
     if status:
         sets.append("status = ?")
-        params.append(status)
+        params.append(STATUS_CODE[status])
         if status == "in_progress":
             sets.append("started_at = datetime('now')")
         elif status == "completed":
@@ -229,31 +366,158 @@ def cut_update_phase(episode_id: int, cut_number: str, phase: str,
         conn.close()
         return False
 
-    params.extend([cut_row["id"], phase])
+    params.append(cp_row["id"])
     conn.execute(
-        f"UPDATE cut_phase SET {', '.join(sets)} WHERE cut_id = ? AND phase = ?",
+        f"UPDATE cut_phase_data SET {', '.join(sets)} WHERE id = ?",
         params,
     )
+
+    creator_id = assignee_id if assignee_id is not None else cp_row["assignee_id"]
+    if status or assignee_id is not None:
+        _log_phase_events(conn, [(cp_row["id"], status or cp_row["status"], creator_id)])
+    if status == "completed" and cp_row["status"] != "completed" and creator_id:
+        conn.execute(
+            """INSERT INTO work_log (creator_id, episode_id, phase, cuts_completed,
+               sheets_completed, started_at, completed_at)
+               VALUES (?, ?, ?, 1, ?, ?, datetime('now'))""",
+            (creator_id, episode_id, phase, sheets or 0, cp_row["started_at"]),
+        )
     conn.commit()
     conn.close()
     return True
 
 
-def cut_board(episode_id: int) -> dict:
-    """Get cut board data: phase -> list of cuts with their status."""
+def _log_phase_events(conn, events: list[tuple]):
+    """Append (cut_phase_id, status, assignee_id) rows to cut_phase_event.
+
+    Must run on the writer's connection before its commit so the history
+    lands in the same transaction as the cut_phase change.
+    """
+    conn.executemany(
+        """INSERT INTO cut_phase_event (cut_phase_id, status, assignee_id, at)
+        VALUES (?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))""",
+        [(cp_id, STATUS_CODE[st], aid) for cp_id, st, aid in events],
+    )
+
+
+def cut_history(episode_id: int, number: str) -> list[dict]:
+    """All recorded status/assignee changes of a cut, oldest first."""
     conn = get_conn()
+    rows = conn.execute(
+        """SELECT cp.phase, e.status, cr.name as assignee_name,
+            datetime(e.at, 'unixepoch') as at
+        FROM cut c
+        JOIN cut_phase cp ON cp.cut_id = c.id
+        JOIN cut_phase_event e ON e.cut_phase_id = cp.id
+        LEFT JOIN creator cr ON cr.id = e.assignee_id
+        WHERE c.episode_id = ? AND c.number = ?
+        ORDER BY e.at, e.id""",
+        (episode_id, number),
+    ).fetchall()
+    conn.close()
+    result = []
+    for r in rows:
+        d = dict(r)
+        d["status"] = STATUSES[d["status"]]
+        result.append(d)
+    return result
+
+
+def _cut_board_as_of(conn, episode_id: int, as_of: int) -> dict:
+    """Board reconstructed from cut_phase_event at epoch second ``as_of``.
+
+    Each cut-phase takes its latest event before ``as_of`` through an index
+    seek on (cut_phase_id, at); phases with no event yet are pending.
+    """
+    share = {}.setdefault
+    cur = conn.cursor()
+    cur.row_factory = None
     result = {}
     for phase in PHASES:
-        rows = conn.execute(
-            """SELECT c.number, cp.status, cr.name as assignee_name
-            FROM cut_phase cp
+        rows = cur.execute(
+            """SELECT number, status, cr.name as assignee_name
+            FROM (
+                SELECT c.number, c.sort_key,
+                    (SELECT e.status FROM cut_phase_event e
+                     WHERE e.cut_phase_id = cp.id AND e.at < :as_of
+                     ORDER BY e.at DESC, e.id DESC LIMIT 1) as status,
+                    (SELECT e.assignee_id FROM cut_phase_event e
+                     WHERE e.cut_phase_id = cp.id AND e.at < :as_of
+                     ORDER BY e.at DESC, e.id DESC LIMIT 1) as assignee_id
+                FROM cut_phase cp
+                JOIN cut c ON c.id = cp.cut_id
+                WHERE c.episode_id = :ep AND cp.phase = :phase
+                AND CAST(strftime('%s', c.created_at) AS INTEGER) < :as_of
+            ) b
+            LEFT JOIN creator cr ON cr.id = b.assignee_id
+            ORDER BY b.sort_key, b.number""",
+            {"ep": episode_id, "phase": phase, "as_of": as_of},
+        )
+        result[phase] = [
+            BoardCell(share(number, number), STATUSES[status or 0], share(assignee_name, assignee_name))
+            for number, status, assignee_name in rows
+        ]
+    return result
+
+
+def _cut_board_wide(conn, episode_id: int) -> dict:
+    """cut_board from one cut_progress row per cut (wide layout)."""
+    names = creator_names()
+    cur = conn.cursor()
+    cur.row_factory = None
+    rows = cur.execute(
+        f"""SELECT c.number, w.statuses, {", ".join(f"w.assignee_{p}" for p in PHASES)}
+        FROM cut_progress w
+        JOIN cut c ON c.id = w.cut_id
+        WHERE w.episode_id = ?
+        ORDER BY c.sort_key, c.number""",
+        (episode_id,),
+    )
+    result = {phase: [] for phase in PHASES}
+    for number, statuses, *assignees in rows:
+        for i, phase in enumerate(PHASES):
+            result[phase].append(BoardCell(
+                number,
+                STATUSES[(statuses >> STATUS_BITS * i) & STATUS_MASK],
+                names.get(assignees[i]),
+            ))
+    return result
+
+
+def cut_board(episode_id: int, as_of: int | None = None) -> dict[str, list[BoardCell]]:
+    """Get cut board data: phase -> list of cuts with their status.
+
+    With ``as_of`` (epoch seconds) the board is rebuilt from cut_phase_event.
+    """
+    conn = get_conn()
+    if as_of is not None:
+        result = _cut_board_as_of(conn, episode_id, as_of)
+        conn.close()
+        return result
+    if wide_layout(conn):
+        result = _cut_board_wide(conn, episode_id)
+        conn.close()
+        return result
+    # Status and assignee strings are shared, and each cut's number is one
+    # str across its ten cells, rather than a fresh copy per row.
+    names = creator_names()
+    share = {}.setdefault
+    cur = conn.cursor()
+    cur.row_factory = None
+    result = {}
+    for phase in PHASES:
+        rows = cur.execute(
+            """SELECT c.number, cp.status, cp.assignee_id
+            FROM cut_phase_data cp
             JOIN cut c ON c.id = cp.cut_id
-            LEFT JOIN creator cr ON cr.id = cp.assignee_id
             WHERE c.episode_id = ? AND cp.phase = ?
-            ORDER BY c.number""",
-            (episode_id, phase),
-        ).fetchall()
-        result[phase] = [dict(r) for r in rows]
+            ORDER BY c.sort_key, c.number""",
+            (episode_id, PHASE_CODE[phase]),
+        )
+        result[phase] = [
+            BoardCell(share(number, number), STATUSES[status], names.get(assignee))
+            for number, status, assignee in rows
+        ]
     conn.close()
     return result
 
@@ -286,6 +550,7 @@ def creator_list(skill_filter: str | None = None) -> list[dict]:
     return [dict(r) for r in rows]
 
 
+@_lookup_cache("creator")
 def creator_get(creator_id: int) -> dict | None:
     conn = get_conn()
     row = conn.execute("SELECT * FROM creator WHERE id = ?", (creator_id,)).fetchone()
@@ -293,6 +558,7 @@ def creator_get(creator_id: int) -> dict | None:
     return dict(row) if row else None
 
 
+@_lookup_cache("creator", by_id="creator_get")
 def creator_get_by_name(name: str) -> dict | None:
     conn = get_conn()
     row = conn.execute(
@@ -302,6 +568,15 @@ def creator_get_by_name(name: str) -> dict | None:
     return dict(row) if row else None
 
 
+@_lookup_cache("creator")
+def creator_names() -> dict[int, str]:
+    """Creator id -> name, for boards and lists that show assignees."""
+    conn = get_conn()
+    names = dict(conn.execute("SELECT id, name FROM creator").fetchall())
+    conn.close()
+    return names
+
+
 def creator_update(creator_id: int, **kwargs) -> bool:
     conn = get_conn()
     sets = []
@@ -320,6 +595,84 @@ def creator_update(creator_id: int, **kwargs) -> bool:
     return True
 
 
+def creator_throughput(days: int = 7, phase: str | None = None) -> list[dict]:
+    """Rolling cuts/sheets per day for each creator and phase, from work_log.
+
+    ``recent_*`` covers the last ``days`` days up to today; ``peak_*`` is the
+    best ``days``-day window in the whole log.
+    """
+    phase_filter = ""
+    params: list = []
+    if phase:
+        phase_filter = "AND phase = ?"
+        params.append(phase)
+    params += [f"-{days} days"] * 2  # the recent_* bounds come after the filter
+    conn = get_conn()
+    rows = conn.execute(
+        f"""WITH daily AS (
+            SELECT creator_id, phase, date(completed_at) AS day,
+                SUM(cuts_completed) AS cuts, SUM(sheets_completed) AS sheets
+            FROM work_log
+            WHERE creator_id IS NOT NULL AND completed_at IS NOT NULL
+            {phase_filter}
+            GROUP BY creator_id, phase, day
+        ), rolling AS (
+            SELECT creator_id, phase, day, cuts, sheets,
+                SUM(cuts) OVER w AS window_cuts,
+                SUM(sheets) OVER w AS window_sheets
+            FROM daily
+            WINDOW w AS (
+                PARTITION BY creator_id, phase ORDER BY julianday(day)
+                RANGE BETWEEN {int(days) - 1} PRECEDING AND CURRENT ROW
+            )
+        )
+        SELECT r.creator_id, cr.name, r.phase,
+            SUM(r.cuts) AS total_cuts,
+            SUM(r.sheets) AS total_sheets,
+            SUM(CASE WHEN r.day > date('now', ?) THEN r.cuts ELSE 0 END) AS recent_cuts,
+            SUM(CASE WHEN r.day > date('now', ?) THEN r.sheets ELSE 0 END) AS recent_sheets,
+            MAX(r.window_cuts) AS peak_cuts,
+            MAX(r.window_sheets) AS peak_sheets,
+            MAX(r.day) AS last_day
+        FROM rolling r
+        JOIN creator cr ON cr.id = r.creator_id
+        GROUP BY r.creator_id, r.phase
+        ORDER BY cr.name, r.phase""",
+        params,
+    ).fetchall()
+    conn.close()
+    result = []
+    for r in rows:
+        d = dict(r)
+        for k in ("cuts", "sheets"):
+            d[f"{k}_per_day"] = d[f"recent_{k}"] / days
+            d[f"peak_{k}_per_day"] = d[f"peak_{k}"] / days
+        result.append(d)
+    return result
+
+
+def creator_apply_throughput(days: int = 7, phase: str | None = None,
+                             overwrite: bool = False) -> int:
+    """Write measured cuts/day into creator.daily_capacity. Returns count updated.
+
+    A creator's rate is their best phase (or ``phase`` only): cuts/day in
+    different phases are not additive. Capacities already set by hand
+    (non-zero) are kept unless ``overwrite``.
+    """
+    per_creator: dict[int, float] = {}
+    for r in creator_throughput(days, phase):
+        per_creator[r["creator_id"]] = max(per_creator.get(r["creator_id"], 0), r["cuts_per_day"])
+    updates = [(max(1, round(v)), cid) for cid, v in per_creator.items() if v > 0]
+    if not updates:
+        return 0
+    keep = "" if overwrite else "AND COALESCE(daily_capacity, 0) = 0"
+    conn = get_conn()
+    cur = conn.executemany(f"UPDATE creator SET daily_capacity = ? WHERE id = ? {keep}", updates)
+    conn.commit()
+    conn.close()
+    return cur.rowcount
+
+
 # ── Company ──────────────────────────────────────────
 
 def company_add(name: str, capabilities: str | None, capacity: int,
@@ -342,6 +695,7 @@ def company_list() -> list[dict]:
     return [dict(r) for r in rows]
 
 
+@_lookup_cache("company")
 def company_get(company_id: int) -> dict | None:
     conn = get_conn()
     row = conn.execute("SELECT * FROM company WHERE id = ?", (company_id,)).fetchone()
@@ -349,6 +703,7 @@ def company_get(company_id: int) -> dict | None:
     return dict(row) if row else None
 
 
+@_lookup_cache("company", by_id="company_get")
 def company_get_by_name(name: str) -> dict | None:
     conn = get_conn()
     row = conn.execute(
@@ -358,37 +713,200 @@ def company_get_by_name(name: str) -> dict | None:
     return dict(row) if row else None
 
 
+def company_load(company_id: int, extra: tuple[str, str | None, int] | None = None,
+                 today: date | None = None) -> dict:
+    """Open ordered cuts of a company by deadline, against capacity_per_day.
+
+    A cut counts while its order and its cut-phase are both not completed
+    (order_cut joined to cut_phase_data, all index seeks from the
+    order(assignee_type, assignee_id) index). ``extra`` = (phase,
+    deadline, cuts) adds a prospective order. ``schedule`` is one entry
+    per deadline: the cuts due by then must fit in capacity_per_day ×
+    days from today through that day (overdue cuts are due today).
+    """
+    today = today or date.today()
+    conn = get_conn()
+    company = conn.execute("SELECT * FROM company WHERE id = ?", (company_id,)).fetchone()
+    rows = conn.execute(
+        f"""SELECT o.phase, MAX(date(o.deadline), :today) as due, COUNT(*) as cuts
+        FROM "order" o
+        JOIN order_cut oc ON oc.order_id = o.id
+        JOIN phase ph ON ph.name = oc.phase
+        JOIN cut_phase_data cp ON cp.cut_id = oc.cut_id AND cp.phase = ph.code
+        WHERE o.assignee_type = 'company' AND o.assignee_id = :company
+            AND o.status != 'completed' AND cp.status != {STATUS_CODE['completed']}
+        GROUP BY o.phase, due""",
+        {"today": today.isoformat(), "company": company_id},
+    ).fetchall()
+    conn.close()
+    groups = [(r["phase"], r["due"], r["cuts"]) for r in rows]
+    if extra is not None:
+        phase, deadline, cuts = extra
+        due = max(deadline, today.isoformat()) if deadline and _is_date(deadline) else None
+        groups.append((phase, due, cuts))
+
+    phases: dict[str, int] = {}
+    by_due: dict[str, int] = {}
+    undated = 0
+    for phase, due, cuts in groups:
+        phases[phase] = phases.get(phase, 0) + cuts
+        if due is None:
+            undated += cuts
+        else:
+            by_due[due] = by_due.get(due, 0) + cuts
+
+    capacity = company["capacity_per_day"] or 0
+    schedule, due_total = [], 0
+    for due in sorted(by_due):
+        due_total += by_due[due]
+        days = (date.fromisoformat(due) - today).days + 1
+        entry = {"due": due, "cuts": by_due[due], "due_total": due_total,
+                 "days": days, "capacity": capacity * days if capacity else None}
+        entry["over"] = max(due_total - entry["capacity"], 0) if capacity else 0
+        schedule.append(entry)
+    return {
+        "company": dict(company),
+        "phases": dict(sorted(phases.items(), key=lambda kv: PHASE_CODE.get(kv[0], len(PHASES)))),
+        "undated": undated,
+        "schedule": schedule,
+    }
+
+
+def _is_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
 # ── Order ────────────────────────────────────────────
 
 def order_new(episode_id: int, phase: str, assignee_type: str,
               assignee_id: int, cut_numbers: str, price_per_cut: int,
-              deadline: str | None) -> int:
+              deadline: str | None, check=None) -> int:
+    """Create an order and its order_cut rows.
+
+    ``check`` is called with the order_check_cuts result for the cuts
+    inside the same write transaction, before the insert; raising from it
+    aborts the order. Two concurrent orders therefore cannot both pass
+    the check for the same cuts.
+    """
     cuts = parse_cut_range(cut_numbers)
     total = price_per_cut * len(cuts)
     conn = get_conn()
-    cur = conn.execute(
-        """INSERT INTO "order" (episode_id, phase, assignee_type, assignee_id,
-           cut_numbers, price_per_cut, total_price, deadline)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-        (episode_id, phase, assignee_type, assignee_id,
-         ",".join(cuts), price_per_cut, total, deadline),
-    )
+    own = not conn.in_transaction  # `seishin run` batches share an open one
+    if own:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        if check is not None:
+            check(_check_cuts(conn, episode_id, phase, cuts))
+        cur = conn.execute(
+            """INSERT INTO "order" (episode_id, phase, assignee_type, assignee_id,
+               cut_numbers, price_per_cut, total_price, deadline)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (episode_id, phase, assignee_type, assignee_id,
+             ",".join(cuts), price_per_cut, total, deadline),
+        )
+        oid = cur.lastrowid
+        conn.execute(
+            """INSERT OR IGNORE INTO order_cut (order_id, cut_id, phase)
+            SELECT ?, c.id, ? FROM json_each(?) j
+            JOIN cut c ON c.episode_id = ? AND c.number = j.value""",
+            (oid, phase, json.dumps(cuts), episode_id),
+        )
+    except BaseException:
+        if own:
+            conn.rollback()
+        conn.close()
+        raise
     conn.commit()
-    oid = cur.lastrowid
     conn.close()
     return oid
 
 
-def order_list(episode_id: int | None = None) -> list[dict]:
+def _check_cuts(conn, episode_id: int, phase: str, numbers: list[str]) -> dict:
+    rows = conn.execute(
+        """SELECT j.value as number, c.id as cut_id,
+            group_concat(oc.order_id) as order_ids
+        FROM json_each(?) j
+        LEFT JOIN cut c ON c.episode_id = ? AND c.number = j.value
+        LEFT JOIN order_cut oc ON oc.cut_id = c.id AND oc.phase = ?
+        GROUP BY j.key
+        HAVING c.id IS NULL OR order_ids IS NOT NULL
+        ORDER BY j.key""",
+        (json.dumps(numbers), episode_id, phase),
+    ).fetchall()
+    return {
+        "missing": [r["number"] for r in rows if r["cut_id"] is None],
+        "overlaps": [
+            (r["number"], sorted(int(i) for i in r["order_ids"].split(",")))
+            for r in rows if r["cut_id"] is not None
+        ],
+    }
+
+
+def order_check_cuts(episode_id: int, phase: str, numbers: list[str]) -> dict:
+    """Check cuts for a new order in one query.
+
+    Returns ``missing`` (numbers not in the episode) and ``overlaps``
+    ((number, [order_id, ...]) for each cut already ordered for the same phase).
+    """
+    conn = get_conn()
+    result = _check_cuts(conn, episode_id, phase, numbers)
+    conn.close()
+    return result
+
+
+def order_reconcile(episode_id: int, phase: str | None = None) -> list[dict]:
+    """Gaps (no order) and overlaps (several orders) per ordered phase.
+
+    Only phases with at least one order in the episode are checked, since
+    the others are done in-house.
+    """
+    phase_filter = ""
+    params: list = [episode_id]
+    if phase:
+        phase_filter = "AND phase = ?"
+        params.append(phase)
+    params.append(episode_id)
+    conn = get_conn()
+    rows = conn.execute(
+        f"""SELECT p.phase, c.number, COUNT(oc.order_id) as orders,
+            GROUP_CONCAT(oc.order_id) as order_ids
+        FROM (SELECT DISTINCT phase FROM "order" WHERE episode_id = ? {phase_filter}) p
+        CROSS JOIN cut c
+        LEFT JOIN order_cut oc ON oc.cut_id = c.id AND oc.phase = p.phase
+        WHERE c.episode_id = ?
+        GROUP BY p.phase, c.id
+        HAVING COUNT(oc.order_id) != 1
+        ORDER BY p.phase, c.sort_key, c.number""",
+        params,
+    ).fetchall()
+    conn.close()
+    result: dict[str, dict] = {}
+    for r in rows:
+        entry = result.setdefault(r["phase"], {"phase": r["phase"], "gaps": [], "overlaps": []})
+        if r["orders"] == 0:
+            entry["gaps"].append(r["number"])
+        else:
+            ids = sorted(int(i) for i in r["order_ids"].split(","))
+            entry["overlaps"].append((r["number"], ids))
+    order = {p: i for i, p in enumerate(PHASES)}
+    return sorted(result.values(), key=lambda e: order.get(e["phase"], len(PHASES)))
+
+
+def order_list(episode_id: int | None = None) -> list[Order]:
     conn = get_conn()
     if episode_id:
-        rows = conn.execute(
-            'SELECT * FROM "order" WHERE episode_id = ? ORDER BY id', (episode_id,)
-        ).fetchall()
+        rows = _records(
+            conn, Order,
+            f'SELECT {columns(Order)} FROM "order" WHERE episode_id = ? ORDER BY id', (episode_id,)
+        )
     else:
-        rows = conn.execute('SELECT * FROM "order" ORDER BY id').fetchall()
+        rows = _records(conn, Order, f'SELECT {columns(Order)} FROM "order" ORDER BY id')
     conn.close()
-    return [dict(r) for r in rows]
+    return rows
 
 
 def order_get(order_id: int) -> dict | None:
@@ -410,49 +928,238 @@ def order_issue(order_id: int) -> bool:
     return True
 
 
+# ── Budget ───────────────────────────────────────────
+
+_BUDGET_GROUPS = {
+    "episode": ("e.id", "'第' || e.number || '話'", "MAX(e.budget)"),
+    "phase": ("o.phase", "o.phase", "NULL"),
+    "assignee": (
+        "o.assignee_type, o.assignee_id",
+        "COALESCE(cr.name, co.name, '#' || o.assignee_id)",
+        "NULL",
+    ),
+}
+
+
+def budget_rollup(project_id: int, group_by: str = "episode",
+                  episode_id: int | None = None) -> list[dict]:
+    """Order spend vs episode budget, grouped by episode, phase or assignee.
+
+    ``committed`` is issued/accepted/completed orders, ``planned`` is drafts.
+    Each row also carries ``project_budget``, the budget total for the scope.
+    """
+    group_cols, label, budget = _BUDGET_GROUPS[group_by]
+    ep_filter = "AND e.id = :ep" if episode_id is not None else ""
+    params = {"proj": project_id, "ep": episode_id}
+    # Episodes without orders still show their budget; other groupings
+    # only make sense over actual orders.
+    having = "" if group_by == "episode" else "HAVING COUNT(o.id) > 0"
+    conn = get_conn()
+    rows = conn.execute(
+        f"""SELECT {label} as label, {budget} as budget,
+            COUNT(o.id) as orders,
+            COALESCE(SUM(CASE WHEN o.status != 'draft' THEN o.total_price END), 0) as committed,
+            COALESCE(SUM(CASE WHEN o.status = 'draft' THEN o.total_price END), 0) as planned,
+            (SELECT SUM(e.budget) FROM episode e
+             WHERE e.project_id = :proj {ep_filter}) as project_budget
+        FROM episode e
+        LEFT JOIN "order" o ON o.episode_id = e.id
+        LEFT JOIN creator cr ON o.assignee_type = 'creator' AND cr.id = o.assignee_id
+        LEFT JOIN company co ON o.assignee_type = 'company' AND co.id = o.assignee_id
+        WHERE e.project_id = :proj {ep_filter}
+        GROUP BY {group_cols}
+        {having}
+        ORDER BY {"MIN(e.number)" if group_by == "episode" else "committed + planned DESC"}""",
+        params,
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
 # ── Priority ─────────────────────────────────────────
 
-def priority_list(episode_id: int, section: str | None = None) -> list[dict]:
-    """Generate priority-sorted cut list for a section (e.g., sakkan)."""
+# Section names -> phases
+SECTION_PHASES = {
+    "sakkan": ("lo_sakkan", "genga_sakkan"),
+    "enshutsu": ("lo_enshutsu", "genga_enshutsu"),
+    "douga": ("douga",),
+    "shiage": ("shiage",),
+    "satsuei": ("satsuei",),
+}
+
+# Score = sum of weight * feature, each feature scaled to 0..1:
+#   flagged      cut.is_priority
+#   status       delayed 1, retake 2/3, in_progress 1/3, pending 0
+#   slack        days to deadline, overdue 30+ = 1, due today = 0.5, 30+ ahead = 0
+#   difficulty   (difficulty - 1) / 4
+#   downstream   share of PHASES that come after this one
+#   reliability  1 when the assignee doesn't keep deadlines (pulls_deadline = 0)
+PRIORITY_WEIGHTS = {
+    "flagged": 100.0,
+    "status": 30.0,
+    "slack": 20.0,
+    "difficulty": 10.0,
+    "downstream": 5.0,
+    "reliability": 5.0,
+}
+
+_OPEN_STATUSES = "('pending', 'in_progress', 'retake', 'delayed')"
+
+_SCORE_SQL = f"""
+    INSERT INTO priority_rank (cut_phase_id, episode_id, phase, sort_key, score)
+    SELECT cp.id, c.episode_id, cp.phase, c.sort_key,
+        :flagged * c.is_priority
+        + :status * (CASE cp.status WHEN 'delayed' THEN 3 WHEN 'retake' THEN 2
+                     WHEN 'in_progress' THEN 1 ELSE 0 END) / 3.0
+        + :slack * COALESCE(
+            (30 - MIN(MAX(julianday(cp.deadline) - julianday(:today), -30), 30)) / 60.0, 0)
+        + :difficulty * (COALESCE(c.difficulty, 3) - 1) / 4.0
+        + :downstream * ({len(PHASES) - 1} - {code_sql("cp.phase", PHASE_CODE)})
+            / {len(PHASES) - 1}.0
+        + :reliability * (cr.id IS NOT NULL AND NOT cr.pulls_deadline)
+    FROM cut c
+    JOIN cut_phase cp ON cp.cut_id = c.id
+    LEFT JOIN creator cr ON cr.id = cp.assignee_id
+    WHERE c.episode_id = :episode_id AND cp.status IN {_OPEN_STATUSES}
+"""
+
+
+def priority_weights(project_id: int) -> dict[str, float]:
+    """PRIORITY_WEIGHTS with the project's overrides applied."""
     conn = get_conn()
+    rows = conn.execute(
+        "SELECT name, weight FROM priority_weight WHERE project_id = ?", (project_id,)
+    ).fetchall()
+    conn.close()
+    return {**PRIORITY_WEIGHTS, **{r["name"]: r["weight"] for r in rows}}
+
+
+def priority_set_weights(project_id: int, weights: dict[str, float | None]):
+    """Override weights for a project; None restores the default."""
+    conn = get_conn()
+    for name, weight in weights.items():
+        if weight is None:
+            conn.execute(
+                "DELETE FROM priority_weight WHERE project_id = ? AND name = ?",
+                (project_id, name),
+            )
+        else:
+            conn.execute(
+                """INSERT INTO priority_weight (project_id, name, weight) VALUES (?, ?, ?)
+                ON CONFLICT (project_id, name) DO UPDATE SET weight = excluded.weight""",
+                (project_id, name, weight),
+            )
+    conn.commit()
+    conn.close()
+
+
+def _refresh_priority_rank(conn, episode_id: int):
+    """Rescore the episode unless its ranks are from today and nothing changed since."""
+    today = conn.execute("SELECT date('now', 'localtime')").fetchone()[0]
+    state = conn.execute(
+        "SELECT computed_on FROM priority_state WHERE episode_id = ?", (episode_id,)
+    ).fetchone()
+    if state and state["computed_on"] == today:
+        return
+    weights = dict(PRIORITY_WEIGHTS)
+    weights.update(conn.execute(
+        """SELECT name, weight FROM priority_weight
+        WHERE project_id = (SELECT project_id FROM episode WHERE id = ?)""",
+        (episode_id,),
+    ).fetchall())
+    conn.execute("DELETE FROM priority_rank WHERE episode_id = ?", (episode_id,))
+    conn.execute(_SCORE_SQL, {**weights, "today": today, "episode_id": episode_id})
+    conn.execute(
+        "INSERT OR REPLACE INTO priority_state (episode_id, computed_on) VALUES (?, ?)",
+        (episode_id, today),
+    )
+    conn.commit()
+
+
+def priority_list(episode_id: int, section: str | None = None,
+                  top: int | None = None) -> list[PriorityItem]:
+    """Open cut-phases by descending priority score, optionally the first ``top``.
+
+    Scores come from priority_rank (rebuilt here when stale), so the head
+    of the list is read off idx_priority_rank_score without sorting.
+    """
+    conn = get_conn()
+    _refresh_priority_rank(conn, episode_id)
     phase_filter = ""
     params = [episode_id]
     if section:
-        # Map section names to phases
-        section_phases = {
-            "sakkan": ("lo_sakkan", "genga_sakkan"),
-            "enshutsu": ("lo_enshutsu", "genga_enshutsu"),
-            "douga": ("douga",),
-            "shiage": ("shiage",),
-            "satsuei": ("satsuei",),
-        }
-        phases = section_phases.get(section, (section,))
+        phases = SECTION_PHASES.get(section, (section,))
         placeholders = ",".join("?" * len(phases))
-        phase_filter = f"AND cp.phase IN ({placeholders})"
+        phase_filter = f"AND pr.phase IN ({placeholders})"
         params.extend(phases)
-
-    rows = conn.execute(
+    params.append(-1 if top is None else top)
+
+    # Phase/status codes and assignee ids map to shared strings; a cut's
+    # number, reason and repeated deadlines are kept once, not per row.
+    names = creator_names()
+    share = {}.setdefault
+    cur = conn.cursor()
+    cur.row_factory = None
+    rows = cur.execute(
         f"""SELECT c.number, c.difficulty, c.is_priority, c.priority_reason,
-            cp.phase, cp.status, cp.deadline, cr.name as assignee_name
-        FROM cut c
-        JOIN cut_phase cp ON cp.cut_id = c.id
-        LEFT JOIN creator cr ON cr.id = cp.assignee_id
-        WHERE c.episode_id = ?
+            cp.phase, cp.status, cp.deadline, cp.assignee_id, pr.score
+        FROM priority_rank pr
+        JOIN cut_phase_data cp ON cp.id = pr.cut_phase_id
+        JOIN cut c ON c.id = cp.cut_id
+        WHERE pr.episode_id = ?
         {phase_filter}
-        AND cp.status IN ('pending', 'in_progress', 'retake', 'delayed')
-        ORDER BY
-            c.is_priority DESC,
-            CASE WHEN cp.status = 'delayed' THEN 0
-                 WHEN cp.status = 'retake' THEN 1
-                 WHEN cp.status = 'in_progress' THEN 2
-                 ELSE 3 END,
-            c.difficulty DESC,
-            cp.deadline ASC NULLS LAST,
-            c.number ASC""",
+        ORDER BY pr.score DESC, pr.sort_key, pr.cut_phase_id
+        LIMIT ?""",
         params,
-    ).fetchall()
+    )
+    items = [
+        PriorityItem(share(number, number), difficulty, is_priority, share(reason, reason),
+                     PHASES[phase], STATUSES[status], share(deadline, deadline),
+                     names.get(assignee), score)
+        for number, difficulty, is_priority, reason, phase, status, deadline, assignee, score in rows
+    ]
     conn.close()
-    return [dict(r) for r in rows]
+    return items
+
+
+# ── Queue ────────────────────────────────────────────
+
+def ready_queue(episode_id: int, phase: str) -> Iterator[dict]:
+    """Pending ``phase`` rows whose upstream phase is completed, longest
+    waiting first. For the first phase every pending cut is ready.
+
+    Readiness is a phase_mask bit test per cut, so no cut_phase rows are
+    scanned beyond the cuts' own (cut_id, phase) lookups. Rows are yielded
+    as they come off the cursor.
+    """
+    code = PHASE_CODE[phase]
+    params: list = []
+    if code:
+        upstream = "JOIN cut_phase up ON up.cut_id = c.id AND up.phase = ?"
+        ready = "up.completed_at"
+        mask = "AND c.phase_mask & ?"
+        params = [PHASES[code - 1], phase, episode_id, 1 << (code - 1)]
+    else:
+        upstream, ready, mask = "", "c.created_at", ""
+        params = [phase, episode_id]
+    conn = get_conn()
+    try:
+        cur = conn.execute(
+            f"""SELECT c.number, c.difficulty, c.is_priority, c.priority_reason,
+                cp.deadline, cr.name as assignee_name, {ready} as ready_since,
+                julianday('now') - julianday({ready}) as waiting_days
+            FROM cut c
+            {upstream}
+            JOIN cut_phase cp ON cp.cut_id = c.id AND cp.phase = ?
+            LEFT JOIN creator cr ON cr.id = cp.assignee_id
+            WHERE c.episode_id = ? {mask} AND cp.status = 'pending'
+            ORDER BY ready_since, c.sort_key, c.number""",
+            params,
+        )
+        for r in cur:
+            yield dict(r)
+    finally:
+        conn.close()
 
 
 # ── Simulation ───────────────────────────────────────
@@ -488,14 +1195,177 @@ def sim_delay(episode_id: int, phase: str, days: int) -> list[dict]:
     return results
 
 
+# ── Report ───────────────────────────────────────────
+
+def flow_report(episode_id: int | None = None, project_id: int | None = None,
+                days: int = 7) -> list[dict]:
+    """Per-phase WIP, cycle time, throughput and queue age in one query.
+
+    Cycle time is completed_at - started_at (days) with nearest-rank
+    median/p90. A pending phase is queued once its upstream phase has a
+    completed_at (the first phase: once the cut exists); queue age is
+    measured from that moment. The upstream lookup is an index seek on
+    UNIQUE(cut_id, phase) done only for pending rows.
+    """
+    if episode_id is not None:
+        scope, params = "c.episode_id = ?", [episode_id]
+    else:
+        scope, params = (
+            "c.episode_id IN (SELECT id FROM episode WHERE project_id = ?)",
+            [project_id],
+        )
+    params.append(f"-{days} days")
+    conn = get_conn()
+    rows = conn.execute(
+        f"""WITH base AS (
+            SELECT cp.phase, cp.status, cp.started_at, cp.completed_at,
+                CASE WHEN cp.status = 'pending' THEN
+                    CASE WHEN cp.phase = '{PHASES[0]}' THEN c.created_at
+                    ELSE (SELECT up.completed_at FROM cut_phase up
+                          WHERE up.cut_id = cp.cut_id AND up.phase = {_PREV_PHASE_SQL})
+                    END
+                END as ready_at
+            FROM cut_phase cp
+            JOIN cut c ON c.id = cp.cut_id
+            WHERE {scope}
+        ), ranked AS (
+            SELECT phase, cycle,
+                ROW_NUMBER() OVER (PARTITION BY phase ORDER BY cycle) as rn,
+                COUNT(*) OVER (PARTITION BY phase) as n
+            FROM (
+                SELECT phase, julianday(completed_at) - julianday(started_at) as cycle
+                FROM base WHERE status = 'completed' AND started_at IS NOT NULL
+            )
+            WHERE cycle >= 0
+        ), pct AS (
+            SELECT phase,
+                MIN(CASE WHEN rn >= (n + 1) / 2 THEN cycle END) as median_days,
+                MIN(CASE WHEN rn >= (9 * n + 9) / 10 THEN cycle END) as p90_days
+            FROM ranked GROUP BY phase
+        )
+        SELECT b.phase,
+            COUNT(*) as total,
+            SUM(b.status IN ('in_progress', 'retake', 'delayed')) as wip,
+            AVG(CASE WHEN b.status IN ('in_progress', 'retake', 'delayed')
+                THEN julianday('now') - julianday(b.started_at) END) as wip_age_days,
+            SUM(b.status = 'completed') as done,
+            SUM(b.status = 'completed' AND b.completed_at >= datetime('now', ?)) as recent_done,
+            SUM(b.status = 'pending' AND b.ready_at IS NOT NULL) as queued,
+            AVG(CASE WHEN b.status = 'pending'
+                THEN julianday('now') - julianday(b.ready_at) END) as queue_age_days,
+            p.median_days, p.p90_days
+        FROM base b
+        LEFT JOIN pct p ON p.phase = b.phase
+        GROUP BY b.phase""",
+        params,
+    ).fetchall()
+    conn.close()
+    by_phase = {r["phase"]: dict(r) for r in rows}
+    result = []
+    for phase in PHASES:
+        d = by_phase.get(phase)
+        if not d:
+            continue
+        d["throughput_per_day"] = d["recent_done"] / days
+        result.append(d)
+    ages = [d["queue_age_days"] or 0 for d in result]
+    for d in result:
+        d["bottleneck"] = bool(ages) and max(ages) > 0 and (d["queue_age_days"] or 0) == max(ages)
+    return result
+
+
+def sheet_grid(project_id: int, episode_id: int | None = None) -> dict[int, list[dict]]:
+    """Cut × phase grid per episode for progress sheets, in one query.
+
+    Returns {episode id: [cut dict with "phases": {phase: {status,
+    assignee_name, deadline}}]} in cut order; episodes without cuts are
+    absent. Reads cut_phase_data codes directly, not the cut_phase view.
+    """
+    scope, params = "c.episode_id IN (SELECT id FROM episode WHERE project_id = ?)", [project_id]
+    if episode_id is not None:
+        scope, params = "c.episode_id = ?", [episode_id]
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.row_factory = None  # plain tuples: up to ten rows per cut
+    cur.execute(
+        f"""SELECT c.episode_id, c.id, c.number, c.difficulty, c.is_priority,
+            cp.phase, cp.status, cr.name, cp.deadline
+        FROM cut c
+        JOIN cut_phase_data cp ON cp.cut_id = c.id
+        LEFT JOIN creator cr ON cr.id = cp.assignee_id
+        WHERE {scope}
+        ORDER BY c.episode_id, c.sort_key, c.number""",
+        params,
+    )
+    grids: dict[int, list[dict]] = {}
+    cut = None
+    for episode_id, cut_id, number, difficulty, is_priority, phase, status, name, deadline in cur:
+        if cut is None or cut["id"] != cut_id:
+            cut = {"id": cut_id, "number": number, "difficulty": difficulty,
+                   "is_priority": is_priority, "phases": {}}
+            grids.setdefault(episode_id, []).append(cut)
+        cut["phases"][PHASES[phase]] = {
+            "status": STATUSES[status], "assignee_name": name, "deadline": deadline,
+        }
+    conn.close()
+    return grids
+
+
 # ── Dashboard ────────────────────────────────────────
 
+def _dashboard_wide(conn, project_id: int, episodes) -> dict:
+    """dashboard_data from cut_progress (wide layout): one grouped scan for the project."""
+    done, delayed = STATUS_CODE["completed"], STATUS_CODE["delayed"]
+    open_codes = f"{STATUS_CODE['pending']}, {STATUS_CODE['in_progress']}"
+    cols = []
+    for p in PHASES:
+        status = status_bits_sql("w.statuses", p)
+        cols += [f"SUM({status} = {done}) AS done_{p}", f"SUM({status} = {delayed}) AS delayed_{p}"]
+    unassigned = " + ".join(
+        f"SUM({status_bits_sql('w.statuses', p)} IN ({open_codes}) AND w.assignee_{p} IS NULL)"
+        for p in PHASES
+    )
+    rows = conn.execute(
+        f"""SELECT w.episode_id, COUNT(*) as total, {", ".join(cols)},
+            {unassigned} as unassigned
+        FROM cut_progress w
+        WHERE w.episode_id IN (SELECT id FROM episode WHERE project_id = ?)
+        GROUP BY w.episode_id""",
+        (project_id,),
+    ).fetchall()
+    by_episode = {r["episode_id"]: r for r in rows}
+
+    ep_data = []
+    unassigned_total = delayed_total = 0
+    for ep in episodes:
+        r = by_episode.get(ep["id"])
+        total = r["total"] if r else 0
+        phases = {
+            p: {"total": total, "done": r[f"done_{p}"] if r else None,
+                "delayed": r[f"delayed_{p}"] if r else None}
+            for p in PHASES
+        }
+        if r:
+            unassigned_total += r["unassigned"]
+            delayed_total += sum(r[f"delayed_{p}"] for p in PHASES)
+        ep_data.append({"episode": dict(ep), "total_cuts": total, "phases": phases})
+    return {
+        "episodes": ep_data,
+        "unassigned_phases": unassigned_total,
+        "delayed_phases": delayed_total,
+    }
+
+
 def dashboard_data(project_id: int) -> dict:
     conn = get_conn()
     episodes = conn.execute(
         "SELECT * FROM episode WHERE project_id = ? ORDER BY number",
         (project_id,),
     ).fetchall()
+    if wide_layout(conn):
+        result = _dashboard_wide(conn, project_id, episodes)
+        conn.close()
+        return result
 
     ep_data = []
     for ep in episodes:
@@ -548,3 +1418,22 @@ def dashboard_data(project_id: int) -> dict:
         "unassigned_phases": unassigned,
         "delayed_phases": delayed,
     }
+
+
+# ── Storage ──────────────────────────────────────────
+
+def storage_layout() -> str:
+    """"wide" when cut_progress rows are kept, else "normalized"."""
+    conn = get_conn()
+    wide = wide_layout(conn)
+    conn.close()
+    return "wide" if wide else "normalized"
+
+
+def storage_set_layout(layout: str) -> bool:
+    """Build ("wide") or drop ("normalized") the cut_progress rows. False if unchanged."""
+    conn = get_conn()
+    try:
+        return set_layout(conn, layout == "wide")
+    finally:
+        conn.close()
@@ -0,0 +1,219 @@
+"""SQL プロファイラ (--profile / SEISHIN_PROFILE)
+
+While installed, every connection from db.get_conn is created with a
+cursor subclass that times execute/executemany and row fetches, a trace
+callback that counts statement starts (trigger firings and each
+executemany row included) and a progress handler that charges SQLite VM
+steps to the statement currently running. Statements are grouped by
+shape: literals, named parameters and bound values become ``?`` and
+IN-lists collapse. Reference-cache hits, misses and invalidations
+(refcache.py) during the command are reported alongside.
+"""
+
+import json
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from . import db, refcache
+
+PROGRESS_STEPS = 1000   # VM instructions per progress-handler call
+N_PLUS_ONE = 10         # a SELECT shape run this often in one command is flagged
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PARAM = re.compile(r"[:@$][A-Za-z_]\w*")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_active: "Profiler | None" = None
+
+
+def sql_shape(sql: str) -> str:
+    """Normalise a statement so repeats with different values compare equal."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _IN_LIST.sub("(?, ...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class _Stat:
+    __slots__ = ("calls", "steps", "rows", "seconds", "vm")
+
+    def __init__(self):
+        self.calls = self.steps = self.rows = self.vm = 0
+        self.seconds = 0.0
+
+
+class Profiler:
+    """Per-shape statement statistics for one command."""
+
+    def __init__(self):
+        self.stats: dict[str, _Stat] = {}
+        self.connections = 0
+        self.statements = 0
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self._current: _Stat | None = None
+        self._cache_start = refcache.cache.stats()
+
+    def stat(self, sql: str) -> _Stat:
+        shape = sql_shape(sql)
+        s = self.stats.get(shape)
+        if s is None:
+            s = self.stats[shape] = _Stat()
+        return s
+
+    # sqlite3 callbacks
+
+    def _on_statement(self, sql: str):
+        self.statements += 1
+        s = self._current = self.stat(sql)
+        s.steps += 1
+
+    def _on_progress(self) -> int:
+        if self._current is not None:
+            self._current.vm += PROGRESS_STEPS
+        return 0
+
+    def attach(self, conn: sqlite3.Connection):
+        self.connections += 1
+        conn.set_trace_callback(self._on_statement)
+        conn.set_progress_handler(self._on_progress, PROGRESS_STEPS)
+
+    # results
+
+    def n_plus_one(self) -> list[tuple[str, int]]:
+        """SELECT shapes issued at least N_PLUS_ONE times, most frequent first."""
+        hits = [(shape, s.calls) for shape, s in self.stats.items()
+                if s.calls >= N_PLUS_ONE and shape[:6].upper() == "SELECT"]
+        return sorted(hits, key=lambda h: -h[1])
+
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        """Reference-cache counters since the profiler started, tables with lookups only."""
+        result = {}
+        for table, now in refcache.cache.stats().items():
+            start = self._cache_start[table]
+            delta = {k: now[k] - start[k] for k in now}
+            if delta["hits"] or delta["misses"]:
+                result[table] = delta
+        return result
+
+    def to_dict(self) -> dict:
+        end = self.finished or time.perf_counter()
+        queries = sorted(self.stats.items(), key=lambda kv: (-kv[1].seconds, -kv[1].steps))
+        return {
+            "wall_ms": round((end - self.started) * 1000, 3),
+            "sql_ms": round(sum(s.seconds for s in self.stats.values()) * 1000, 3),
+            "connections": self.connections,
+            "statements": self.statements,
+            "queries": [
+                {"sql": shape, "calls": s.calls, "steps": s.steps, "rows": s.rows,
+                 "ms": round(s.seconds * 1000, 3), "vm_steps": s.vm}
+                for shape, s in queries
+            ],
+            "n_plus_one": [{"sql": shape, "calls": n} for shape, n in self.n_plus_one()],
+            "cache": self.cache_stats(),
+        }
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Times execute/executemany and fetches, charging them to the statement's shape."""
+
+    _stat: _Stat | None = None
+
+    def _timed(self, method, sql, args):
+        stat = _active.stat(sql) if _active else None
+        start = time.perf_counter()
+        try:
+            return method(self, sql, *args)
+        finally:
+            if stat is not None:
+                stat.calls += 1
+                stat.seconds += time.perf_counter() - start
+            self._stat = stat
+
+    def execute(self, sql, *args):
+        return self._timed(sqlite3.Cursor.execute, sql, args)
+
+    def executemany(self, sql, *args):
+        return self._timed(sqlite3.Cursor.executemany, sql, args)
+
+    def _fetched(self, start: float, rows: int):
+        if self._stat is not None:
+            self._stat.seconds += time.perf_counter() - start
+            self._stat.rows += rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        rows = super().fetchmany(*args)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    # Connection.execute* bypass Cursor.execute in C, so route them explicitly.
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+
+def install(profiler: Profiler):
+    """Profile every connection db.get_conn hands out from now on."""
+    global _active
+    _active = profiler
+    db.CONNECTION_FACTORY = ProfiledConnection
+    db.CONNECTION_HOOKS.append(profiler.attach)
+
+
+def uninstall(profiler: Profiler):
+    global _active
+    if _active is profiler:
+        _active = None
+        db.CONNECTION_FACTORY = sqlite3.Connection
+    if profiler.attach in db.CONNECTION_HOOKS:
+        db.CONNECTION_HOOKS.remove(profiler.attach)
+    profiler.finished = time.perf_counter()
+
+
+def report(profiler: Profiler, target: str):
+    """Print a summary to stderr (``target`` "-" or "1") or write a JSON trace to a path."""
+    uninstall(profiler)
+    data = profiler.to_dict()
+    if target not in ("-", "1"):
+        data["argv"] = sys.argv[1:]
+        Path(target).write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+        return
+    from .render import render_profile
+    render_profile(data)
@@ -0,0 +1,105 @@
+"""一覧系クエリの軽量レコード型
+
+cut_list, cut_board, priority_list and order_list return these
+NamedTuples instead of one dict per row: a row is built straight from a
+tuple cursor and costs a tuple, not a hash table. ``r["field"]``,
+``r.get("field")``, ``r.keys()`` and ``dict(r)`` still work, so render.py
+reads them the same as the dicts from analytics frames.
+"""
+
+from typing import NamedTuple
+
+from .db import PHASES
+
+
+def _getitem(self, key):
+    if key.__class__ is str:
+        if key in self._names:
+            return getattr(self, key)
+        raise KeyError(key)
+    return tuple.__getitem__(self, key)
+
+
+def _get(self, key: str, default=None):
+    return getattr(self, key) if key in self._names else default
+
+
+def _keys(self) -> tuple[str, ...]:
+    return self._fields + self._computed
+
+
+def _record(*computed: str):
+    """Class decorator: dict-style reads of the fields and the ``computed`` properties."""
+    def wrap(cls):
+        cls._computed = computed
+        cls._names = frozenset(cls._fields + computed)
+        cls.__getitem__ = _getitem
+        cls.get = _get
+        cls.keys = _keys
+        return cls
+    return wrap
+
+
+def columns(record, alias: str | None = None) -> str:
+    """SELECT list of ``record``'s fields, in field order."""
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + f for f in record._fields)
+
+
+@_record("current_phase", "completed_phases")
+class Cut(NamedTuple):
+    id: int
+    episode_id: int
+    number: str
+    difficulty: int
+    is_priority: int
+    priority_reason: str | None
+    created_at: str
+    sort_key: int
+    phase_mask: int
+
+    @property
+    def current_phase(self) -> str | None:
+        """First phase not completed (None when all are)."""
+        first_open = (~self.phase_mask & (self.phase_mask + 1)).bit_length() - 1
+        return PHASES[first_open] if first_open < len(PHASES) else None
+
+    @property
+    def completed_phases(self) -> int:
+        return self.phase_mask.bit_count()
+
+
+@_record()
+class BoardCell(NamedTuple):
+    number: str
+    status: str
+    assignee_name: str | None
+
+
+@_record()
+class PriorityItem(NamedTuple):
+    number: str
+    difficulty: int
+    is_priority: int
+    priority_reason: str | None
+    phase: str
+    status: str
+    deadline: str | None
+    assignee_name: str | None
+    score: float
+
+
+@_record()
+class Order(NamedTuple):
+    id: int
+    episode_id: int
+    phase: str
+    cut_numbers: str
+    assignee_type: str
+    assignee_id: int
+    price_per_cut: int
+    total_price: int
+    deadline: str | None
+    status: str
+    issued_at: str | None
+    created_at: str
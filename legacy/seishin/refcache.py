@@ -0,0 +1,97 @@
+"""参照データ (作品・話数・クリエイター・会社) の読み込みキャッシュ
+
+Lookups are memoised per table, keyed by the lookup and its arguments
+(id, name, or project + episode number). Every table in
+db.REFERENCE_TABLES has a table_version row that triggers bump on any
+write, so a write through any connection or process drops only the
+entries of the table it touched. Whether anything changed at all is read
+off db.change_stamp() first (one PRAGMA), so table_version itself is only
+queried after a write. Works the same with the shell's shared connection
+and with the short-lived connections of a single CLI command.
+
+A rollback on the shared connection drops every entry: the versions go
+back with it and a later write can bring them to the same values again,
+so rows read inside the rolled-back transaction would otherwise survive.
+"""
+
+from typing import Callable, Hashable
+
+from . import db
+
+
+class RefCache:
+    """Entries, versions and hit/miss counters per reference table."""
+
+    def __init__(self):
+        self.path = None
+        self.stamp = None
+        self.versions: dict[str, int] | None = None  # read on the first miss
+        self.rollbacks = 0  # db._shared.rollbacks at the last check
+        self.entries: dict[str, dict] = {t: {} for t in db.REFERENCE_TABLES}
+        self.hits = dict.fromkeys(db.REFERENCE_TABLES, 0)
+        self.misses = dict.fromkeys(db.REFERENCE_TABLES, 0)
+        self.invalidations = dict.fromkeys(db.REFERENCE_TABLES, 0)
+
+    def clear(self):
+        self.path = self.stamp = self.versions = None
+        for entries in self.entries.values():
+            entries.clear()
+
+    def _read_versions(self) -> dict[str, int]:
+        conn = db.get_conn()
+        versions = dict(conn.execute("SELECT name, version FROM table_version").fetchall())
+        conn.close()
+        return versions
+
+    def _check(self):
+        """Drop the tables written since the last check, or everything after a rollback."""
+        rollbacks = db._shared.rollbacks if db._shared is not None else 0
+        if rollbacks != self.rollbacks:
+            for table, entries in self.entries.items():
+                if entries:
+                    self.invalidations[table] += 1
+            self.clear()
+            self.rollbacks = rollbacks
+        if self.path != db.DB_PATH:
+            self.clear()
+            self.path = db.DB_PATH
+        stamp = db.change_stamp()
+        if stamp == self.stamp:
+            return
+        self.stamp = stamp
+        if self.versions is None:
+            return  # nothing cached yet
+        versions = self._read_versions()
+        for table, entries in self.entries.items():
+            if entries and versions.get(table) != self.versions.get(table):
+                entries.clear()
+                self.invalidations[table] += 1
+        self.versions = versions
+
+    def lookup(self, table: str, key: Hashable, load: Callable[[], object],
+               alias: Callable[[object], Hashable] | None = None):
+        """The cached value of ``key``, else ``load()``; ``alias(value)`` is a
+        second key the loaded value is stored under (e.g. by id after by name).
+        """
+        self._check()
+        entries = self.entries[table]
+        if key in entries:
+            self.hits[table] += 1
+            return entries[key]
+        self.misses[table] += 1
+        if self.versions is None:
+            self.versions = self._read_versions()
+        value = entries[key] = load()
+        if value and alias is not None:
+            entries[alias(value)] = value
+        return value
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            t: {"hits": self.hits[t], "misses": self.misses[t],
+                "invalidations": self.invalidations[t]}
+            for t in db.REFERENCE_TABLES
+        }
+
+
+cache = RefCache()
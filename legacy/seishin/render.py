@@ -4,11 +4,13 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
+from rich.cells import cell_len
 from rich import box
 
 from .db import PHASES
 
 console = Console()
+err_console = Console(stderr=True)
 
 PHASE_SHORT = {
     "lo_raw": "LO原",
@@ -51,6 +53,13 @@ def render_project_list(projects: list[dict]):
     console.print(table)
 
 
+def render_snapshot_counts(counts: dict[str, int], elapsed: float):
+    console.print(
+        "  " + "  ".join(f"{t}: {n:,}" for t, n in counts.items())
+        + f"  [dim]({elapsed:.1f}秒)[/dim]"
+    )
+
+
 def render_episode_list(episodes: list[dict]):
     table = Table(title="話数一覧", box=box.ROUNDED)
     table.add_column("#", style="dim")
@@ -132,9 +141,10 @@ def render_cut_show(cut: dict):
     console.print(table)
 
 
-def render_cut_board(board: dict):
+def render_cut_board(board: dict, as_of: str | None = None):
     """Render a kanban-style board of all phases."""
-    table = Table(title="カット工程ボード", box=box.ROUNDED, show_lines=True)
+    title = "カット工程ボード" + (f" ({as_of} 時点)" if as_of else "")
+    table = Table(title=title, box=box.ROUNDED, show_lines=True)
     table.add_column("工程", style="bold", width=8)
     table.add_column("完了", style="green", justify="right", width=5)
     table.add_column("作業中", style="cyan", width=30)
@@ -168,6 +178,24 @@ def render_cut_board(board: dict):
     console.print(table)
 
 
+def render_cut_history(number: str, events: list[dict]):
+    table = Table(title=f"{number} 工程履歴", box=box.SIMPLE)
+    table.add_column("日時 (UTC)", style="dim")
+    table.add_column("工程")
+    table.add_column("状態")
+    table.add_column("担当")
+    for e in events:
+        style = STATUS_STYLE.get(e["status"], "")
+        icon = STATUS_ICON.get(e["status"], "")
+        table.add_row(
+            e["at"],
+            PHASE_SHORT.get(e["phase"], e["phase"]),
+            Text(f"{icon} {e['status']}", style=style),
+            e.get("assignee_name") or "-",
+        )
+    console.print(table)
+
+
 def render_creator_list(creators: list[dict]):
     table = Table(title="クリエイター一覧", box=box.ROUNDED)
     table.add_column("ID", style="dim")
@@ -199,6 +227,28 @@ def render_creator_show(creator: dict):
     ))
 
 
+def render_creator_stats(rows: list[dict], days: int):
+    table = Table(title=f"クリエイター実績 (直近{days}日)", box=box.ROUNDED)
+    table.add_column("名前", style="bold")
+    table.add_column("工程")
+    table.add_column("カット/日", justify="right")
+    table.add_column("枚/日", justify="right")
+    table.add_column("最高カット/日", justify="right")
+    table.add_column("累計", justify="right")
+    table.add_column("最終", style="dim")
+    for r in rows:
+        table.add_row(
+            r["name"],
+            PHASE_SHORT.get(r["phase"], r["phase"] or "-"),
+            f"{r['cuts_per_day']:.1f}",
+            f"{r['sheets_per_day']:.1f}" if r["total_sheets"] else "-",
+            f"{r['peak_cuts_per_day']:.1f}",
+            f"{r['total_cuts']}カット",
+            r["last_day"] or "-",
+        )
+    console.print(table)
+
+
 def render_company_list(companies: list[dict]):
     table = Table(title="外注会社一覧", box=box.ROUNDED)
     table.add_column("ID", style="dim")
@@ -228,6 +278,32 @@ def render_company_show(company: dict):
     ))
 
 
+def render_company_load(data: dict):
+    c = data["company"]
+    phases = "  ".join(f"{PHASE_SHORT.get(p, p)} {n}" for p, n in data["phases"].items())
+    console.print(Panel(
+        f"[bold]{c['name']}[/bold]  日産能力: {c['capacity_per_day'] or '-'}カット\n"
+        f"未完了の発注カット: {phases or '-'}"
+        + (f"  (納期なし {data['undated']})" if data["undated"] else ""),
+        title=f"会社 #{c['id']} 稼働",
+    ))
+    if not data["schedule"]:
+        return
+    table = Table(box=box.SIMPLE)
+    table.add_column("納期")
+    table.add_column("カット", justify="right")
+    table.add_column("累計", justify="right")
+    table.add_column("能力 (日数)", justify="right")
+    table.add_column("超過", justify="right")
+    for e in data["schedule"]:
+        table.add_row(
+            e["due"], str(e["cuts"]), str(e["due_total"]),
+            f"{e['capacity']} ({e['days']}日)" if e["capacity"] is not None else "-",
+            f"[red bold]{e['over']}[/red bold]" if e["over"] else "-",
+        )
+    console.print(table)
+
+
 def render_order_list(orders: list[dict]):
     table = Table(title="発注書一覧", box=box.ROUNDED)
     table.add_column("ID", style="dim")
@@ -252,6 +328,24 @@ def render_order_list(orders: list[dict]):
     console.print(table)
 
 
+def render_order_reconcile(results: list[dict]):
+    table = Table(title="発注照合", box=box.ROUNDED, show_lines=True)
+    table.add_column("工程", width=8)
+    table.add_column("未発注", style="yellow", width=40)
+    table.add_column("重複", style="red", width=40)
+    for r in results:
+        gaps = ", ".join(r["gaps"][:15])
+        if len(r["gaps"]) > 15:
+            gaps += f" +{len(r['gaps']) - 15}"
+        overlaps = ", ".join(
+            f"{num}(#{'/#'.join(map(str, ids))})" for num, ids in r["overlaps"][:10]
+        )
+        if len(r["overlaps"]) > 10:
+            overlaps += f" +{len(r['overlaps']) - 10}"
+        table.add_row(PHASE_SHORT.get(r["phase"], r["phase"]), gaps or "-", overlaps or "-")
+    console.print(table)
+
+
 def render_priority_list(items: list[dict]):
     table = Table(title="優先カットリスト", box=box.ROUNDED)
     table.add_column("#", style="dim")
@@ -262,6 +356,7 @@ def render_priority_list(items: list[dict]):
     table.add_column("担当")
     table.add_column("締切")
     table.add_column("理由")
+    table.add_column("スコア", justify="right")
     for i, item in enumerate(items, 1):
         style = STATUS_STYLE.get(item["status"], "")
         icon = STATUS_ICON.get(item["status"], "")
@@ -274,6 +369,40 @@ def render_priority_list(items: list[dict]):
             item.get("assignee_name") or "-",
             item.get("deadline") or "-",
             item.get("priority_reason") or "-",
+            f"{item['score']:.1f}" if item.get("score") is not None else "-",
+        )
+    console.print(table)
+
+
+def render_priority_weights(weights: dict[str, float], defaults: dict[str, float]):
+    table = Table(title="優先度スコアの重み", box=box.SIMPLE)
+    table.add_column("項目")
+    table.add_column("重み", justify="right")
+    table.add_column("既定", justify="right", style="dim")
+    for name, weight in weights.items():
+        style = "cyan" if weight != defaults.get(name) else ""
+        table.add_row(name, Text(f"{weight:g}", style=style), f"{defaults.get(name, 0):g}")
+    console.print(table)
+
+
+def render_ready_queue(rows: list[dict], phase: str):
+    table = Table(title=f"着手可能 ({PHASE_SHORT.get(phase, phase)})", box=box.ROUNDED)
+    table.add_column("#", style="dim")
+    table.add_column("カット", style="bold")
+    table.add_column("難易度", justify="center")
+    table.add_column("優先", justify="center")
+    table.add_column("担当")
+    table.add_column("締切")
+    table.add_column("待ち", justify="right")
+    for i, r in enumerate(rows, 1):
+        table.add_row(
+            str(i),
+            r["number"],
+            "★" * (r["difficulty"] or 3),
+            "◉" if r["is_priority"] else "",
+            r.get("assignee_name") or "-",
+            r.get("deadline") or "-",
+            _days(r["waiting_days"]),
         )
     console.print(table)
 
@@ -333,3 +462,196 @@ def render_dashboard(data: dict, project_name: str):
                 str(delayed) if delayed else "-",
             )
         console.print(table)
+
+
+def _days(v: float | None) -> str:
+    return f"{v:.1f}日" if v is not None else "-"
+
+
+def render_flow_report(rows: list[dict], scope: str, days: int):
+    table = Table(title=f"工程フロー ({scope})", box=box.ROUNDED)
+    table.add_column("工程", width=8)
+    table.add_column("WIP", justify="right")
+    table.add_column("WIP経過", justify="right")
+    table.add_column("待ち", justify="right")
+    table.add_column("待ち経過", justify="right")
+    table.add_column("中央値", justify="right")
+    table.add_column("p90", justify="right")
+    table.add_column(f"完了/日 ({days}日)", justify="right")
+    table.add_column("完了", justify="right")
+    for r in rows:
+        name = PHASE_SHORT.get(r["phase"], r["phase"])
+        table.add_row(
+            f"[red bold]{name}[/red bold]" if r["bottleneck"] else name,
+            str(r["wip"]),
+            _days(r["wip_age_days"]),
+            str(r["queued"]),
+            _days(r["queue_age_days"]),
+            _days(r["median_days"]),
+            _days(r["p90_days"]),
+            f"{r['throughput_per_day']:.1f}",
+            f"{r['done']}/{r['total']}",
+        )
+    console.print(table)
+    neck = [r for r in rows if r["bottleneck"]]
+    if neck:
+        console.print(
+            f"[red]ボトルネック: {PHASE_SHORT.get(neck[0]['phase'], neck[0]['phase'])}"
+            f" (待ち経過 {_days(neck[0]['queue_age_days'])})[/red]"
+        )
+
+
+# Column widths in the load calendar: content + box.SIMPLE padding and separator
+LOAD_DAY_WIDTH = 5 + 3  # "10/19", "12.5"
+LOAD_TOTALS_WIDTH = 5 + 8 + 8 + 3 * 3  # 超過, 期限切れ, 締切なし
+
+
+def _load_chunks(days: list, fixed: int) -> list[tuple[int, int]]:
+    """[start, end) day slices that fit the console next to ``fixed`` columns:
+    whole weeks when more than one fits, the totals after the last slice."""
+    per_table = max(1, (console.width - fixed) // LOAD_DAY_WIDTH)
+    if per_table >= 7:
+        per_table -= per_table % 7
+    chunks = [(i, min(i + per_table, len(days))) for i in range(0, len(days), per_table)]
+    start, end = chunks[-1]
+    if fixed + (end - start) * LOAD_DAY_WIDTH + LOAD_TOTALS_WIDTH > console.width:
+        chunks.append((end, end))  # totals get a table of their own
+    return chunks
+
+
+def render_creator_load(rows: list[dict], days: list, suggestions: list[dict]):
+    """Creator × day load (cuts/day); overbooked days in red. Long ranges are
+    split into several tables so day cells never get truncated."""
+    name_width = max([4] + [cell_len(r["name"]) for r in rows])
+    chunks = _load_chunks(days, name_width + 3 + 4 + 3 + 1)
+    for n, (start, end) in enumerate(chunks):
+        title = (f"稼働カレンダー ({days[start]} 〜 {days[end - 1]}, カット/日)" if end > start
+                 else f"期間合計 ({days[0]} 〜 {days[-1]})")
+        table = Table(title=title, box=box.SIMPLE)
+        table.add_column("名前", style="bold", no_wrap=True)
+        table.add_column("日産", justify="right", no_wrap=True)
+        for d in days[start:end]:
+            table.add_column(d.strftime("%m/%d"), justify="right", no_wrap=True, min_width=5)
+        last = n == len(chunks) - 1
+        if last:
+            table.add_column("超過", justify="right", no_wrap=True)
+            table.add_column("期限切れ", justify="right", no_wrap=True)
+            table.add_column("締切なし", justify="right", no_wrap=True)
+        for r in rows:
+            cells = []
+            for v, over in zip(r["load"][start:end], r["over"][start:end]):
+                if over:
+                    cells.append(f"[red bold]{v:.1f}[/red bold]")
+                else:
+                    cells.append(f"{v:.1f}" if v >= 0.05 else "[dim]·[/dim]")
+            if last:
+                cells += [
+                    f"[red]{r['over_cuts']:.1f}[/red]" if r["over_cuts"] else "-",
+                    str(r["overdue"]) if r["overdue"] else "-",
+                    str(r["unscheduled"]) if r["unscheduled"] else "-",
+                ]
+            table.add_row(r["name"], str(r["daily_capacity"] or "-"), *cells)
+        console.print(table)
+
+    if not suggestions:
+        return
+    table = Table(title="振り替え候補 (スキル一致・空きの多い順)", box=box.ROUNDED)
+    table.add_column("移動元", style="bold")
+    table.add_column("移動先", style="green")
+    table.add_column("カット数", justify="right")
+    table.add_column("期間")
+    for s in suggestions:
+        table.add_row(
+            f"{s['from_name']} (#{s['from_id']})", f"{s['to_name']} (#{s['to_id']})",
+            f"約{s['cuts']:.1f}", f"{s['first_day']:%m/%d}〜{s['last_day']:%m/%d}",
+        )
+    console.print(table)
+
+
+def render_budget(rows: list[dict], group_by: str):
+    titles = {"episode": "話数", "phase": "工程", "assignee": "発注先"}
+    table = Table(title=f"予算・発注額 ({titles[group_by]}別)", box=box.ROUNDED)
+    table.add_column(titles[group_by], style="bold")
+    table.add_column("発注数", justify="right")
+    table.add_column("発注済", justify="right")
+    table.add_column("下書き", justify="right")
+    if group_by == "episode":
+        table.add_column("予算", justify="right")
+        table.add_column("残", justify="right")
+    for r in rows:
+        label = PHASE_SHORT.get(r["label"], r["label"]) if group_by == "phase" else r["label"]
+        cells = [
+            label, str(r["orders"]),
+            f"¥{r['committed']:,}", f"¥{r['planned']:,}" if r["planned"] else "-",
+        ]
+        if group_by == "episode":
+            budget = r["budget"] or 0
+            remaining = budget - r["committed"] - r["planned"]
+            cells.append(f"¥{budget:,}" if budget else "-")
+            cells.append(
+                (f"[red]¥{remaining:,}[/red]" if remaining < 0 else f"¥{remaining:,}")
+                if budget else "-"
+            )
+        table.add_row(*cells)
+    console.print(table)
+
+    budget = rows[0]["project_budget"] if rows else 0
+    spent = sum(r["committed"] for r in rows)
+    planned = sum(r["planned"] for r in rows)
+    if budget:
+        pct = (spent + planned) / budget * 100
+        style = "red" if pct > 100 else "yellow" if pct > 90 else "green"
+        console.print(
+            f"  予算 ¥{budget:,} / 発注済 ¥{spent:,} + 下書き ¥{planned:,} "
+            f"[{style}]({pct:.0f}%)[/{style}]"
+        )
+    else:
+        console.print(f"  発注済 ¥{spent:,} + 下書き ¥{planned:,} [dim](予算未設定)[/dim]")
+
+
+def render_profile(data: dict, limit: int = 15):
+    table = Table(title="SQLプロファイル", box=box.SIMPLE)
+    table.add_column("SQL", no_wrap=True, overflow="ellipsis", max_width=80)
+    table.add_column("回数", justify="right")
+    table.add_column("ms", justify="right")
+    table.add_column("行", justify="right")
+    table.add_column("VM", justify="right", style="dim")
+    # executescript statements (schema, migrations) only reach the trace callback
+    queries = [q for q in data["queries"] if q["calls"]]
+    for q in queries[:limit]:
+        steps = f" [dim]({q['steps']})[/dim]" if q["steps"] != q["calls"] else ""
+        table.add_row(q["sql"], f"{q['calls']}{steps}", f"{q['ms']:.2f}",
+                      f"{q['rows']:,}", f"{q['vm_steps']:,}")
+    err_console.print(table)
+    rest = len(queries) - limit
+    if rest > 0:
+        err_console.print(f"  [dim]他 {rest} 種[/dim]")
+    err_console.print(
+        f"  実行 {data['wall_ms']:.1f}ms / SQL {data['sql_ms']:.1f}ms  "
+        f"文 {data['statements']:,}  接続 {data['connections']}"
+    )
+    for q in data["n_plus_one"]:
+        err_console.print(f"  [yellow]N+1の疑い ×{q['calls']}:[/yellow] {q['sql'][:100]}")
+    for table, c in data.get("cache", {}).items():
+        lookups = c["hits"] + c["misses"]
+        err_console.print(
+            f"  [dim]参照キャッシュ {table}: ヒット {c['hits']}/{lookups} "
+            f"({c['hits'] / lookups:.0%}) 無効化 {c['invalidations']}[/dim]"
+        )
+
+
+def render_run_timings(rows: list[tuple[int, str, float]], limit: int | None = 5):
+    """``rows`` are (line number, command, ms); ``limit`` shows only the slowest."""
+    if not rows:
+        return
+    partial = limit is not None and len(rows) > limit
+    shown = sorted(rows, key=lambda r: -r[2])[:limit] if partial else rows
+    table = Table(title=f"遅いコマンド (上位{limit})" if partial else "所要時間", box=box.SIMPLE)
+    table.add_column("行", justify="right", style="dim")
+    table.add_column("コマンド", no_wrap=True, overflow="ellipsis", max_width=80)
+    table.add_column("ms", justify="right")
+    for lineno, text, ms in shown:
+        table.add_row(str(lineno), text, f"{ms:.1f}")
+    console.print(table)
+    total = sum(r[2] for r in rows)
+    console.print(f"  [dim]{len(rows)}件 合計 {total:.0f}ms / 平均 {total / len(rows):.1f}ms[/dim]")
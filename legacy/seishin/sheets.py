@@ -0,0 +1,87 @@
+"""話数進行表 (カット×工程グリッド) のHTML出力
+
+The template is loaded and compiled once per process; every episode is
+then rendered and written by a thread pool. Jinja templates are safe to
+render concurrently, and the grid data is fetched beforehand on the
+calling thread (sqlite3 connections stay on the thread that opened them).
+"""
+
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from .db import PHASES
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+SHEET_TEMPLATE = "sheet.html"
+MAX_JOBS = 8
+
+
+@functools.cache
+def _template():
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        autoescape=select_autoescape(["html"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    return env.get_template(SHEET_TEMPLATE)
+
+
+def sheet_path(out_dir: Path, episode: dict) -> Path:
+    return out_dir / f"sheet_ep{episode['number']:02d}.html"
+
+
+def _rows(cuts: list[dict]) -> tuple[list[tuple], dict[str, int]]:
+    """Template rows (number, difficulty, priority, cells in PHASES order) and completed counts.
+
+    Cells are (status, assignee name, MM-DD deadline) tuples, or None for a
+    missing cut-phase; the template indexes them instead of doing a Jinja
+    attribute lookup per cell, which is most of the render time.
+    """
+    done = dict.fromkeys(PHASES, 0)
+    rows = []
+    for c in cuts:
+        cells = []
+        for p in PHASES:
+            cell = c["phases"].get(p)
+            if cell is None:
+                cells.append(None)
+                continue
+            if cell["status"] == "completed":
+                done[p] += 1
+            deadline = cell["deadline"]
+            cells.append((cell["status"], cell["assignee_name"], deadline[5:] if deadline else None))
+        rows.append((c["number"], c["difficulty"], c["is_priority"], cells))
+    return rows, done
+
+
+def render_sheet(project: dict, episode: dict, cuts: list[dict],
+                 phase_labels: dict[str, str], generated_at: str) -> str:
+    rows, done = _rows(cuts)
+    return _template().render(
+        project=project, episode=episode, rows=rows, labels=[phase_labels[p] for p in PHASES],
+        done=[done[p] for p in PHASES], generated_at=generated_at,
+    )
+
+
+def write_sheets(project: dict, episodes: list[dict], grids: dict[int, list[dict]],
+                 phase_labels: dict[str, str], out_dir: Path,
+                 jobs: int | None = None) -> list[Path]:
+    """Render and write one sheet per episode concurrently. Returns the paths in episode order."""
+    _template()  # compile before the pool starts (and fail early if missing)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    def write(ep: dict) -> Path:
+        html = render_sheet(project, ep, grids.get(ep["id"], []), phase_labels, generated_at)
+        path = sheet_path(out_dir, ep)
+        path.write_text(html, encoding="utf-8")
+        return path
+
+    jobs = jobs or min(MAX_JOBS, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(write, episodes))
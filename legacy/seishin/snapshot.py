@@ -0,0 +1,474 @@
+"""プロジェクト単位のエクスポート/インポート
+
+Columnar (Arrow/Parquet via pyarrow) or NDJSON (zstd/gzip compressed).
+cut_phase phase/status are stored as PHASE_CODE/STATUS_CODE integers.
+"""
+
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import Iterator
+
+from .db import (
+    get_conn, seed_phase_events_sql, PHASES, STATUSES, PHASE_CODE, STATUS_CODE, PHASE_MASK_SQL,
+)
+
+FORMAT_VERSION = 1
+BATCH_ROWS = 50_000
+
+# table -> [(column, type)]; type is "int", "code" (small int) or "str".
+# Foreign keys are exported as-is and remapped on import.
+TABLES = {
+    "creator": [
+        ("id", "int"), ("name", "str"), ("category", "str"), ("skills", "str"),
+        ("speed_rating", "int"), ("quality_rating", "int"), ("pulls_deadline", "int"),
+        ("daily_capacity", "int"), ("price_per_cut", "int"), ("notes", "str"),
+    ],
+    "company": [
+        ("id", "int"), ("name", "str"), ("capabilities", "str"),
+        ("capacity_per_day", "int"), ("num_staff", "int"), ("quality_rating", "int"),
+        ("contact", "str"), ("notes", "str"),
+    ],
+    "episode": [
+        ("id", "int"), ("number", "int"), ("title", "str"), ("air_date", "str"),
+        ("v_edit_date", "str"), ("budget", "int"), ("created_at", "str"),
+    ],
+    "cut": [
+        ("id", "int"), ("episode_id", "int"), ("number", "str"), ("sort_key", "int"),
+        ("difficulty", "int"), ("is_priority", "int"), ("priority_reason", "str"),
+        ("created_at", "str"),
+    ],
+    "cut_phase": [
+        ("cut_id", "int"), ("phase", "code"), ("status", "code"), ("assignee_id", "int"),
+        ("deadline", "str"), ("started_at", "str"), ("completed_at", "str"),
+    ],
+    "order": [
+        ("episode_id", "int"), ("phase", "str"), ("cut_numbers", "str"),
+        ("assignee_type", "str"), ("assignee_id", "int"), ("price_per_cut", "int"),
+        ("total_price", "int"), ("deadline", "str"), ("status", "str"),
+        ("issued_at", "str"), ("created_at", "str"),
+    ],
+    "work_log": [
+        ("creator_id", "int"), ("episode_id", "int"), ("phase", "str"),
+        ("cuts_completed", "int"), ("sheets_completed", "int"),
+        ("started_at", "str"), ("completed_at", "str"), ("created_at", "str"),
+    ],
+}
+
+_EPISODES = "SELECT id FROM episode WHERE project_id = :pid"
+_CUTS = f"SELECT id FROM cut WHERE episode_id IN ({_EPISODES})"
+
+# Source query per table; rows must come out in the TABLES column order.
+_EXPORT_SQL = {
+    "creator": """SELECT {cols} FROM creator WHERE id IN (
+        SELECT assignee_id FROM cut_phase_data WHERE cut_id IN (%s)
+        UNION SELECT creator_id FROM work_log WHERE episode_id IN (%s)
+        UNION SELECT assignee_id FROM "order"
+            WHERE assignee_type = 'creator' AND episode_id IN (%s)
+    ) ORDER BY id""" % (_CUTS, _EPISODES, _EPISODES),
+    "company": """SELECT {cols} FROM company WHERE id IN (
+        SELECT assignee_id FROM "order"
+        WHERE assignee_type = 'company' AND episode_id IN (%s)
+    ) ORDER BY id""" % _EPISODES,
+    "episode": "SELECT {cols} FROM episode WHERE project_id = :pid ORDER BY id",
+    "cut": f"SELECT {{cols}} FROM cut WHERE episode_id IN ({_EPISODES}) ORDER BY id",
+    "cut_phase": f"SELECT {{cols}} FROM cut_phase_data WHERE cut_id IN ({_CUTS})",
+    "order": f"""SELECT {{cols}} FROM "order" WHERE episode_id IN ({_EPISODES})
+        ORDER BY id""",
+    "work_log": f"""SELECT {{cols}} FROM work_log WHERE episode_id IN ({_EPISODES})
+        ORDER BY id""",
+}
+
+_to_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def detect_format(path: Path) -> str:
+    """'parquet' | 'arrow' | 'ndjson.zst' | 'ndjson.gz' | 'ndjson' from the path."""
+    name = path.name.lower()
+    for fmt in ("parquet", "arrow", "ndjson.zst", "ndjson.gz", "ndjson"):
+        if name.endswith("." + fmt):
+            return fmt
+    if name.endswith(".zst"):
+        return "ndjson.zst"
+    if name.endswith(".gz"):
+        return "ndjson.gz"
+    raise SnapshotError(f"形式を判別できない: {path.name} (.parquet/.arrow/.ndjson[.zst|.gz])")
+
+
+def have_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def have_zstd() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def fallback_path(path: Path) -> Path:
+    """NDJSON path used when pyarrow is missing for a .parquet/.arrow target."""
+    stem = path.name.rsplit(".", 1)[0]
+    ext = "ndjson.zst" if have_zstd() else "ndjson.gz"
+    return path.with_name(f"{stem}.{ext}")
+
+
+# ── Export ───────────────────────────────────────────
+
+def _iter_batches(conn, table: str, project_id: int) -> Iterator[list[tuple]]:
+    cols = ", ".join(f'"{c}"' for c, _ in TABLES[table])
+    cur = conn.cursor()
+    cur.row_factory = None  # plain tuples
+    cur.execute(_EXPORT_SQL[table].format(cols=cols), {"pid": project_id})
+    while True:
+        rows = cur.fetchmany(BATCH_ROWS)
+        if not rows:
+            return
+        yield rows
+
+
+def export_project(project: dict, path: Path) -> dict[str, int]:
+    """Stream one project to ``path``. Returns row counts per table."""
+    fmt = detect_format(path)
+    manifest = {
+        "format": "seishin-snapshot",
+        "version": FORMAT_VERSION,
+        "project": {k: project[k] for k in ("name", "short_name", "total_episodes")},
+        "phases": PHASES,
+        "statuses": STATUSES,
+    }
+    conn = get_conn()
+    manifest["project"]["priority_weights"] = dict(conn.execute(
+        "SELECT name, weight FROM priority_weight WHERE project_id = ?", (project["id"],)
+    ).fetchall())
+    try:
+        if fmt in ("parquet", "arrow"):
+            counts = _export_arrow(conn, project["id"], path, fmt, manifest)
+        else:
+            counts = _export_ndjson(conn, project["id"], path, fmt, manifest)
+    finally:
+        conn.close()
+    return counts
+
+
+def _open_write(path: Path, fmt: str):
+    if fmt == "ndjson.zst":
+        if not have_zstd():
+            raise SnapshotError("zstd圧縮には zstandard が必要 (pip install seishin[zstd])")
+        import zstandard
+        raw = open(path, "wb")
+        return io.TextIOWrapper(
+            zstandard.ZstdCompressor(level=10).stream_writer(raw), encoding="utf-8"
+        )
+    if fmt == "ndjson.gz":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def _export_ndjson(conn, project_id: int, path: Path, fmt: str, manifest: dict) -> dict:
+    counts = {}
+    with _open_write(path, fmt) as f:
+        f.write(json.dumps(manifest, ensure_ascii=False) + "\n")
+        for table, cols in TABLES.items():
+            f.write(json.dumps({"table": table, "columns": [c for c, _ in cols]}) + "\n")
+            n = 0
+            for batch in _iter_batches(conn, table, project_id):
+                f.write("\n".join(map(_to_json, batch)) + "\n")
+                n += len(batch)
+            counts[table] = n
+    return counts
+
+
+def _arrow_schema(table: str):
+    import pyarrow as pa
+    types = {"int": pa.int64(), "code": pa.int8(), "str": pa.string()}
+    return pa.schema([(c, types[t]) for c, t in TABLES[table]])
+
+
+def _export_arrow(conn, project_id: int, path: Path, fmt: str, manifest: dict) -> dict:
+    """A directory dataset: one <table>.<fmt> file per table plus manifest.json."""
+    if not have_pyarrow():
+        raise SnapshotError("Arrow/Parquet出力には pyarrow が必要 (pip install seishin[arrow])")
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    path.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for table in TABLES:
+        schema = _arrow_schema(table)
+        out = path / f"{table}.{fmt}"
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(str(out), schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(
+                str(out), schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+            )
+        n = 0
+        try:
+            for batch in _iter_batches(conn, table, project_id):
+                columns = list(zip(*batch))
+                writer.write_batch(pa.record_batch(
+                    [pa.array(col, type=f.type) for col, f in zip(columns, schema)],
+                    schema=schema,
+                ))
+                n += len(batch)
+        finally:
+            writer.close()
+        counts[table] = n
+    (path / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+    return counts
+
+
+# ── Import ───────────────────────────────────────────
+
+def _open_read(path: Path, fmt: str):
+    if fmt == "ndjson.zst":
+        if not have_zstd():
+            raise SnapshotError("zstd展開には zstandard が必要 (pip install seishin[zstd])")
+        import zstandard
+        return io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8"
+        )
+    if fmt == "ndjson.gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _read_ndjson(path: Path, fmt: str) -> tuple[dict, Iterator[tuple[str, list]]]:
+    f = _open_read(path, fmt)
+    manifest = json.loads(f.readline())
+
+    def batches():
+        # Rows are JSON arrays, table headers are objects. Decode a whole
+        # batch of rows with one json.loads call.
+        table, lines = None, []
+        with f:
+            for line in f:
+                if line[0] == "{":
+                    if lines:
+                        yield table, json.loads("[" + ",".join(lines) + "]")
+                    table, lines = json.loads(line)["table"], []
+                    continue
+                lines.append(line)
+                if len(lines) >= BATCH_ROWS:
+                    yield table, json.loads("[" + ",".join(lines) + "]")
+                    lines = []
+            if lines:
+                yield table, json.loads("[" + ",".join(lines) + "]")
+
+    return manifest, batches()
+
+
+def _read_arrow(path: Path, fmt: str) -> tuple[dict, Iterator[tuple[str, list]]]:
+    if not have_pyarrow():
+        raise SnapshotError("Arrow/Parquet読込には pyarrow が必要 (pip install seishin[arrow])")
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    manifest = json.loads((path / "manifest.json").read_text())
+
+    def batches():
+        for table in TABLES:
+            src = path / f"{table}.{fmt}"
+            if fmt == "parquet":
+                it = pq.ParquetFile(str(src)).iter_batches(batch_size=BATCH_ROWS)
+            else:
+                reader = pyarrow.ipc.open_file(str(src))
+                it = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            for rb in it:
+                cols = [rb.column(c).to_pylist() for c, _ in TABLES[table]]
+                yield table, [list(r) for r in zip(*cols)]
+
+    return manifest, batches()
+
+
+def _drop_secondary_indexes(conn, tables: list[str]) -> list[str]:
+    """Drop named (non-UNIQUE-constraint) indexes; returns their CREATE SQL."""
+    marks = ",".join("?" * len(tables))
+    rows = conn.execute(
+        f"""SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({marks})""",
+        tables,
+    ).fetchall()
+    for r in rows:
+        conn.execute(f'DROP INDEX "{r["name"]}"')
+    return [r["sql"] for r in rows]
+
+
+def import_project(path: Path, name: str | None = None) -> tuple[int, dict[str, int]]:
+    """Load a snapshot as a new project. Returns (project_id, row counts).
+
+    Everything runs in one transaction; secondary indexes on the loaded
+    tables are dropped first and rebuilt once at the end.
+    """
+    fmt = detect_format(path)
+    if fmt in ("parquet", "arrow"):
+        manifest, batches = _read_arrow(path, fmt)
+    else:
+        manifest, batches = _read_ndjson(path, fmt)
+    if manifest.get("format") != "seishin-snapshot":
+        raise SnapshotError(f"seishinのスナップショットではない: {path}")
+    phases, statuses = manifest["phases"], manifest["statuses"]
+    proj = manifest["project"]
+    name = name or proj["name"]
+
+    conn = get_conn()
+    conn.execute("PRAGMA cache_size = -262144")  # 256 MiB for the index builds
+    try:
+        if conn.execute("SELECT 1 FROM project WHERE name = ?", (name,)).fetchone():
+            raise SnapshotError(f"作品「{name}」は既に存在する (--as で別名を指定)")
+        pid = conn.execute(
+            "INSERT INTO project (name, short_name, total_episodes) VALUES (?, ?, ?)",
+            (name, proj.get("short_name"), proj.get("total_episodes")),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO priority_weight (project_id, name, weight) VALUES (?, ?, ?)",
+            [(pid, k, v) for k, v in proj.get("priority_weights", {}).items()],
+        )
+        first_order = conn.execute('SELECT COALESCE(MAX(id), 0) FROM "order"').fetchone()[0]
+        index_sql = _drop_secondary_indexes(
+            conn, ["cut", "cut_phase", "order", "order_cut", "work_log"]
+        )
+        loader = _Loader(conn, pid, phases, statuses)
+        counts: dict[str, int] = {}
+        for table, rows in batches:
+            getattr(loader, f"load_{table}")(rows)
+            counts[table] = counts.get(table, 0) + len(rows)
+        # Orders reference cuts by number; rebuild their order_cut rows
+        conn.execute(
+            """INSERT OR IGNORE INTO order_cut (order_id, cut_id, phase)
+            SELECT o.id, c.id, o.phase
+            FROM "order" o,
+                json_each('["' || replace(o.cut_numbers, ',', '","') || '"]') j
+            JOIN cut c ON c.episode_id = o.episode_id AND c.number = j.value
+            WHERE o.id > ?""",
+            (first_order,),
+        )
+        # phase_mask is kept up by a trigger on status updates only
+        conn.execute(
+            f"""UPDATE cut SET phase_mask = {PHASE_MASK_SQL}
+            WHERE episode_id IN (SELECT id FROM episode WHERE project_id = ?)""",
+            (pid,),
+        )
+        # snapshots carry no event log: start the imported history at the current state
+        conn.execute(
+            seed_phase_events_sql(
+                "c.episode_id IN (SELECT id FROM episode WHERE project_id = :pid)"),
+            {"pid": pid},
+        )
+        for sql in index_sql:
+            conn.execute(sql)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return pid, counts
+
+
+class _Loader:
+    """Per-table bulk inserts with old -> new id remapping."""
+
+    def __init__(self, conn, project_id: int, phases: list[str], statuses: list[str]):
+        self.conn = conn
+        self.project_id = project_id
+        # file code -> this database's code (the lists may have grown since export)
+        try:
+            self.phases = [PHASE_CODE[p] for p in phases]
+            self.statuses = [STATUS_CODE[s] for s in statuses]
+        except KeyError as e:
+            raise SnapshotError(f"未知の工程/状態: {e.args[0]}")
+        self.creators: dict[int, int] = {}
+        self.companies: dict[int, int] = {}
+        self.episodes: dict[int, int] = {}
+        self.cut_offset: int | None = None
+
+    def _by_name(self, table: str, rows: list, id_map: dict):
+        cols = [c for c, _ in TABLES[table]][1:]
+        for r in rows:
+            found = self.conn.execute(
+                f"SELECT id FROM {table} WHERE name = ?", (r[1],)
+            ).fetchone()
+            if found:
+                id_map[r[0]] = found[0]
+            else:
+                id_map[r[0]] = self.conn.execute(
+                    f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                    r[1:],
+                ).lastrowid
+
+    def load_creator(self, rows: list):
+        self._by_name("creator", rows, self.creators)
+
+    def load_company(self, rows: list):
+        self._by_name("company", rows, self.companies)
+
+    def load_episode(self, rows: list):
+        for r in rows:
+            self.episodes[r[0]] = self.conn.execute(
+                """INSERT INTO episode (project_id, number, title, air_date, v_edit_date,
+                   budget, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (self.project_id, *r[1:]),
+            ).lastrowid
+
+    def load_cut(self, rows: list):
+        # Cuts arrive in id order: shift them past the current max id so
+        # cut_phase can be remapped by arithmetic instead of a lookup table.
+        if self.cut_offset is None:
+            top = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM cut").fetchone()[0]
+            self.cut_offset = top + 1 - rows[0][0]
+        off = self.cut_offset
+        eps = self.episodes
+        self.conn.executemany(
+            """INSERT INTO cut (id, episode_id, number, sort_key, difficulty,
+               is_priority, priority_reason, created_at)
+               VALUES (?, ?, ?, COALESCE(cut_sort_key(?), -1), ?, ?, ?, ?)""",
+            # sort_key is recomputed: older files carry keys without the prefix
+            ((r[0] + off, eps[r[1]], r[2], r[2], *r[4:]) for r in rows),
+        )
+
+    def load_cut_phase(self, rows: list):
+        off = self.cut_offset or 0
+        phases, statuses, creators = self.phases, self.statuses, self.creators
+        self.conn.executemany(
+            """INSERT INTO cut_phase_data (cut_id, phase, status, assignee_id, deadline,
+               started_at, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            ((r[0] + off, phases[r[1]], statuses[r[2]],
+              creators.get(r[3]) if r[3] is not None else None, *r[4:]) for r in rows),
+        )
+
+    def _assignee(self, r: tuple) -> int:
+        """This database's id of an order's assignee; the file must contain it."""
+        assignee = {"creator": self.creators, "company": self.companies}.get(r[3], {}).get(r[4])
+        if assignee is None:
+            raise SnapshotError(f"発注の発注先が見つからない: {r[3]} ID {r[4]} ({r[2]})")
+        return assignee
+
+    def load_order(self, rows: list):
+        self.conn.executemany(
+            """INSERT INTO "order" (episode_id, phase, cut_numbers, assignee_type,
+               assignee_id, price_per_cut, total_price, deadline, status, issued_at,
+               created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            ((self.episodes[r[0]], r[1], r[2], r[3], self._assignee(r), *r[5:])
+             for r in rows),
+        )
+
+    def load_work_log(self, rows: list):
+        self.conn.executemany(
+            """INSERT INTO work_log (creator_id, episode_id, phase, cuts_completed,
+               sheets_completed, started_at, completed_at, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            ((self.creators.get(r[0]), self.episodes[r[1]], *r[2:]) for r in rows),
+        )
@@ -0,0 +1,162 @@
+"""クリエイター稼働カレンダー (NumPy)
+
+Open assigned cut-phases across all projects are aggregated in SQL to
+(creator, due day, count) groups. Each cut-phase is one cut of work spread
+evenly from today to its deadline (overdue work lands on today), so a
+group adds n / (days until due + 1) cuts per day over that interval. The
+creator × day load matrix is built from those intervals with a difference
+array (np.add.at at both ends, cumsum along days) instead of looping over
+days. Because a cut's load sums to 1 over its interval, a day-range sum
+of load is a number of cuts, which is also the unit of the suggestions.
+Calendar days, weekends included; history before today is not rebuilt.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from .db import get_conn, STATUS_CODE
+
+_COMPLETED = STATUS_CODE["completed"]
+
+
+class Workload:
+    """Creator × day load (cuts/day) against ``daily_capacity``.
+
+    ``creators`` rows (id, name, skills, daily_capacity), ``days`` the
+    dates of the columns, ``load``/``capacity`` float arrays, ``overdue``
+    and ``unscheduled`` (open work without a deadline) counts per creator.
+    """
+
+    def __init__(self, start: date, end: date, today: date | None = None):
+        self.today = today or date.today()
+        conn = get_conn()
+        try:
+            self._load(conn, start, end)
+        finally:
+            conn.close()
+
+    def _load(self, conn, start: date, end: date):
+        creators = conn.execute(
+            "SELECT id, name, skills, daily_capacity FROM creator ORDER BY id"
+        ).fetchall()
+        self.creators = [dict(r) for r in creators]
+        index = {c["id"]: i for i, c in enumerate(self.creators)}
+        n = len(self.creators)
+        self.capacity = np.array([c["daily_capacity"] or 0 for c in self.creators], dtype=np.float64)
+
+        cur = conn.cursor()
+        cur.row_factory = None
+        groups = cur.execute(
+            f"""SELECT assignee_id, MAX(date(deadline), :today) AS due,
+                COUNT(*), SUM(date(deadline) < :today)
+            FROM cut_phase_data
+            WHERE assignee_id IS NOT NULL AND status != {_COMPLETED}
+            GROUP BY assignee_id, due""",
+            {"today": self.today.isoformat()},
+        ).fetchall()
+
+        self.overdue = np.zeros(n, dtype=np.int64)
+        self.unscheduled = np.zeros(n, dtype=np.int64)
+        who, due, count = [], [], []
+        for assignee, due_day, k, overdue in groups:
+            i = index.get(assignee)
+            if i is None:
+                continue
+            if due_day is None:
+                self.unscheduled[i] += k
+                continue
+            self.overdue[i] += overdue or 0
+            who.append(i)
+            due.append(due_day)
+            count.append(k)
+
+        # Day 0 is today; the axis runs to the later of --to and the last deadline.
+        offset = (np.array(due, dtype="datetime64[D]") - np.datetime64(self.today, "D")).astype(np.int64)
+        horizon = max(int(offset.max()) + 1 if len(offset) else 0, (end - self.today).days + 1, 1)
+        diff = np.zeros((n, horizon + 1))
+        rate = np.array(count, dtype=np.float64) / (offset + 1)
+        who = np.array(who, dtype=np.int64)
+        np.add.at(diff, (who, np.zeros_like(who)), rate)
+        np.add.at(diff, (who, offset + 1), -rate)
+        full = np.cumsum(diff[:, :horizon], axis=1)
+
+        # Window [start, end]; days before today carry no (reconstructed) load.
+        lo, hi = (start - self.today).days, (end - self.today).days + 1
+        self.days = [start + timedelta(days=d) for d in range(hi - lo)]
+        self.load = np.zeros((n, hi - lo))
+        src = slice(max(lo, 0), max(hi, 0))
+        self.load[:, src.start - lo:src.stop - lo] = full[:, src]
+
+    @property
+    def over(self) -> np.ndarray:
+        """Cuts/day above capacity (0 where capacity is unset)."""
+        return np.where(self.capacity[:, None] > 0,
+                        np.maximum(self.load - self.capacity[:, None], 0), 0)
+
+    @property
+    def free(self) -> np.ndarray:
+        """Spare cuts/day below capacity (0 where capacity is unset)."""
+        return np.where(self.capacity[:, None] > 0,
+                        np.maximum(self.capacity[:, None] - self.load, 0), 0)
+
+    def skill_match(self) -> np.ndarray:
+        """n × n: True where creator j shares a skill with creator i (any j if i lists none)."""
+        skill_sets = [{s.strip() for s in (c["skills"] or "").split(",") if s.strip()}
+                      for c in self.creators]
+        col = {s: j for j, s in enumerate(sorted(set().union(*skill_sets)))}
+        onehot = np.zeros((len(skill_sets), len(col)), dtype=np.int32)
+        for i, skills in enumerate(skill_sets):
+            onehot[i, [col[s] for s in skills]] = 1
+        match = ((onehot @ onehot.T) > 0) | (onehot.sum(axis=1) == 0)[:, None]
+        np.fill_diagonal(match, False)
+        return match
+
+    def rows(self, show_all: bool = False) -> list[dict]:
+        """Per-creator rows for render_creator_load: overbooked creators, or all with work."""
+        over = self.over
+        rows = []
+        for i, c in enumerate(self.creators):
+            busy = self.load[i].any() or self.overdue[i] or self.unscheduled[i]
+            if not (over[i].any() or (show_all and busy)):
+                continue
+            rows.append({
+                **c,
+                "load": self.load[i].tolist(),
+                "over": (over[i] > 0).tolist(),
+                "over_cuts": float(over[i].sum()),
+                "overdue": int(self.overdue[i]),
+                "unscheduled": int(self.unscheduled[i]),
+            })
+        return sorted(rows, key=lambda r: -r["over_cuts"])
+
+    def suggestions(self, min_cuts: float = 0.5) -> list[dict]:
+        """Greedy reassignments: worst-overbooked creator first, to the matching
+        creators with the most spare capacity on that creator's overbooked days.
+        """
+        over, free = self.over, self.free.copy()
+        match = self.skill_match()
+        result = []
+        for i in np.argsort(-over.sum(axis=1)):
+            need = over[i].copy()
+            if need.sum() < min_cuts:
+                break
+            candidates = np.flatnonzero(match[i])
+            while need.sum() >= min_cuts and len(candidates):
+                moved = np.minimum(need, free[candidates])  # candidates × days
+                best = int(np.argmax(moved.sum(axis=1)))
+                cuts = float(moved[best].sum())
+                if cuts < min_cuts:
+                    break
+                j = candidates[best]
+                free[j] -= moved[best]
+                need -= moved[best]
+                days = np.flatnonzero(moved[best] > 0)
+                result.append({
+                    "from_id": self.creators[i]["id"], "from_name": self.creators[i]["name"],
+                    "to_id": self.creators[j]["id"], "to_name": self.creators[j]["name"],
+                    "cuts": cuts,
+                    "first_day": self.days[days[0]], "last_day": self.days[days[-1]],
+                })
+                candidates = np.delete(candidates, best)
+        return result
@@ -0,0 +1,12 @@
+import pytest
+
+from seishin import db
+
+
+@pytest.fixture
+def seishin_db(tmp_path, monkeypatch):
+    """An initialised database under tmp_path in place of ~/.seishin."""
+    monkeypatch.setattr(db, "SEISHIN_DIR", tmp_path)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "seishin.db")
+    db.init_db()
+    return db.DB_PATH
@@ -0,0 +1,35 @@
+from seishin import models
+
+
+def _episode(numbers):
+    project_id = models.project_add("テスト", None, 12)
+    episode_id = models.episode_add(project_id, 1, None, None, None)
+    models.cut_add(episode_id, numbers)
+    return episode_id
+
+
+def _column(episode_id, column):
+    return {c.number: c[column] for c in models.cut_list(episode_id)}
+
+
+def test_flag_matches_prefix_and_number(seishin_db):
+    episode_id = _episode(["A001", "A002", "C001", "C002"])
+    assert models.cut_set_priority(episode_id, "A001", True) == 1
+    assert _column(episode_id, "is_priority") == {"A001": 1, "A002": 0, "C001": 0, "C002": 0}
+
+
+def test_flag_cuts_without_sort_key(seishin_db):
+    episode_id = _episode(["OP", "ABCDE1", "C001"])
+    assert models.cut_set_priority(episode_id, "OP,ABCDE1", True) == 2
+    assert _column(episode_id, "is_priority") == {"OP": 1, "ABCDE1": 1, "C001": 0}
+
+
+def test_set_difficulty_per_prefix(seishin_db):
+    episode_id = _episode(["A001", "A002", "C001", "C002"])
+    assert models.cut_set_difficulty(episode_id, [("C001-C002", 5), ("A002", 1)]) == 3
+    assert _column(episode_id, "difficulty") == {"A001": 3, "A002": 1, "C001": 5, "C002": 5}
+
+
+def test_cut_list_orders_by_prefix(seishin_db):
+    episode_id = _episode(["C002", "A002", "C001", "A001", "C001A"])
+    assert list(_column(episode_id, "number")) == ["A001", "A002", "C001", "C001A", "C002"]
@@ -0,0 +1,33 @@
+import pytest
+
+from seishin import db, models
+
+
+@pytest.fixture
+def shared(seishin_db):
+    db.open_shared_conn()
+    yield
+    db.close_shared_conn()
+
+
+def _add(name):
+    return models.creator_add(name, None, None, 3, 3, 0)
+
+
+def test_rollback_drops_rows_read_in_the_transaction(shared):
+    _add("既存")
+    assert models.creator_get_by_name("既存") is not None
+    with pytest.raises(RuntimeError):
+        with db.deferred_commits():
+            _add("取消")
+            assert models.creator_get_by_name("取消") is not None
+            raise RuntimeError
+    _add("次")  # brings table_version back to the value seen inside the transaction
+    assert models.creator_get_by_name("取消") is None
+
+
+def test_write_invalidates_cached_lookup(seishin_db):
+    creator_id = _add("山田")
+    assert models.creator_get(creator_id)["daily_capacity"] == 0
+    models.creator_update(creator_id, daily_capacity=4)
+    assert models.creator_get(creator_id)["daily_capacity"] == 4